@@ -0,0 +1 @@
+"""Performance benchmarks, run with `python -m benchmarks.pipeline`. Not part of the installed package."""
@@ -0,0 +1,129 @@
+"""How long importing the package takes, measured with `python -X importtime` in fresh interpreters.
+
+.. code-block:: console
+
+    $ python -m benchmarks.importtime
+    $ python -m benchmarks.importtime --runs 21 --top 15 --output importtime.json
+
+Flask is imported before each statement is timed, since every app imports it anyway, so the figures are the cost of
+this package alone:
+
+``package``
+    `import discord_interactions_flask`, which only defines the lazily imported names.
+``discord``
+    `from discord_interactions_flask import Discord`, everything needed to serve interactions.
+
+The median of `--runs` interpreters is compared against :data:`BUDGETS`, and the command fails if a statement got
+over its budget. Before the package's names and its optional features (metrics, profiling, recording, the WSGI app,
+SQLite) were imported lazily, both took about 170ms on the machine the budgets were set on, where they now take about
+0.5ms and 130ms.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Optional
+
+STATEMENTS = {
+    "package": "import discord_interactions_flask",
+    "discord": "from discord_interactions_flask import Discord",
+}
+
+# Milliseconds
+BUDGETS = {
+    "package": 10.0,
+    "discord": 150.0,
+}
+
+
+def parse(stderr: str) -> list[tuple[str, int, int, int]]:
+    """The `(module, self, cumulative, depth)` of each line of `-X importtime` output, times in microseconds."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(own), int(cumulative), depth))
+    return modules
+
+
+def measure(statement: str) -> list[tuple[str, int, int, int]]:
+    """The modules imported by `statement` in a fresh interpreter that already imported Flask."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import flask\n{statement}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = parse(proc.stderr)
+    # Everything up to and including the import of Flask itself
+    last_flask = max(
+        i
+        for i, (name, _, _, depth) in enumerate(modules)
+        if name == "flask" and depth == 0
+    )
+    return modules[last_flask + 1 :]
+
+
+def run(runs: int = 11, top: int = 10) -> dict:
+    """Time every statement in :data:`STATEMENTS` over `runs` interpreters.
+
+    Returns
+        The median, minimum and maximum milliseconds of each statement, and the `top` modules it spends the most
+        time in (by self time, in the median run).
+    """
+    results = {}
+    for name, statement in STATEMENTS.items():
+        samples = []
+        for _ in range(runs):
+            modules = measure(statement)
+            total = sum(cumulative for _, _, cumulative, depth in modules if depth == 0)
+            samples.append((total / 1000, modules))
+        samples.sort(key=lambda sample: sample[0])
+        median, modules = samples[len(samples) // 2]
+        results[name] = {
+            "statement": statement,
+            "median": median,
+            "min": samples[0][0],
+            "max": samples[-1][0],
+            "top": [
+                {"module": module, "self": own / 1000}
+                for module, own, _, _ in sorted(modules, key=lambda m: -m[1])[:top]
+            ],
+        }
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.importtime", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--runs", type=int, default=11)
+    parser.add_argument(
+        "--top", type=int, default=10, help="Show the slowest modules of each import"
+    )
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs, args.top)
+    failed = False
+    for name, result in results.items():
+        budget = BUDGETS[name]
+        over = result["median"] > budget
+        failed = failed or over
+        print(
+            f"{name:<10} {result['median']:>8.1f}ms  (min {result['min']:.1f}ms, "
+            f"max {result['max']:.1f}ms, budget {budget:.0f}ms){'  OVER BUDGET' if over else ''}"
+        )
+        for module in result["top"]:
+            print(f"    {module['self']:>8.1f}ms  {module['module']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"budgets": BUDGETS, "results": results}, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
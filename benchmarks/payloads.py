@@ -0,0 +1,289 @@
+"""Realistic interaction payloads, signed the way Discord signs them.
+
+The payloads are shaped like what Discord actually sends: guild member objects, resolved data, and for component
+interactions the whole message the component was attached to, which is by far the largest part of most requests.
+They are signed with a fixed key so that results are comparable between runs.
+"""
+import json
+
+from nacl.signing import SigningKey
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask import loadgen
+
+SIGNING_KEY = SigningKey(bytes(range(32)))
+PUBLIC_KEY = loadgen.public_key(SIGNING_KEY)
+TIMESTAMP = "1700000000"
+
+APPLICATION_ID = "1000000000000000001"
+GUILD_ID = "1000000000000000002"
+CHANNEL_ID = "1000000000000000003"
+USER_ID = "1000000000000000004"
+ECHO_COMMAND_ID = "1000000000000000010"
+SETTINGS_COMMAND_ID = "1000000000000000011"
+# The interaction whose response carried the button and select menu
+SETTINGS_INTERACTION_ID = "1000000000000000100"
+
+USER = {
+    "id": USER_ID,
+    "username": "benchmark",
+    "discriminator": "0001",
+    "avatar": "a" * 32,
+    "public_flags": 64,
+}
+
+MEMBER = {
+    "user": USER,
+    "roles": [str(1000000000000000200 + i) for i in range(8)],
+    "premium_since": None,
+    "permissions": "4398046511103",
+    "pending": False,
+    "nick": None,
+    "mute": False,
+    "joined_at": "2022-01-01T00:00:00.000000+00:00",
+    "is_pending": False,
+    "deaf": False,
+    "communication_disabled_until": None,
+    "avatar": None,
+}
+
+
+def _interaction(interaction_id: str, type_: int, data=None, **fields) -> dict:
+    payload = {
+        "id": interaction_id,
+        "application_id": APPLICATION_ID,
+        "type": type_,
+        "token": "t" * 200,
+        "version": 1,
+        "guild_id": GUILD_ID,
+        "channel_id": CHANNEL_ID,
+        "member": MEMBER,
+        "app_permissions": "4398046511103",
+        "locale": "en-US",
+        "guild_locale": "en-US",
+    }
+    if data is not None:
+        payload["data"] = data
+    payload.update(fields)
+    return payload
+
+
+def ping() -> dict:
+    """A PING, sent by Discord to check the endpoint."""
+    return {
+        "id": "1000000000000000101",
+        "application_id": APPLICATION_ID,
+        "type": types.InteractionType.PING,
+        "token": "t" * 200,
+        "version": 1,
+        "user": USER,
+    }
+
+
+def chat_with_options() -> dict:
+    """`/echo` with a string, an integer, a boolean and a user option."""
+    return _interaction(
+        "1000000000000000102",
+        types.InteractionType.APPLICATION_COMMAND,
+        {
+            "id": ECHO_COMMAND_ID,
+            "name": "echo",
+            "type": types.CommandType.CHAT,
+            "guild_id": GUILD_ID,
+            "options": [
+                {
+                    "name": "text",
+                    "type": types.ApplicationCommandOptionType.STRING,
+                    "value": "The quick brown fox jumps over the lazy dog " * 4,
+                },
+                {
+                    "name": "times",
+                    "type": types.ApplicationCommandOptionType.INTEGER,
+                    "value": 3,
+                },
+                {
+                    "name": "loud",
+                    "type": types.ApplicationCommandOptionType.BOOLEAN,
+                    "value": True,
+                },
+                {
+                    "name": "target",
+                    "type": types.ApplicationCommandOptionType.USER,
+                    "value": USER_ID,
+                },
+            ],
+            "resolved": {"users": {USER_ID: USER}, "members": {USER_ID: MEMBER}},
+        },
+    )
+
+
+def meta_command_group() -> dict:
+    """`/settings notifications enable`, a subcommand of a subcommand group."""
+    return _interaction(
+        SETTINGS_INTERACTION_ID,
+        types.InteractionType.APPLICATION_COMMAND,
+        {
+            "id": SETTINGS_COMMAND_ID,
+            "name": "settings",
+            "type": types.CommandType.CHAT,
+            "guild_id": GUILD_ID,
+            "options": [
+                {
+                    "name": "notifications",
+                    "type": types.ApplicationCommandOptionType.SUB_COMMAND_GROUP,
+                    "options": [
+                        {
+                            "name": "enable",
+                            "type": types.ApplicationCommandOptionType.SUB_COMMAND,
+                            "options": [
+                                {
+                                    "name": "channel",
+                                    "type": types.ApplicationCommandOptionType.CHANNEL,
+                                    "value": CHANNEL_ID,
+                                }
+                            ],
+                        }
+                    ],
+                }
+            ],
+            "resolved": {
+                "channels": {
+                    CHANNEL_ID: {
+                        "id": CHANNEL_ID,
+                        "name": "general",
+                        "type": types.ChannelType.GUILD_TEXT,
+                        "permissions": "4398046511103",
+                    }
+                }
+            },
+        },
+    )
+
+
+def _message(components: list) -> dict:
+    """The message a component was attached to, as large as Discord allows: full content and ten embeds."""
+    return {
+        "id": "1000000000000000300",
+        "channel_id": CHANNEL_ID,
+        "author": dict(USER, bot=True),
+        "content": ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 36)[
+            :2000
+        ],
+        "timestamp": "2023-11-14T22:13:20.000000+00:00",
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [USER],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [
+            {
+                "type": "rich",
+                "title": f"Embed {i}",
+                "description": "Sed ut perspiciatis unde omnis iste natus error. " * 8,
+                "color": 5814783,
+                "fields": [
+                    {"name": f"Field {j}", "value": "value " * 10, "inline": True}
+                    for j in range(10)
+                ],
+                "footer": {"text": "footer"},
+            }
+            for i in range(10)
+        ],
+        "pinned": False,
+        "type": types.MessageType.CHAT_INPUT_COMMAND,
+        "flags": 0,
+        "application_id": APPLICATION_ID,
+        "webhook_id": APPLICATION_ID,
+        "interaction": {
+            "id": SETTINGS_INTERACTION_ID,
+            "name": "settings notifications enable",
+            "type": types.InteractionType.APPLICATION_COMMAND,
+            "user": USER,
+            "member": MEMBER,
+        },
+        "components": components,
+    }
+
+
+def settings_components() -> list:
+    """The rows of the settings panel: four rows of five buttons, and a select menu with 25 options."""
+    return [
+        *(
+            {
+                "type": types.ComponentType.ACTION_ROW,
+                "components": [
+                    {
+                        "type": types.ComponentType.BUTTON,
+                        "style": types.ButtonStyle.PRIMARY,
+                        "label": f"Button {row}-{column}",
+                        "custom_id": f"button-{row}-{column}",
+                    }
+                    for column in range(5)
+                ],
+            }
+            for row in range(4)
+        ),
+        {
+            "type": types.ComponentType.ACTION_ROW,
+            "components": [
+                {
+                    "type": types.ComponentType.SELECT_MENU,
+                    "custom_id": "select",
+                    "placeholder": "Pick some",
+                    "min_values": 1,
+                    "max_values": 25,
+                    "options": [
+                        {
+                            "label": f"Option {i}",
+                            "value": str(i),
+                            "description": f"The option numbered {i}",
+                        }
+                        for i in range(25)
+                    ],
+                }
+            ],
+        },
+    ]
+
+
+def button_click() -> dict:
+    """A click on one of the settings panel's buttons, carrying the whole panel message."""
+    return _interaction(
+        "1000000000000000103",
+        types.InteractionType.MESSAGE_COMPONENT,
+        {"custom_id": "button-0-0", "component_type": types.ComponentType.BUTTON},
+        message=_message(settings_components()),
+    )
+
+
+def select_menu() -> dict:
+    """A choice of several options in the settings panel's select menu."""
+    return _interaction(
+        "1000000000000000104",
+        types.InteractionType.MESSAGE_COMPONENT,
+        {
+            "custom_id": "select",
+            "component_type": types.ComponentType.SELECT_MENU,
+            "values": [str(i) for i in range(0, 25, 3)],
+        },
+        message=_message(settings_components()),
+    )
+
+
+PAYLOADS = {
+    "ping": ping,
+    "chat_options": chat_with_options,
+    "meta_group": meta_command_group,
+    "button_large_message": button_click,
+    "select_menu": select_menu,
+}
+
+
+def sign(body: bytes) -> dict:
+    """The headers Discord would send with `body`, signed with :data:`SIGNING_KEY`."""
+    return loadgen.sign(body, SIGNING_KEY, TIMESTAMP)
+
+
+def encode(payload: dict) -> bytes:
+    return json.dumps(payload).encode()
@@ -0,0 +1,423 @@
+"""Benchmarks of each stage of handling an interaction, and of the whole request through the Flask test client.
+
+.. code-block:: console
+
+    $ python -m benchmarks.pipeline --output before.json
+    $ python -m benchmarks.pipeline --compare before.json --max-regression 0.1
+
+Every payload in :mod:`benchmarks.payloads` is measured at each stage it goes through in the interactions view:
+
+``verify``
+    :func:`~discord_interactions_flask.verify.verify_key` on the raw body.
+``load``
+    `<Interaction type>.load` of the parsed body.
+``dispatch``
+    Looking up the command, or the component in the component store.
+``handler``
+    Calling the command or component, which walks subcommand groups and binds options to arguments, with handlers
+    that return a prebuilt response so that only the library's own work is measured.
+``serialize``
+    :meth:`~discord_interactions_flask.discord.Discord._handle_response`, which registers any components in the
+    response and dumps it to JSON.
+``end_to_end``
+    A signed POST to `/discord/interactions` through the Flask test client.
+``end_to_end_wsgi``
+    The same POST through a werkzeug test client of
+    :meth:`Discord.wsgi_app <discord_interactions_flask.discord.Discord.wsgi_app>`, which skips Flask's request handling.
+
+Each benchmark is timed like :mod:`timeit`, in `--repeat` rounds of enough calls to take about 0.2 seconds. The
+results are written as JSON with the per call minimum, median and mean of the rounds, so runs can be kept and compared.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Callable, Optional
+
+from flask import Flask
+from werkzeug.test import Client
+
+import discord_interactions_flask
+from discord_interactions_flask import Discord
+from discord_interactions_flask import components
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask.command import (
+    ChatCommandWithArgs,
+    ChatMetaCommand,
+    CommandGroup,
+    SubCommand,
+)
+from discord_interactions_flask.component_store import ComponentStore
+from discord_interactions_flask.helpers import content_response
+from discord_interactions_flask.interactions import (
+    ButtonInteraction,
+    ChatInteraction,
+    SelectMenuInteraction,
+)
+from discord_interactions_flask.sync import CommandManifest
+from discord_interactions_flask.verify import verify_key
+
+from benchmarks import payloads
+
+LOADERS = {
+    "chat_options": ChatInteraction,
+    "meta_group": ChatInteraction,
+    "button_large_message": ButtonInteraction,
+    "select_menu": SelectMenuInteraction,
+}
+
+
+def settings_panel() -> types.InteractionResponse:
+    """The response to `/settings notifications enable`, with the components described by :func:`payloads.settings_components`."""
+    saved = content_response("Saved", flags=types.MessageFlags.EPHEMERAL)
+    rows = []
+    for row in payloads.settings_components():
+        rows.append(
+            types.ActionRow(
+                components=[
+                    components.Button(
+                        style=types.ButtonStyle(spec["style"]),
+                        custom_id=spec["custom_id"],
+                        label=spec["label"],
+                        interaction_handler=lambda interaction: saved,
+                    )
+                    if spec["type"] == types.ComponentType.BUTTON
+                    else components.SelectMenu(
+                        custom_id=spec["custom_id"],
+                        options=[
+                            types.SelectOption(**option) for option in spec["options"]
+                        ],
+                        placeholder=spec["placeholder"],
+                        min_values=spec["min_values"],
+                        max_values=spec["max_values"],
+                        interaction_handler=lambda interaction: saved,
+                    )
+                    for spec in row["components"]
+                ]
+            )
+        )
+    return types.InteractionResponse(
+        type=types.InteractionCallbackType.CHANNEL_MESSAGE_WITH_SOURCE,
+        data=types.InteractionCallbackDataMessage(
+            content="Notification settings", components=rows
+        ),
+    )
+
+
+def make_discord(component_store: Optional[ComponentStore] = None) -> Discord:
+    """A :class:`Discord` with the commands invoked by the payloads."""
+    discord = Discord(component_store=component_store)
+
+    echoed = content_response("The quick brown fox jumps over the lazy dog " * 12)
+    echo = ChatCommandWithArgs(
+        name="echo",
+        description="Repeat some text",
+        options=[
+            types.ApplicationCommandOption(
+                type=types.ApplicationCommandOptionType.STRING,
+                name="text",
+                description="What to say",
+                required=True,
+            ),
+            types.ApplicationCommandOption(
+                type=types.ApplicationCommandOptionType.INTEGER,
+                name="times",
+                description="How many times",
+            ),
+            types.ApplicationCommandOption(
+                type=types.ApplicationCommandOptionType.BOOLEAN,
+                name="loud",
+                description="Whether to shout",
+            ),
+            types.ApplicationCommandOption(
+                type=types.ApplicationCommandOptionType.USER,
+                name="target",
+                description="Who to say it to",
+            ),
+        ],
+    )
+    echo.handler(lambda text, times=1, loud=False, target=None: echoed)
+    discord.add_command(echo, payloads.GUILD_ID)
+
+    panel = settings_panel()
+    enable = SubCommand(name="enable", description="Enable notifications")
+    enable.handler(lambda interaction: panel)
+    notifications = CommandGroup(name="notifications", description="Notifications")
+    notifications.add_child(enable)
+    settings = ChatMetaCommand(name="settings", description="Settings")
+    settings.add_child(notifications)
+    discord.add_command(settings, payloads.GUILD_ID)
+    return discord
+
+
+def make_app(
+    directory: str, component_store: Optional[ComponentStore] = None
+) -> tuple[Flask, Discord]:
+    """An initialized app that loads its command ids from a manifest in `directory` rather than contacting Discord."""
+    discord = make_discord(component_store)
+    manifest = CommandManifest(os.path.join(directory, "commands.json"))
+    guild_commands = discord.commands[payloads.GUILD_ID]
+    manifest.update(
+        payloads.GUILD_ID,
+        {
+            payloads.ECHO_COMMAND_ID: guild_commands["echo"],
+            payloads.SETTINGS_COMMAND_ID: guild_commands["settings"],
+        },
+    )
+    manifest.save()
+
+    app = Flask(__name__)
+    app.config["DISCORD_PUBLIC_KEY"] = payloads.PUBLIC_KEY
+    app.config["DISCORD_CLIENT_ID"] = payloads.APPLICATION_ID
+    app.config["DISCORD_CLIENT_SECRET"] = "secret"
+    app.config["DISCORD_SYNC_COMMANDS"] = False
+    app.config["DISCORD_COMMAND_MANIFEST"] = manifest.path
+    discord.init_app(app)
+    return app, discord
+
+
+def make_benchmarks(app: Flask, discord: Discord) -> dict[str, Callable[[], object]]:
+    """Every benchmark, named `<stage>/<payload>`."""
+    client = app.test_client()
+    wsgi_client = Client(discord.wsgi_app(app))
+    benchmarks: dict[str, Callable[[], object]] = {}
+
+    # The components clicked by the component payloads
+    meta = ChatInteraction.load(
+        json.loads(payloads.encode(payloads.meta_command_group()))
+    )
+    settings = discord.runtime_commands[payloads.SETTINGS_COMMAND_ID]
+    with app.app_context():
+        discord._handle_response(meta, settings(meta))
+
+    for name, make_payload in payloads.PAYLOADS.items():
+        body = payloads.encode(make_payload())
+        headers = payloads.sign(body)
+        signature = headers["X-Signature-Ed25519"]
+        timestamp = headers["X-Signature-Timestamp"]
+        payload = json.loads(body)
+
+        benchmarks[
+            f"verify/{name}"
+        ] = lambda body=body, signature=signature, timestamp=timestamp: verify_key(
+            body, signature, timestamp, payloads.PUBLIC_KEY
+        )
+
+        loader = LOADERS.get(name)
+        if loader is not None:
+            interaction = loader.load(payload)
+            benchmarks[f"load/{name}"] = lambda loader=loader, payload=payload: (
+                loader.load(payload)
+            )
+
+            if payload["type"] == types.InteractionType.APPLICATION_COMMAND:
+                dispatch = lambda interaction=interaction: discord.runtime_commands.get(
+                    interaction.data.id
+                )
+            else:
+                dispatch = lambda interaction=interaction: (
+                    discord.component_handlers.get(
+                        interaction.message.interaction.id, interaction.data.custom_id
+                    )
+                )
+            handler = dispatch()
+            assert handler is not None, name
+            response = handler(interaction)
+            benchmarks[f"dispatch/{name}"] = dispatch
+            benchmarks[
+                f"handler/{name}"
+            ] = lambda handler=handler, interaction=interaction: handler(interaction)
+            benchmarks[f"serialize/{name}"] = _in_app_context(
+                app,
+                lambda interaction=interaction, response=response: (
+                    discord._handle_response(interaction, response)
+                ),
+            )
+
+        def end_to_end(body=body, headers=headers, name=name):
+            resp = client.post(
+                "/discord/interactions",
+                data=body,
+                content_type="application/json",
+                headers=headers,
+            )
+            assert resp.status_code == 200, (name, resp.status_code)
+
+        benchmarks[f"end_to_end/{name}"] = end_to_end
+
+        def end_to_end_wsgi(body=body, headers=headers, name=name):
+            resp = wsgi_client.post(
+                "/discord/interactions",
+                data=body,
+                content_type="application/json",
+                headers=headers,
+            )
+            assert resp.status_code == 200, (name, resp.status_code)
+
+        benchmarks[f"end_to_end_wsgi/{name}"] = end_to_end_wsgi
+
+    return benchmarks
+
+
+def _in_app_context(app: Flask, func: Callable[[], object]) -> Callable[[], object]:
+    def wrapper():
+        with app.app_context():
+            return func()
+
+    return wrapper
+
+
+def measure(func: Callable[[], object], repeat: int, number: Optional[int] = None):
+    """Time `func` like :mod:`timeit`, and summarize the time per call of each round.
+
+    Args
+        func: What to time.
+
+        repeat: How many rounds to time.
+
+        number: Calls per round. By default enough to take about 0.2 seconds.
+
+    Returns
+        The calls per round, and the minimum, median, mean and standard deviation of the seconds per call.
+    """
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    per_call = [total / number for total in timer.repeat(repeat, number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(per_call),
+        "median": statistics.median(per_call),
+        "mean": statistics.fmean(per_call),
+        "stdev": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+    }
+
+
+def run(
+    only: tuple[str, ...] = (), repeat: int = 5, number: Optional[int] = None
+) -> dict:
+    """Run the benchmarks whose names contain any of `only` (all of them by default).
+
+    Returns
+        The results, along with what they were measured on.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        app, discord = make_app(directory)
+        for name, func in make_benchmarks(app, discord).items():
+            if only and not any(part in name for part in only):
+                continue
+            results[name] = measure(func, repeat, number)
+    return {
+        "version": discord_interactions_flask.__version__,
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "benchmarks": results,
+    }
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list[str]:
+    """The benchmarks whose median is more than `max_regression` (a fraction) slower than in `baseline`."""
+    regressions = []
+    for name, result in results["benchmarks"].items():
+        before = baseline["benchmarks"].get(name)
+        if before is None:
+            continue
+        if result["median"] > before["median"] * (1 + max_regression):
+            regressions.append(name)
+    return regressions
+
+
+def report(results: dict, baseline: Optional[dict] = None) -> str:
+    """Format the results as a table, with the change from `baseline` if given."""
+    lines = [f"{'benchmark':<36} {'median':>12} {'min':>12} {'change':>8}"]
+    for name, result in results["benchmarks"].items():
+        change = ""
+        before = baseline and baseline["benchmarks"].get(name)
+        if before:
+            change = f"{result['median'] / before['median'] - 1:+.1%}"
+        lines.append(
+            f"{name:<36} {_format_seconds(result['median']):>12} "
+            f"{_format_seconds(result['min']):>12} {change:>8}"
+        )
+    return "\n".join(lines)
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f}us"
+    return f"{seconds * 1e3:.2f}ms"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.pipeline", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument(
+        "only",
+        nargs="*",
+        help="Only run the benchmarks whose names contain one of these, e.g. verify or button",
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per benchmark")
+    parser.add_argument(
+        "--number", type=int, help="Calls per round, calibrated by default"
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument(
+        "--compare", help="Show the change from the results in this JSON file"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        help="With --compare, fail if a median is more than this fraction slower",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(tuple(args.only), args.repeat, args.number)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(report(results, baseline))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline is not None and args.max_regression is not None:
+        regressions = compare(results, baseline, args.max_regression)
+        if regressions:
+            print(
+                f"Slower by more than {args.max_regression:.0%}: {', '.join(regressions)}",
+                file=sys.stderr,
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""A long running memory soak of the component dispatch path.
+
+.. code-block:: console
+
+    $ python -m benchmarks.soak --interactions 1000000 --output soak.json
+    $ python -m benchmarks.soak --interactions 200000 --ttl 60 --tracemalloc
+
+Each iteration sends `/settings notifications enable`, whose response carries the 21 components of the settings
+panel, and then a click on one of them, through the Flask test client. Every `--sample-every` iterations the resident
+set size, the size of the component store, and optionally the top allocators according to :mod:`tracemalloc` are
+sampled. Memory that isn't given back shows up as a growing number of bytes per live interaction, the growth in RSS
+since the app was set up divided by the number of interactions whose components are still stored. The run fails if
+that ends up over `--budget`.
+
+Every iteration goes through the whole pipeline, loading and dumping the payloads with :mod:`jsons` included, so a run
+of the default million interactions takes hours. A `--ttl` keeps the number of live interactions bounded, which shows
+whether memory is given back once components expire.
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional
+
+from discord_interactions_flask.component_store import MemoryComponentStore
+
+from benchmarks import payloads
+from benchmarks.pipeline import make_app
+
+# The components in each settings panel response
+COMPONENTS_PER_INTERACTION = sum(
+    len(row["components"]) for row in payloads.settings_components()
+)
+
+# Stands in for the interaction id in the payload templates
+PLACEHOLDER = "9999999999999999999"
+
+# Bytes of RSS per interaction whose components are stored. The memory store settles at about 600 bytes for the 21
+# components of a settings panel, the rest is room for allocator noise over a run of a million.
+DEFAULT_BUDGET = 4096
+
+
+def rss() -> int:
+    """The resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # The peak rather than the current size, but that still catches growth
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _templates() -> tuple[bytes, bytes]:
+    command = payloads.meta_command_group()
+    command["id"] = PLACEHOLDER
+    click = payloads.button_click()
+    click["message"]["interaction"]["id"] = PLACEHOLDER
+    return payloads.encode(command), payloads.encode(click)
+
+
+def soak(
+    interactions: int,
+    sample_every: int = 10000,
+    ttl: Optional[float] = None,
+    trace: bool = False,
+    top: int = 10,
+    log=None,
+) -> dict:
+    """Drive `interactions` responses and clicks through an app, sampling its memory use as it goes.
+
+    Args
+        interactions: How many commands to send, each followed by a click.
+
+        sample_every: Iterations between samples.
+
+        ttl: Passed on to the :class:`~discord_interactions_flask.component_store.MemoryComponentStore`.
+
+        trace: Whether to trace allocations with :mod:`tracemalloc`, which slows everything down a lot.
+
+        top: How many of the top allocators to report with `trace`.
+
+        log: Called with each sample as it is taken.
+
+    Returns
+        The samples, and the top allocators at the end with `trace`.
+    """
+    command_template, click_template = _templates()
+    samples = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = MemoryComponentStore(ttl=ttl, expire_interval=min(ttl or 60, 60))
+        app, _ = make_app(directory, store)
+        client = app.test_client()
+
+        if trace:
+            tracemalloc.start()
+        gc.collect()
+        baseline = rss()
+        start = time.perf_counter()
+
+        def sample(iteration: int):
+            gc.collect()
+            now = rss()
+            live = len(store) // COMPONENTS_PER_INTERACTION
+            entry = {
+                "iteration": iteration,
+                "seconds": time.perf_counter() - start,
+                "rss": now,
+                "rss_growth": now - baseline,
+                "components": len(store),
+                "live_interactions": live,
+                "bytes_per_live_interaction": (now - baseline) / live if live else 0.0,
+            }
+            if trace:
+                entry["traced"] = tracemalloc.get_traced_memory()[0]
+            samples.append(entry)
+            if log is not None:
+                log(entry)
+
+        for iteration in range(1, interactions + 1):
+            interaction_id = str(1000000000000000000 + iteration).encode()
+            for template in (command_template, click_template):
+                body = template.replace(PLACEHOLDER.encode(), interaction_id)
+                resp = client.post(
+                    "/discord/interactions",
+                    data=body,
+                    content_type="application/json",
+                    headers=payloads.sign(body),
+                )
+                if resp.status_code != 200 or b"expired" in resp.data:
+                    raise RuntimeError(
+                        f"Iteration {iteration} failed: {resp.status_code} {resp.data[:200]!r}"
+                    )
+            if iteration % sample_every == 0 or iteration == interactions:
+                sample(iteration)
+
+        results: dict = {"samples": samples}
+        if trace:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            results["top_allocators"] = [
+                {
+                    "location": str(statistic.traceback),
+                    "size": statistic.size,
+                    "count": statistic.count,
+                }
+                for statistic in snapshot.statistics("lineno")[:top]
+            ]
+    return results
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.soak", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--sample-every", type=int, default=10000)
+    parser.add_argument(
+        "--ttl", type=float, help="Seconds components are kept, forever by default"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=DEFAULT_BUDGET,
+        help="Fail if the final bytes of RSS per live interaction are over this",
+    )
+    parser.add_argument(
+        "--tracemalloc", action="store_true", help="Report the top allocators"
+    )
+    parser.add_argument("--output", help="Write the samples to this JSON file")
+    args = parser.parse_args(argv)
+
+    def log(entry):
+        print(
+            f"{entry['iteration']:>10} {entry['seconds']:>8.1f}s "
+            f"rss {entry['rss'] / 2**20:>8.1f}MiB "
+            f"components {entry['components']:>9} "
+            f"{entry['bytes_per_live_interaction']:>9.0f}B/interaction"
+        )
+
+    results = soak(
+        args.interactions, args.sample_every, args.ttl, args.tracemalloc, log=log
+    )
+    for allocator in results.get("top_allocators", []):
+        print(
+            f"{allocator['size'] / 2**20:>8.1f}MiB {allocator['count']:>9} {allocator['location']}"
+        )
+
+    final = results["samples"][-1]["bytes_per_live_interaction"]
+    results["budget"] = args.budget
+    results["passed"] = final <= args.budget
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if not results["passed"]:
+        print(
+            f"{final:.0f} bytes per live interaction is over the budget of {args.budget:.0f}",
+            file=sys.stderr,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
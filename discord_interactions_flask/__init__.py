@@ -1,14 +1,45 @@
 __version__ = "0.2.0"
 
-from discord_interactions_flask.discord import Discord
-from discord_interactions_flask.discord_types import (
-    InteractionResponse,
-)
-from discord_interactions_flask.interactions import (
-    ChatInteraction,
-    UserInteraction,
-    MessageInteraction,
-)
+import importlib
+from typing import TYPE_CHECKING
+
+# The names below are imported when first used (PEP 562), so that importing the package, e.g. to read its version or
+# one of the lighter submodules, doesn't load Flask, urllib3, jsons and every Discord type
+_LAZY = {
+    "Discord": "discord_interactions_flask.discord",
+    "InteractionResponse": "discord_interactions_flask.discord_types",
+    "ChatInteraction": "discord_interactions_flask.interactions",
+    "UserInteraction": "discord_interactions_flask.interactions",
+    "MessageInteraction": "discord_interactions_flask.interactions",
+}
+
+__all__ = list(_LAZY)
+
+if TYPE_CHECKING:
+    from discord_interactions_flask.discord import Discord
+    from discord_interactions_flask.discord_types import (
+        InteractionResponse,
+    )
+    from discord_interactions_flask.interactions import (
+        ChatInteraction,
+        UserInteraction,
+        MessageInteraction,
+    )
+
+
+def __getattr__(name: str):
+    try:
+        module = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
+
 
 # TODO: I want to make discord_types an implementation detail that users aren't expected to interact with,
 # TODO: I think meta commands might require descriptions
@@ -22,9 +53,8 @@ from discord_interactions_flask.interactions import (
 # TODO: Your app can have a global CHAT_INPUT and USER command with the same name
 #       Do I just decide to not support that?
 #       I would have to break out each command type into separate dicts
-# TODO: There should be a mechanism to opt-out of automatically init_commands-ing
 # TODO: How do modals work?
-# TODO: Should we attempt to persist component handlers across invocations? It would likely require pickeling the functions and storing them somewhere
+# TODO: Component handlers that are closures can't be persisted by SqliteComponentStore, only importable ones
 # TODO: Should we also try to offer a more streamlined decorator that automatically parses and creates slash command arguments from type signatures of function params?
 
 # TODO: Better ergonomics on response
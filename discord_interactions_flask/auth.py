@@ -0,0 +1,89 @@
+"""OAuth2 client credentials tokens for talking to the Discord API."""
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """Caches a client credentials token until shortly before it expires.
+
+    Safe to share between threads. Concurrent callers that find the token missing or expired share a single refresh
+    instead of each requesting a new token. Once the token is within `refresh_margin` seconds of expiring one caller
+    refreshes it, while the others keep using the current one until it's replaced.
+
+    Args
+        fetch: Requests a new token, returning the token response from Discord (`access_token`, `token_type`, `expires_in`).
+
+        refresh_margin: How many seconds before expiry to start refreshing the token.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], dict],
+        refresh_margin: float = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+        self._lock = threading.Lock()
+        # (Authorization header value, expiry) replaced as a whole so readers never need the lock
+        self._token: Optional[tuple[str, float]] = None
+
+    def _after_fork(self) -> None:
+        # The current token stays valid in the child, only a refresh in progress is lost
+        self._lock = threading.Lock()
+
+    def authorization(self) -> str:
+        """Get the value of the `Authorization` header to send, refreshing the token if needed."""
+        token = self._token
+        if token is not None:
+            header, expires_at = token
+            now = self.clock()
+            if now < expires_at - self.refresh_margin:
+                return header
+            if now < expires_at:
+                if self._lock.acquire(blocking=False):
+                    try:
+                        if self._token is token:
+                            self._refresh()
+                    except Exception:
+                        logger.exception("Failed to refresh the token ahead of expiry")
+                    finally:
+                        self._lock.release()
+                return self._token[0] if self._token else header
+
+        with self._lock:
+            token = self._token
+            if token is None or self.clock() >= token[1]:
+                self._refresh()
+            assert self._token is not None
+            return self._token[0]
+
+    def refresh(self) -> str:
+        """Unconditionally fetch a new token."""
+        with self._lock:
+            self._refresh()
+            assert self._token is not None
+            return self._token[0]
+
+    def invalidate(self, authorization: str) -> None:
+        """Forget the token, if it is still `authorization`. Used when Discord rejects it before its expiry.
+
+        Passing the rejected value means that when many requests fail with the same token, only the first of them
+        causes a refresh.
+        """
+        with self._lock:
+            if self._token is not None and self._token[0] == authorization:
+                self._token = None
+
+    def _refresh(self):
+        token = self.fetch()
+        expires_in = float(token.get("expires_in", 0))
+        self._token = (
+            f"{token['token_type']} {token['access_token']}",
+            self.clock() + expires_in,
+        )
@@ -1,5 +1,6 @@
 from dataclasses import dataclass, field
 from functools import wraps
+import hashlib
 import typing
 from typing import Union, Dict, Optional, Literal, Callable
 
@@ -64,12 +65,65 @@ CommandFunction = Union[
 ]
 
 
-class Command(BaseModel):
-    def spec(self) -> dict:
+class CachedSpec(BaseModel):
+    """Computes the spec of a command once, and keeps it until the command changes.
+
+    Assigning any public attribute, or adding options or children through :meth:`ChatCommand.add_option` and
+    `add_child`, invalidates the cached spec of the command and of the groups and commands it belongs to.
+    Modifying a nested value in place (e.g. `command.name_localizations["fr"] = ...`) isn't noticed, call
+    :meth:`invalidate` afterwards.
+    """
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            self.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop the cached spec of this command, and of every group or command it is part of."""
+        self.__dict__.pop("_spec_cache", None)
+        for parent in self.__dict__.get("_parents", ()):
+            parent.invalidate()
+
+    def _adopt(self, child: "CachedSpec"):
+        parents = child.__dict__.setdefault("_parents", [])
+        if not any(parent is self for parent in parents):
+            parents.append(self)
+        self.invalidate()
+
+    def _dump_spec(self) -> dict:
         return self.dump(
             use_enum_name=False, strip_privates=True, strip_properties=True
         )
 
+    def _cached_spec(self) -> tuple[dict, bytes, str]:
+        cache = self.__dict__.get("_spec_cache")
+        if cache is None:
+            # sync imports this module
+            from discord_interactions_flask.sync import canonical_bytes
+
+            spec = self._dump_spec()
+            data = canonical_bytes(spec)
+            cache = (spec, data, hashlib.sha256(data).hexdigest())
+            self.__dict__["_spec_cache"] = cache
+        return cache
+
+    def spec(self) -> dict:
+        """The command as sent to Discord. Cached, so it must not be modified."""
+        return self._cached_spec()[0]
+
+    def spec_bytes(self) -> bytes:
+        """The canonical serialization of :meth:`spec`, see :func:`~discord_interactions_flask.sync.canonical_bytes`."""
+        return self._cached_spec()[1]
+
+    def spec_hash(self) -> str:
+        """A stable content hash of the command, equal to :func:`~discord_interactions_flask.sync.spec_hash` of its spec."""
+        return self._cached_spec()[2]
+
+
+class Command(CachedSpec):
+    pass
+
 
 @dataclass
 class ChatCommand(Command):
@@ -101,6 +155,7 @@ class ChatCommand(Command):
             self.options = [option]
         else:
             self.options.append(option)
+            self.invalidate()
 
     def handler(self, f: ChatFunction):
         wraps(f)(self)
@@ -224,7 +279,7 @@ class SubCommand(ChatCommand):
 
 
 @dataclass
-class CommandGroup(BaseModel):
+class CommandGroup(CachedSpec):
     name: str
     description: str
     type: Literal[
@@ -232,10 +287,12 @@ class CommandGroup(BaseModel):
     ] = types.ApplicationCommandOptionType.SUB_COMMAND_GROUP
     _subcommands: Dict[str, SubCommand] = field(default_factory=dict)
 
-    def spec(self) -> dict:
-        spec: dict = self.dump(
-            use_enum_name=False, strip_privates=True, strip_properties=True
-        )
+    def __post_init__(self):
+        for subcommand in self._subcommands.values():
+            self._adopt(subcommand)
+
+    def _dump_spec(self) -> dict:
+        spec = super()._dump_spec()
         spec["options"] = [v.spec() for _, v in self._subcommands.items()]
         return spec
 
@@ -245,6 +302,7 @@ class CommandGroup(BaseModel):
 
     def add_child(self, subcommand: SubCommand):
         self._subcommands[subcommand.name] = subcommand
+        self._adopt(subcommand)
 
     def __call__(
         self, interaction: interactions.ChatInteraction
@@ -267,15 +325,18 @@ class CommandGroup(BaseModel):
 class ChatMetaCommand(ChatCommand):
     _children: Dict[str, Union[CommandGroup, SubCommand]] = field(default_factory=dict)
 
-    def spec(self) -> dict:
-        spec: dict = self.dump(
-            use_enum_name=False, strip_privates=True, strip_properties=True
-        )
+    def __post_init__(self):
+        for child in self._children.values():
+            self._adopt(child)
+
+    def _dump_spec(self) -> dict:
+        spec = super()._dump_spec()
         spec["options"] = [v.spec() for _, v in self._children.items()]
         return spec
 
     def add_child(self, child: Union[CommandGroup, SubCommand]):
         self._children[child.name] = child
+        self._adopt(child)
 
     @property
     def options(self):
@@ -0,0 +1,312 @@
+"""Storage for component handlers.
+
+When a response contains components, :class:`~discord_interactions_flask.discord.Discord` remembers them so that
+the ``MESSAGE_COMPONENT`` interaction Discord sends when one is used can be routed back to its handler.
+
+By default that happens in process memory (:class:`MemoryComponentStore`), which means a click can only be handled
+by the worker that produced the response. :class:`SqliteComponentStore` keeps them in a local SQLite file instead
+so that any worker process on the host can resolve them.
+"""
+import dataclasses
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask.components import (
+    Button,
+    Component,
+    SelectMenu,
+    TextInput,
+)
+
+if TYPE_CHECKING:
+    import sqlite3
+
+logger = logging.getLogger(__name__)
+
+COMPONENT_CLASSES: dict[int, type] = {
+    types.ComponentType.BUTTON: Button,
+    types.ComponentType.SELECT_MENU: SelectMenu,
+    types.ComponentType.TEXT_INPUT: TextInput,
+}
+
+
+def handler_name(handler: Callable) -> Optional[str]:
+    """Get the importable name (``module:qualname``) of a handler, or `None` if it can't be imported by name.
+
+    Functions defined inside of other functions, lambdas, and other callables without a stable module level path
+    can't be referenced from another process.
+    """
+    module = getattr(handler, "__module__", None)
+    qualname = getattr(handler, "__qualname__", None)
+    if not module or not qualname or "<" in qualname:
+        return None
+
+    name = f"{module}:{qualname}"
+    try:
+        resolved = resolve_handler(name)
+    except (ImportError, AttributeError):
+        return None
+
+    return name if resolved is handler else None
+
+
+def resolve_handler(name: str) -> Callable:
+    """Import a handler from the name produced by :func:`handler_name`."""
+    module_name, _, qualname = name.partition(":")
+    obj = importlib.import_module(module_name)
+    for attr in qualname.split("."):
+        obj = getattr(obj, attr)
+    return obj  # type: ignore
+
+
+class ComponentStore:
+    """Interface for component handler storage."""
+
+    def add(self, interaction_id: str, components: Iterable[Component]) -> None:
+        """Remember the components sent in response to an interaction.
+
+        Args
+            interaction_id: The ID of the interaction that was responded to.
+
+            components: The components that were part of the response.
+        """
+        raise NotImplementedError
+
+    def get(self, interaction_id: str, custom_id: str) -> Optional[Component]:
+        """Look up a component previously passed to :meth:`add`, or `None` if it is unknown or expired.
+
+        Args
+            interaction_id: The ID of the interaction the component was sent in response to.
+
+            custom_id: The `custom_id` of the component.
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        """Get the number of components currently stored."""
+        raise NotImplementedError
+
+    def _after_fork(self) -> None:
+        """Replace the locks and connections inherited by a forked child process, see :mod:`~discord_interactions_flask.forking`."""
+
+
+class MemoryComponentStore(ComponentStore):
+    """Keeps components in a dictionary local to the current process.
+
+    Args
+        ttl: An optional number of seconds after which components are forgotten. By default they are kept forever.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, expire_interval: float = 60):
+        self.ttl = ttl
+        self.expire_interval = expire_interval
+        # Each interaction's components are published as one complete dict, which is never modified afterwards,
+        # so readers don't need the lock. Copying the whole mapping on every response would cost too much here.
+        self._components: dict[str, dict[str, Component]] = {}
+        self._created: dict[str, float] = {}
+        self._last_expiry = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        # The components themselves are shared with the parent copy-on-write
+        self._lock = threading.Lock()
+
+    def add(self, interaction_id: str, components: Iterable[Component]) -> None:
+        with self._lock:
+            handlers = dict(self._components.get(interaction_id, {}))
+            for component in components:
+                handlers[component.custom_id] = component
+            if self.ttl is not None:
+                self._created.setdefault(interaction_id, time.monotonic())
+            self._components[interaction_id] = handlers
+        if self.ttl is not None:
+            now = time.monotonic()
+            if now - self._last_expiry >= self.expire_interval:
+                self.expire(now)
+
+    def get(self, interaction_id: str, custom_id: str) -> Optional[Component]:
+        handlers = self._components.get(interaction_id)
+        if not handlers:
+            return None
+        if (
+            self.ttl is not None
+            and time.monotonic() - self._created.get(interaction_id, 0) > self.ttl
+        ):
+            return None
+        return handlers.get(custom_id)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """Forget components older than `ttl`."""
+        if self.ttl is None:
+            return
+        now = time.monotonic() if now is None else now
+        self._last_expiry = now
+        cutoff = now - self.ttl
+        with self._lock:
+            for interaction_id, created in list(self._created.items()):
+                if created < cutoff:
+                    del self._created[interaction_id]
+                    self._components.pop(interaction_id, None)
+
+    def __len__(self) -> int:
+        return sum(map(len, list(self._components.values())))
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS components (
+    interaction_id TEXT NOT NULL,
+    custom_id TEXT NOT NULL,
+    handler TEXT NOT NULL,
+    state TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (interaction_id, custom_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS components_created ON components (created);
+"""
+
+
+class SqliteComponentStore(ComponentStore):
+    """Keeps components in a SQLite database shared by every process on the host.
+
+    Handlers are stored by their importable name alongside the serialized component, and are re-imported by
+    whichever worker receives the click. Handlers that can't be imported by name (closures, lambdas) can't be shared,
+    those components are kept in the memory of the process that created them, same as :class:`MemoryComponentStore`.
+
+    All the components from a single response are written in one transaction, and expired rows are swept out as
+    part of a write at most once every `expire_interval` seconds.
+
+    Args
+        path: Location of the database file. It is created if it doesn't exist.
+
+        ttl: Number of seconds after which components are forgotten. Pass `None` to keep them forever.
+
+        expire_interval: Minimum number of seconds between sweeps for expired components.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: Optional[float] = 24 * 60 * 60,
+        expire_interval: float = 60,
+        timeout: float = 5,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.expire_interval = expire_interval
+        self.timeout = timeout
+        self.local = MemoryComponentStore(ttl=ttl, expire_interval=expire_interval)
+        self._last_expiry = 0.0
+        self._handlers: dict[str, Callable] = {}
+        self._connections = threading.local()
+
+    def _after_fork(self) -> None:
+        # Connections are already keyed on the pid
+        self.local._after_fork()
+
+    def _connection(self) -> "sqlite3.Connection":
+        # Connections can't be shared across a fork, so they are also keyed on the pid
+        pid = os.getpid()
+        if getattr(self._connections, "pid", None) != pid:
+            # Only imported by the deployments that use this store
+            import sqlite3
+
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._connections.connection = connection
+            self._connections.pid = pid
+        return self._connections.connection
+
+    def add(self, interaction_id: str, components: Iterable[Component]) -> None:
+        now = time.time()
+        rows = []
+        local = []
+        for component in components:
+            handler = getattr(component, "interaction_handler", None)
+            name = handler_name(handler) if handler else None
+            if name is None:
+                local.append(component)
+                continue
+            state = component.dump(
+                use_enum_name=False, strip_privates=True, strip_properties=True
+            )
+            rows.append(
+                (interaction_id, component.custom_id, name, json.dumps(state), now)
+            )
+
+        if local:
+            logger.debug(
+                "Components %s have handlers that can't be imported by name, they will only be available in this process",
+                [component.custom_id for component in local],
+            )
+            self.local.add(interaction_id, local)
+
+        if not rows:
+            return
+
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN")
+            connection.executemany(
+                "INSERT OR REPLACE INTO components VALUES (?, ?, ?, ?, ?)", rows
+            )
+            if self.ttl is not None and now - self._last_expiry >= self.expire_interval:
+                self._last_expiry = now
+                connection.execute(
+                    "DELETE FROM components WHERE created < ?", (now - self.ttl,)
+                )
+
+    def get(self, interaction_id: str, custom_id: str) -> Optional[Component]:
+        component = self.local.get(interaction_id, custom_id)
+        if component is not None:
+            return component
+
+        row = (
+            self._connection()
+            .execute(
+                "SELECT handler, state, created FROM components WHERE interaction_id = ? AND custom_id = ?",
+                (interaction_id, custom_id),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+
+        name, state, created = row
+        if self.ttl is not None and time.time() - created > self.ttl:
+            return None
+
+        handler = self._handlers.get(name)
+        if handler is None:
+            try:
+                handler = self._handlers[name] = resolve_handler(name)
+            except (ImportError, AttributeError):
+                logger.warning("Unable to import component handler %s", name)
+                return None
+
+        return load_component(json.loads(state), handler)
+
+    def __len__(self) -> int:
+        (count,) = (
+            self._connection().execute("SELECT COUNT(*) FROM components").fetchone()
+        )
+        return count + len(self.local)
+
+
+def load_component(state: dict, handler: Callable) -> Component:
+    """Rebuild a component from its serialized form and attach a handler to it."""
+    cls = COMPONENT_CLASSES[state["type"]]
+    base = cls.__bases__[0].load(state)
+    fields = {
+        field.name: getattr(base, field.name) for field in dataclasses.fields(base)
+    }
+    return cls(**fields, interaction_handler=handler)
@@ -5,19 +5,20 @@ This is the primary interaction point, a user will define their commands using a
 """
 
 
-from collections import defaultdict
+from collections import ChainMap
+from contextlib import contextmanager
 import http
 import json
 import logging
-from typing import Optional, Union, Iterable
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TypeVar, Union, Iterable
 from types import SimpleNamespace
 
-from flask import Blueprint, Flask, jsonify, request, g
-
-import urllib3
+from flask import Blueprint, Flask, jsonify, make_response, request, g
 
 from discord_interactions_flask import discord_types as types
-from discord_interactions_flask.verify import verify_key_decorator
+from discord_interactions_flask.verify import verify_key
 from discord_interactions_flask.command_builder import CommandBuilder
 from discord_interactions_flask.command import Command
 from discord_interactions_flask import errors
@@ -32,13 +33,35 @@ from discord_interactions_flask.interactions import (
     CommandInteraction,
 )
 from discord_interactions_flask import helpers
-from discord_interactions_flask import components
+from discord_interactions_flask import forking
+from discord_interactions_flask import instrumentation
+from discord_interactions_flask.registry import Registry
+
+# Optional features are imported once they are configured, and what is only needed to talk to Discord on first use
+# (see Discord._lazy), to keep the import of the package fast
+if TYPE_CHECKING:
+    from concurrent.futures import ThreadPoolExecutor
+
+    import urllib3
+
+    from discord_interactions_flask import auth
+    from discord_interactions_flask import rest
+    from discord_interactions_flask import sync
+    from discord_interactions_flask.component_store import ComponentStore
+    from discord_interactions_flask import metrics
+    from discord_interactions_flask import profiling
+    from discord_interactions_flask import recording
+    from discord_interactions_flask import watchdog
+    from discord_interactions_flask import wsgi
 
 logger = logging.getLogger(__name__)
 
-GLOBAL_URL_TEMPLATE = "https://discord.com/api/v10/applications/%s/commands"
-GUILD_URL_TEMPLATE = "https://discord.com/api/v10/applications/%s/guilds/%s/commands"
-OAUTH_ENDPOINT = "https://discord.com/api/v10/oauth2/token"
+API_URL = "https://discord.com/api/v10"
+GLOBAL_URL_TEMPLATE = "%s/applications/%s/commands"
+GUILD_URL_TEMPLATE = "%s/applications/%s/guilds/%s/commands"
+OAUTH_ENDPOINT = "%s/oauth2/token"
+
+T = TypeVar("T")
 
 
 def _missing_component_handler(
@@ -69,28 +92,192 @@ class Discord:
         app: Optional[Flask] = None,
         missing_command_handler=_missing_command_handler,
         missing_component_handler=_missing_component_handler,
+        component_store: Optional["ComponentStore"] = None,
+        timing_sink: Optional[instrumentation.TimingSink] = None,
+        config: Optional[dict] = None,
+        http: Optional["urllib3.PoolManager"] = None,
+        sync_executor: Optional["ThreadPoolExecutor"] = None,
     ):
-        """Initialzation."""
+        """Initialzation.
+
+        Args
+            app: An optional :class:`Flask` instance to initialize right away.
+
+            missing_command_handler: Called for commands that Discord sends but that aren't known to this instance.
+
+            missing_component_handler: Called for components that aren't known to this instance, or that have expired.
+
+            component_store: Where to keep the handlers of components sent in responses. Defaults to a :class:`~discord_interactions_flask.component_store.MemoryComponentStore`, use a :class:`~discord_interactions_flask.component_store.SqliteComponentStore` to share them between worker processes.
+
+            timing_sink: Receives how long each stage of handling an interaction took, see :mod:`~discord_interactions_flask.instrumentation`. By default nothing is measured.
+
+            config: Configuration values that take precedence over the app's, e.g. the credentials of one of several applications served by a :class:`~discord_interactions_flask.host.DiscordHost`.
+
+            http: The connection pool to talk to the Discord API with, which may be shared with other instances. One is created by default.
+
+            sync_executor: The thread pool to sync guilds on, which may be shared with other instances. By default one is created for every sync.
+        """
 
         # TODO: Would be nice if I didn't have to maintain two separate dicts of commands
-        self.commands: defaultdict[Optional[str], dict[str, Command]] = defaultdict(
-            dict
-        )
+        # Both are read by request threads without locking, see registry.Registry. The per guild dicts in
+        # commands are replaced rather than modified.
+        self.commands: Registry[Optional[str], dict[str, Command]] = Registry()
 
-        self.runtime_commands: dict[str, Command] = {}
+        self.runtime_commands: Registry[str, Command] = Registry()
 
-        # TODO: evict old handlers
-        self.component_handlers: defaultdict[
-            str, dict[str, components.Component]
-        ] = defaultdict(dict)
+        # These are created on first use, see _lazy
+        self._lazy_lock = threading.RLock()
+        self._component_handlers = component_store
+        self._http = http
+        self._tokens: Optional["auth.TokenManager"] = None
+        self._rest: Optional["rest.RestClient"] = None
+        self._command_manifest: Optional["sync.CommandManifest"] = None
 
+        self.timing_sink = timing_sink
+        self.metrics: Optional["metrics.MetricsSink"] = None
+        self.watchdog: Optional["watchdog.Watchdog"] = None
+        self.profiler: Optional["profiling.Profiler"] = None
+        self.recorder: Optional["recording.Recorder"] = None
         self.missing_command_handler = missing_command_handler
         self.missing_component_handler = missing_component_handler
-        self.http = urllib3.PoolManager(headers={"Content-Type": "application/json"})
+        self.config = config or {}
+        # A shared pool is replaced after a fork by whoever shares it
+        self._owns_http = http is None
+        self.sync_executor = sync_executor
+        self.api_url = API_URL
+        self.sync_concurrency = 4
         self.public_key = None
+        self.sync_lock = True
+        self.sync_lock_timeout: Optional[float] = 120
+        self.batch_window = 0.0
+        # Guilds with changes waiting to be flushed, and the ids of the commands removed from each
+        self._pending: dict[Optional[str], set[str]] = {}
+        self._batch_depth = 0
+        self._batch_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        # Held while the command manifest is being changed or reloaded
+        self._manifest_lock = threading.Lock()
+        self.reload_interval = 1.0
+        self._generation = 0
+        self._generation_checked = 0.0
+        forking.after_fork(self)
         if app:
             self.init_app(app)
 
+    def _after_fork(self) -> None:
+        """Replace the connections, locks and threads a forked worker can't use, see :mod:`~discord_interactions_flask.forking`."""
+        self._lazy_lock = threading.RLock()
+        if self._owns_http and self._http is not None:
+            self._http = forking.new_pool(self._http)
+            if self._rest is not None:
+                self._rest.http = self._http
+        self.commands._after_fork()
+        self.runtime_commands._after_fork()
+        for feature in (
+            self._tokens,
+            self._rest,
+            self._component_handlers,
+            self.metrics,
+            self.watchdog,
+            self.profiler,
+            self.recorder,
+        ):
+            if feature is not None:
+                feature._after_fork()
+        # Changes waiting for a flush are sent by the parent's timer
+        self._pending = {}
+        self._batch_depth = 0
+        self._batch_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_timer = None
+        self._manifest_lock = threading.Lock()
+
+    def _lazy(self, name: str, create: Callable[[], T]) -> T:
+        """The private attribute `name`, set to `create()` if it is still `None`.
+
+        Everything created this way is first used by :meth:`init_app`, before any request threads.
+        """
+        value = getattr(self, name)
+        if value is None:
+            with self._lazy_lock:
+                value = getattr(self, name)
+                if value is None:
+                    value = create()
+                    setattr(self, name, value)
+        return value
+
+    @property
+    def component_handlers(self) -> "ComponentStore":
+        """Where the handlers of components sent in responses are kept, see the `component_store` argument."""
+
+        def create():
+            from discord_interactions_flask.component_store import (
+                MemoryComponentStore,
+            )
+
+            return MemoryComponentStore()
+
+        return self._lazy("_component_handlers", create)
+
+    @component_handlers.setter
+    def component_handlers(self, component_store: "ComponentStore") -> None:
+        self._component_handlers = component_store
+
+    @property
+    def http(self) -> "urllib3.PoolManager":
+        """The connection pool to the Discord API, see the `http` argument."""
+
+        def create():
+            import urllib3
+
+            return urllib3.PoolManager(headers={"Content-Type": "application/json"})
+
+        return self._lazy("_http", create)
+
+    @http.setter
+    def http(self, http: "urllib3.PoolManager") -> None:
+        self._http = http
+        if self._rest is not None:
+            self._rest.http = http
+
+    @property
+    def tokens(self) -> "auth.TokenManager":
+        """The OAuth2 access token used to talk to the Discord API."""
+
+        def create():
+            from discord_interactions_flask import auth
+
+            return auth.TokenManager(self._fetch_token)
+
+        return self._lazy("_tokens", create)
+
+    @property
+    def rest(self) -> "rest.RestClient":
+        """The client every request to the Discord API is sent through."""
+
+        def create():
+            from discord_interactions_flask import rest
+
+            return rest.RestClient(self.http, self.tokens)
+
+        return self._lazy("_rest", create)
+
+    @property
+    def command_manifest(self) -> "sync.CommandManifest":
+        """What was last synced with Discord, see `DISCORD_COMMAND_MANIFEST`."""
+
+        def create():
+            from discord_interactions_flask import sync
+
+            return sync.CommandManifest()
+
+        return self._lazy("_command_manifest", create)
+
+    @command_manifest.setter
+    def command_manifest(self, command_manifest: "sync.CommandManifest") -> None:
+        self._command_manifest = command_manifest
+
     def command(
         self,
         name: Optional[str] = None,
@@ -120,21 +307,40 @@ class Discord:
         """
         return CommandBuilder(self, name, description, guild_id)
 
+    def _register_components(
+        self,
+        interaction: types.Interaction,
+        response: types.InteractionResponse,
+        timer: Optional[instrumentation.StageTimer] = None,
+    ) -> None:
+        if response.data and response.data.components:
+            self.component_handlers.add(
+                interaction.id,
+                (
+                    component
+                    for row in response.data.components
+                    for component in row.components
+                ),
+            )
+        if timer:
+            timer.mark("register")
+
     def _handle_response(
-        self, interaction: types.Interaction, response: types.InteractionResponse
+        self,
+        interaction: types.Interaction,
+        response: types.InteractionResponse,
+        timer: Optional[instrumentation.StageTimer] = None,
     ):
-        if response.data and response.data.components:
-            for row in response.data.components:
-                for component in row.components:
-                    self.component_handlers[interaction.id][
-                        component.custom_id
-                    ] = component
+        self._register_components(interaction, response, timer)
 
-        return jsonify(
+        resp = jsonify(
             response.dump(
                 use_enum_name=False, strip_privates=True, strip_properties=True
             )
         )
+        if timer:
+            timer.mark("serialize")
+        return resp
 
     def init_app(self, app: Flask) -> None:
         """Initialize the :class:`Flask` instance with all the commands defined on this :class:`Discord` instance.
@@ -142,98 +348,273 @@ class Discord:
         Args
             app: A :class:`Flask` instance. Must have the `DISCORD_PUBLIC_KEY`, `DISCORD_CLIENT_ID`, and `DISCORD_CLIENT_SECRET` configuration keys defined.
         """
-        self.public_key = app.config.setdefault("DISCORD_PUBLIC_KEY", "")
-        if not self.public_key:
-            raise ValueError("You must define a DISCORD_PUBLIC_KEY configuration value")
+        config = self._setup(app)
 
-        # TODO: I'd like to move the bp out of init_app, the verify_key_decorator makes it awkward since with it I need the public key at bp creation time
         interactions_bp = Blueprint("interactions", __name__, url_prefix="/discord")
 
+        metrics_route = config.setdefault("DISCORD_METRICS_ROUTE", None)
+        if metrics_route:
+            from discord_interactions_flask import metrics
+
+            if self.metrics is None:
+                self.metrics = metrics.MetricsSink()
+                self.timing_sink = (
+                    self.metrics
+                    if self.timing_sink is None
+                    else instrumentation.MultiSink([self.timing_sink, self.metrics])
+                )
+            metrics.mount(interactions_bp, metrics_route, self.metrics, self)
+
         @interactions_bp.post("/interactions")
-        @verify_key_decorator(self.public_key)
         def interactions():
-            payload = request.json
-            assert payload is not None
-            g.discord_interactions = SimpleNamespace()
-
-            match payload["type"]:
-                case types.InteractionType.PING:
-                    return jsonify(type=types.InteractionCallbackType.PONG)
-                case types.InteractionType.APPLICATION_COMMAND:
-                    command_interaction: Union[
-                        ChatInteraction, UserInteraction, MessageInteraction
-                    ]
-                    match payload["data"]["type"]:
-                        case types.CommandType.CHAT:
-                            command_interaction = ChatInteraction.load(payload)
-                        case types.CommandType.USER:
-                            command_interaction = UserInteraction.load(payload)
-                        case types.CommandType.MESSAGE:
-                            command_interaction = MessageInteraction.load(payload)
-                        case _:
-                            raise errors.DiscordInteractionsFlaskError(
-                                "Discord sent an invalid command type - %s"
-                                % payload["data"]["type"]
-                            )
-                    g.discord_interactions.ctx = command_interaction
-
-                    handler = self.runtime_commands.get(command_interaction.data.id)
-                    if not handler:
-                        result = self.missing_command_handler(command_interaction)
-                    else:
-                        result = handler(command_interaction)
-
-                    return self._handle_response(command_interaction, result)
-                case types.InteractionType.MESSAGE_COMPONENT:
-                    component_interaction: Union[
-                        ButtonInteraction, SelectMenuInteraction, TextInputInteraction
-                    ]
-                    match payload["data"]["component_type"]:
-                        case types.ComponentType.BUTTON:
-                            component_interaction = ButtonInteraction.load(payload)
-                        case types.ComponentType.SELECT_MENU:
-                            component_interaction = SelectMenuInteraction.load(payload)
-                        case types.ComponentType.TEXT_INPUT:
-                            component_interaction = TextInputInteraction.load(payload)
-                        case _:
-                            raise errors.DiscordInteractionsFlaskError(
-                                "Discord sent an invalid component type - %s"
-                                % payload["data"]["type"]
-                            )
-
-                    # It's interesting that typing errors have pushed me to explicitly define my invariants
-                    assert component_interaction.message is not None
-                    assert component_interaction.message.interaction is not None
-
-                    g.discord_interactions.ctx = component_interaction
-
-                    handlers = self.component_handlers.get(
-                        component_interaction.message.interaction.id
-                    )
-                    if (
-                        not handlers
-                        or component_interaction.data.custom_id not in handlers
-                    ):
-                        result = self.missing_component_handler(component_interaction)
-                    else:
-                        result = handlers[component_interaction.data.custom_id](
-                            component_interaction
+            return self._view()
+
+        app.register_blueprint(interactions_bp)
+        self._load_commands(app)
+
+    def _app_config(self, app: Flask):
+        """The app's configuration, with the values in :attr:`config` taking precedence."""
+        if not self.config:
+            return app.config
+        return ChainMap(self.config, app.config)
+
+    def _setup(self, app: Flask):
+        """Read the configuration needed to answer interactions, returning it."""
+        config = self._app_config(app)
+        self.public_key = config.setdefault("DISCORD_PUBLIC_KEY", "")
+        if not self.public_key:
+            raise ValueError("You must define a DISCORD_PUBLIC_KEY configuration value")
+
+        if config.setdefault("DISCORD_WATCHDOG", False):
+            from discord_interactions_flask import watchdog
+
+            self.watchdog = watchdog.Watchdog(
+                config.setdefault("DISCORD_WATCHDOG_SOFT_LIMIT", 2.0),
+                config.setdefault("DISCORD_WATCHDOG_HARD_LIMIT", 3.0),
+            )
+
+        profile_dir = config.setdefault("DISCORD_PROFILE_DIR", None)
+        if profile_dir:
+            from discord_interactions_flask import profiling
+
+            self.profiler = profiling.Profiler(
+                profile_dir,
+                config.setdefault("DISCORD_PROFILE_SAMPLE_RATE", 100),
+                config.setdefault("DISCORD_PROFILE_COMMANDS", ()),
+                config.setdefault("DISCORD_PROFILE_INTERVAL", 60),
+            )
+
+        record_dir = config.setdefault("DISCORD_RECORD_DIR", None)
+        if record_dir:
+            from discord_interactions_flask import recording
+
+            self.recorder = recording.Recorder(
+                record_dir,
+                config.setdefault("DISCORD_RECORD_MAX_BYTES", 64 * 1024 * 1024),
+                config.setdefault("DISCORD_RECORD_MAX_FILES", 10),
+            )
+        return config
+
+    def _load_commands(self, app: Flask) -> None:
+        if self._app_config(app).setdefault("DISCORD_SYNC_COMMANDS", True):
+            self.init_commands(app)
+        else:
+            self.load_manifest(app)
+
+    def _view(self):
+        """The interactions endpoint, in a request context."""
+        recorder = self.recorder
+        if recorder is None:
+            return self._measured(self._interactions)
+
+        received = time.time()
+        start = time.perf_counter()
+        resp = make_response(self._measured(self._interactions))
+        # Only requests that really came from Discord
+        if resp.status_code != http.HTTPStatus.UNAUTHORIZED:
+            recorder.record(
+                request.get_data(),
+                received,
+                time.perf_counter() - start,
+                resp.status_code,
+                resp.content_length,
+            )
+        return resp
+
+    def wsgi_app(self, app: Flask) -> "wsgi.InteractionsApp":
+        """A bare WSGI application for the interactions endpoint, which skips Flask's request handling. See :mod:`~discord_interactions_flask.wsgi`.
+
+        Args
+            app: The :class:`Flask` instance this was initialized with, handlers run in its app context.
+
+        Returns
+            An :class:`~discord_interactions_flask.wsgi.InteractionsApp` to mount at `/discord/interactions`.
+        """
+        if not self.public_key:
+            raise ValueError("init_app must be called before creating the WSGI app")
+        from discord_interactions_flask import wsgi
+
+        return wsgi.InteractionsApp(self, app)
+
+    def _measured(self, handle):
+        """Call `handle` with a stage timer to handle a request to the interactions endpoint, timing and profiling it if enabled."""
+        timer = instrumentation.stage_timer(self.timing_sink)
+        profiler = self.profiler
+        if profiler is not None:
+            # The profiles are labelled with the stage timings
+            timer = timer or instrumentation.StageTimer(instrumentation.NullSink())
+            profiler.begin()
+        if not timer:
+            return handle(timer)
+        error = True
+        try:
+            resp = handle(timer)
+            error = False
+        finally:
+            # Before finish() adds the total to the stages, which the profiler measures itself
+            if profiler is not None:
+                profiler.end(timer)
+            timer.finish(error=error)
+        return resp
+
+    def _verified(
+        self, body: bytes, signature: Optional[str], timestamp: Optional[str]
+    ) -> bool:
+        """Whether a request body was signed by Discord."""
+        assert self.public_key is not None
+        return (
+            signature is not None
+            and timestamp is not None
+            and verify_key(body, signature, timestamp, self.public_key)
+        )
+
+    def _interactions(self, timer: Optional[instrumentation.StageTimer]):
+        """Handle a request to the interactions endpoint."""
+        if not self._verified(
+            request.data,
+            request.headers.get("X-Signature-Ed25519"),
+            request.headers.get("X-Signature-Timestamp"),
+        ):
+            return "Bad request signature", 401
+        if timer:
+            timer.mark("verify")
+
+        payload = request.json
+        assert payload is not None
+        if timer:
+            timer.mark("parse")
+
+        if payload["type"] == types.InteractionType.PING:
+            if timer:
+                timer.tags["interaction_type"] = "PING"
+            return jsonify(type=types.InteractionCallbackType.PONG)
+
+        dispatched = self._dispatch(payload, timer)
+        if dispatched is None:
+            return ("", http.HTTPStatus.NO_CONTENT)
+        return self._handle_response(*dispatched, timer)
+
+    def _dispatch(
+        self, payload: dict, timer: Optional[instrumentation.StageTimer]
+    ) -> Optional[tuple[types.Interaction, types.InteractionResponse]]:
+        """Load a verified interaction other than a PING and run its handler, in an app context.
+
+        Returns
+            The interaction and the handler's response, or `None` for interaction types that aren't handled.
+        """
+        g.discord_interactions = SimpleNamespace()
+
+        match payload["type"]:
+            case types.InteractionType.APPLICATION_COMMAND:
+                command_interaction: Union[
+                    ChatInteraction, UserInteraction, MessageInteraction
+                ]
+                match payload["data"]["type"]:
+                    case types.CommandType.CHAT:
+                        command_interaction = ChatInteraction.load(payload)
+                    case types.CommandType.USER:
+                        command_interaction = UserInteraction.load(payload)
+                    case types.CommandType.MESSAGE:
+                        command_interaction = MessageInteraction.load(payload)
+                    case _:
+                        raise errors.DiscordInteractionsFlaskError(
+                            "Discord sent an invalid command type - %s"
+                            % payload["data"]["type"]
                         )
+                g.discord_interactions.ctx = command_interaction
+                if timer:
+                    timer.tag(command_interaction)
+                    timer.mark("decode")
 
-                    return self._handle_response(component_interaction, result)
-                case _:
-                    print("OTHER")
-                    print(payload)
-                    return ("", http.HTTPStatus.NO_CONTENT)
+                self._check_generation()
+                handler = self.runtime_commands.get(command_interaction.data.id)
+                result = self._run_handler(
+                    handler or self.missing_command_handler, command_interaction
+                )
+                if timer:
+                    timer.mark("handler")
 
-        app.register_blueprint(interactions_bp)
-        self.init_commands(app)
+                return command_interaction, result
+            case types.InteractionType.MESSAGE_COMPONENT:
+                component_interaction: Union[
+                    ButtonInteraction, SelectMenuInteraction, TextInputInteraction
+                ]
+                match payload["data"]["component_type"]:
+                    case types.ComponentType.BUTTON:
+                        component_interaction = ButtonInteraction.load(payload)
+                    case types.ComponentType.SELECT_MENU:
+                        component_interaction = SelectMenuInteraction.load(payload)
+                    case types.ComponentType.TEXT_INPUT:
+                        component_interaction = TextInputInteraction.load(payload)
+                    case _:
+                        raise errors.DiscordInteractionsFlaskError(
+                            "Discord sent an invalid component type - %s"
+                            % payload["data"]["type"]
+                        )
 
-    def _refresh_token(self):
-        """Refresh the OAuth2 client credentials used to interact with the Discord API. Typically not something a user is expected to need."""
-        r = self.http.request(
+                # It's interesting that typing errors have pushed me to explicitly define my invariants
+                assert component_interaction.message is not None
+                assert component_interaction.message.interaction is not None
+
+                g.discord_interactions.ctx = component_interaction
+                if timer:
+                    timer.tag(component_interaction)
+                    timer.mark("decode")
+
+                component = self.component_handlers.get(
+                    component_interaction.message.interaction.id,
+                    component_interaction.data.custom_id,
+                )
+                result = self._run_handler(
+                    component or self.missing_component_handler,  # type: ignore
+                    component_interaction,
+                )
+                if timer:
+                    timer.mark("handler")
+
+                return component_interaction, result
+            case _:
+                print("OTHER")
+                print(payload)
+                return None
+
+    def _run_handler(self, handler, interaction: types.Interaction):
+        if self.profiler is not None:
+            self.profiler.begin_handler(interaction)
+        if self.watchdog is None:
+            return handler(interaction)
+        self.watchdog.start(interaction)
+        try:
+            return handler(interaction)
+        finally:
+            self.watchdog.stop()
+
+    def _fetch_token(self) -> dict:
+        import urllib3
+
+        r = self.rest.request(
             "POST",
-            OAUTH_ENDPOINT,
+            OAUTH_ENDPOINT % self.api_url,
             fields={
                 "grant_type": "client_credentials",
                 "scope": "applications.commands.update",
@@ -242,13 +623,22 @@ class Discord:
                 basic_auth=f"{self.client_id}:{self.client_secret}"
             ),
             encode_multipart=False,
+            authenticate=False,
         )
-        token = json.loads(r.data.decode("utf-8"))
-        self.http.headers[
-            "Authorization"
-        ] = f"{token['token_type']} {token['access_token']}"
+        if r.status != http.HTTPStatus.OK:
+            raise errors.DiscordApiError(r.data.decode("utf-8"))
+        return json.loads(r.data.decode("utf-8"))
+
+    def _refresh_token(self):
+        """Refresh the OAuth2 client credentials used to interact with the Discord API. Typically not something a user is expected to need."""
+        self.tokens.refresh()
+
+    def _commands_url(self, guild_id: Optional[str] = None) -> str:
+        if guild_id:
+            return GUILD_URL_TEMPLATE % (self.api_url, self.client_id, guild_id)
+        else:
+            return GLOBAL_URL_TEMPLATE % (self.api_url, self.client_id)
 
-    # TODO: Handle expired token
     def _create_commands(
         self, commands: Iterable[Command], guild_id: Optional[str] = None
     ) -> list[types.ApplicationCommand]:
@@ -259,14 +649,9 @@ class Discord:
 
             guild_id: if not present, the command will be created as a global one. Otherwise it will be created for the specifiied guild.
         """
-        if guild_id:
-            url = GUILD_URL_TEMPLATE % (self.client_id, guild_id)
-        else:
-            url = GLOBAL_URL_TEMPLATE % self.client_id
-
-        resp = self.http.request(
+        resp = self.rest.request(
             "PUT",
-            url,
+            self._commands_url(guild_id),
             body=json.dumps([command.spec() for command in commands]).encode("utf-8"),
         )
         if resp.status == http.HTTPStatus.OK:
@@ -287,13 +672,10 @@ class Discord:
 
             guild_id: if not present, the command will be created as a global one. Otherwise it will be created for the specifiied guild.
         """
-        if guild_id:
-            url = GUILD_URL_TEMPLATE % (self.client_id, guild_id)
-        else:
-            url = GLOBAL_URL_TEMPLATE % self.client_id
-
-        resp = self.http.request(
-            "POST", url, body=json.dumps(command.spec()).encode("utf-8")
+        resp = self.rest.request(
+            "POST",
+            self._commands_url(guild_id),
+            body=json.dumps(command.spec()).encode("utf-8"),
         )
         if resp.status == http.HTTPStatus.OK or resp.status == http.HTTPStatus.CREATED:
             interaction_payload = json.loads(resp.data.decode("utf-8"))
@@ -301,37 +683,451 @@ class Discord:
         else:
             raise errors.DiscordApiError(resp.data.decode("utf-8"))
 
+    def _edit_command(
+        self, command_id: str, command: Command, guild_id: Optional[str] = None
+    ) -> types.ApplicationCommand:
+        """Replace the definition of an existing command.
+
+        Args
+            command_id: The Discord assigned id of the command to edit.
+
+            command: The new definition of the command.
+
+            guild_id: The guild the command belongs to, or `None` for a global command.
+        """
+        resp = self.rest.request(
+            "PATCH",
+            f"{self._commands_url(guild_id)}/{command_id}",
+            body=json.dumps(command.spec()).encode("utf-8"),
+        )
+        if resp.status == http.HTTPStatus.OK:
+            return types.ApplicationCommand.load(json.loads(resp.data.decode("utf-8")))
+        else:
+            raise errors.DiscordApiError(resp.data.decode("utf-8"))
+
+    def _delete_command(
+        self, command_id: str, guild_id: Optional[str] = None, missing_ok: bool = False
+    ) -> None:
+        resp = self.rest.request(
+            "DELETE", f"{self._commands_url(guild_id)}/{command_id}"
+        )
+        if resp.status == http.HTTPStatus.NOT_FOUND and missing_ok:
+            return
+        if resp.status != http.HTTPStatus.NO_CONTENT:
+            raise errors.DiscordApiError(resp.data.decode("utf-8"))
+
+    def _list_commands(self, guild_id: Optional[str] = None) -> list[dict]:
+        """Fetch the raw application command objects currently registered with Discord."""
+        resp = self.rest.request("GET", self._commands_url(guild_id))
+        if resp.status == http.HTTPStatus.OK:
+            return json.loads(resp.data.decode("utf-8"))
+        else:
+            raise errors.DiscordApiError(resp.data.decode("utf-8"))
+
     def add_command(self, command: Command, guild_id: Optional[str] = None) -> None:
-        self.commands[guild_id][command.name] = command
+        """Add a command. Before :meth:`init_app` it is simply remembered until the commands are synced.
+
+        Once initialized, the command is sent to Discord right away, unless this is inside a :meth:`batch` block or
+        `DISCORD_BATCH_WINDOW` is set, in which case it is sent along with the other changes to its guild when the batch is flushed.
+
+        Args
+            command: The command to add.
+
+            guild_id: The guild to add the command to, or `None` for a global command.
+        """
+        self._set_command(guild_id, command.name, command)
 
         # If we're already initialized, we send the command to discord right away
         if self.public_key is not None:
+            if self._defer(guild_id):
+                return
             interaction = self._create_command(command, guild_id)
             self.runtime_commands[interaction.id] = command
+            with self._updating_manifest():
+                self.command_manifest.record(guild_id, interaction.id, command)
 
     def remove_command(
         self, interaction_id: str, guild_id: Optional[str] = None
     ) -> None:
-        if guild_id:
-            url = GUILD_URL_TEMPLATE % (self.client_id, guild_id)
-        else:
-            url = GLOBAL_URL_TEMPLATE % self.client_id
+        """Remove a command from Discord. Batched in the same way as :meth:`add_command`.
+
+        Args
+            interaction_id: The Discord assigned id of the command.
+
+            guild_id: The guild the command belongs to, or `None` for a global command.
+        """
+        command = self.runtime_commands[interaction_id]
+        if self.commands.get(guild_id, {}).get(command.name) is command:
+            self._set_command(guild_id, command.name, None)
+        if self._defer(guild_id, interaction_id):
+            return
 
-        url += f"/{interaction_id}"
         del self.runtime_commands[interaction_id]
+        self._delete_command(interaction_id, guild_id)
+        with self._updating_manifest():
+            self.command_manifest.forget(guild_id, interaction_id)
 
-        resp = self.http.request("DELETE", url)
-        if resp.status != http.HTTPStatus.NO_CONTENT:
-            raise errors.DiscordApiError(resp.data.decode("utf-8"))
+    def replace_command(self, command: Command, guild_id: Optional[str] = None) -> None:
+        """Add a command, or replace the command with the same name, while the app is running.
+
+        Only the difference is sent to Discord: an existing command is edited in place and keeps its id, and nothing
+        is sent if Discord already has this exact command (e.g. because another worker replaced it first). Requests
+        already being handled by the old command finish normally, new ones go to the new command.
+
+        Other workers sharing the `DISCORD_COMMAND_MANIFEST` pick up the new command ids within `DISCORD_RELOAD_INTERVAL`
+        seconds, for the commands they know about. To serve the new command they also need to define it, by calling
+        :meth:`replace_command` themselves, which finds it already registered.
+
+        Args
+            command: The new command.
+
+            guild_id: The guild the command belongs to, or `None` for a global command.
+        """
+        from discord_interactions_flask import sync
+
+        old = self.commands.get(guild_id, {}).get(command.name)
+        if self.public_key is None:
+            self._set_command(guild_id, command.name, command)
+            return
+        if self._batching():
+            self._set_command(guild_id, command.name, command)
+            self._defer(guild_id)
+            return
+
+        with self._updating_manifest():
+            found = self.command_manifest.find(
+                guild_id, sync.command_path(command.spec())
+            )
+            if found is None:
+                command_id = self._create_command(command, guild_id).id
+            else:
+                command_id, entry = found
+                if entry["hash"] != command.spec_hash():
+                    self._edit_command(command_id, command, guild_id)
+            self.command_manifest.record(guild_id, command_id, command)
+
+        with self.runtime_commands.edit() as runtime_commands:
+            for key in [key for key, value in runtime_commands.items() if value is old]:
+                del runtime_commands[key]
+            runtime_commands[command_id] = command
+        self._set_command(guild_id, command.name, command)
+
+    def remove_command_by_name(self, name: str, guild_id: Optional[str] = None) -> None:
+        """Remove a command from Discord while the app is running, without needing its Discord assigned id.
+
+        Args
+            name: The name of the command.
+
+            guild_id: The guild the command belongs to, or `None` for a global command.
+
+        Raises
+            KeyError: If there is no command with that name.
+        """
+        from discord_interactions_flask import sync
+
+        old = self.commands.get(guild_id, {})[name]
+        ids = {key for key, value in self.runtime_commands.items() if value is old}
+        if self.public_key is None:
+            self._set_command(guild_id, name, None)
+            return
+        if self._batching():
+            self._set_command(guild_id, name, None)
+            self._defer(guild_id)
+            for command_id in ids:
+                self._defer(guild_id, command_id)
+            return
+
+        with self._updating_manifest():
+            found = self.command_manifest.find(guild_id, sync.command_path(old.spec()))
+            if found is not None:
+                ids.add(found[0])
+            for command_id in ids:
+                # Another worker may have removed it already
+                self._delete_command(command_id, guild_id, missing_ok=True)
+                self.command_manifest.forget(guild_id, command_id)
+
+        with self.runtime_commands.edit() as runtime_commands:
+            for command_id in ids:
+                runtime_commands.pop(command_id, None)
+        self._set_command(guild_id, name, None)
+
+    def _set_command(
+        self, guild_id: Optional[str], name: str, command: Optional[Command]
+    ) -> None:
+        """Publish a new dict of commands for the guild, with `name` set to `command`, or removed if it is `None`."""
+        with self.commands.edit() as guilds:
+            commands = dict(guilds.get(guild_id, {}))
+            if command is None:
+                commands.pop(name, None)
+            else:
+                commands[name] = command
+            guilds[guild_id] = commands
+
+    def _check_generation(self) -> None:
+        """Reload the command ids if another worker changed the commands, checking at most every `reload_interval` seconds."""
+        if not self.command_manifest.path:
+            return
+        now = time.monotonic()
+        if now - self._generation_checked < self.reload_interval:
+            return
+        self._generation_checked = now
+        generation = self.command_manifest.generation()
+        if generation == self._generation:
+            return
+        # Rather than holding up the request behind a change being made in this worker, check again next time
+        if not self._manifest_lock.acquire(blocking=False):
+            return
+        try:
+            self._reload_commands(generation)
+        finally:
+            self._manifest_lock.release()
+
+    def reload_commands(self) -> None:
+        """Re-read the command manifest, and swap in the command ids it records for the commands defined in this worker."""
+        with self._manifest_lock:
+            self._reload_commands(self.command_manifest.generation())
+
+    def _reload_commands(self, generation: int) -> None:
+        # The generation is bumped after the manifest is written, so this manifest is at least as new as it
+        self.command_manifest.load()
+        self._generation = generation
+        runtime_commands = {}
+        for guild_id, commands in list(self.commands.items()):
+            runtime_commands.update(
+                self.command_manifest.runtime_commands(guild_id, commands.values())
+            )
+        self.runtime_commands.replace(runtime_commands)
+        logger.info("Reloaded %d commands from the manifest", len(runtime_commands))
+
+    def _batching(self) -> bool:
+        return bool(self._batch_depth or self.batch_window > 0)
+
+    def _defer(self, guild_id: Optional[str], removed: Optional[str] = None) -> bool:
+        """Queue a change to a guild for the next flush, if batching. Returns whether it was queued."""
+        with self._batch_lock:
+            if not self._batching():
+                return False
+            pending = self._pending.setdefault(guild_id, set())
+            if removed is not None:
+                pending.add(removed)
+            if not self._batch_depth:
+                self._schedule_flush()
+            return True
+
+    def _schedule_flush(self):
+        """Flush after `batch_window` seconds, unless a flush is already scheduled. Call with `_batch_lock` held."""
+        if self._flush_timer is None and self.batch_window > 0:
+            self._flush_timer = threading.Timer(
+                self.batch_window, self._flush_in_background
+            )
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Collect the commands added and removed inside the block, and send them to Discord when it exits.
+
+        Each guild with changes costs a single bulk overwrite request, rather than one request per command.
+
+        .. code-block:: python
+
+            with discord.batch():
+                for plugin in plugins:
+                    discord.add_command(plugin.command, guild_id)
+
+        Raises
+            DiscordApiError: If sending the changes fails. The changes stay queued, and are retried by the next flush.
+        """
+        with self._batch_lock:
+            self._batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._batch_lock:
+                self._batch_depth -= 1
+                outermost = self._batch_depth == 0
+        if outermost:
+            self.flush()
+
+    def flush(self) -> None:
+        """Send the queued command changes to Discord, one bulk overwrite per guild.
+
+        The runtime commands of each guild are swapped for the new ones in one step, so interactions never see a half applied batch.
+        """
+        with self._batch_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+        with self._flush_lock:
+            with self._batch_lock:
+                pending, self._pending = self._pending, {}
+            failures: dict[Optional[str], Exception] = {}
+            for guild_id, removed in pending.items():
+                try:
+                    self._flush_guild(guild_id, removed)
+                except Exception as e:
+                    failures[guild_id] = e
+                    with self._batch_lock:
+                        self._pending.setdefault(guild_id, set()).update(removed)
+
+        if failures:
+            raise errors.CommandSyncError(failures)
+
+    def _flush_guild(self, guild_id: Optional[str], removed: set[str]) -> None:
+        from discord_interactions_flask import sync
+
+        commands = list(self.commands.get(guild_id, {}).values())
+        by_path = {sync.command_path(command.spec()): command for command in commands}
+        with self._updating_manifest():
+            registered = self._create_commands(commands, guild_id)
+            ids = {
+                interaction.id: by_path[
+                    sync.command_path(
+                        {"type": interaction.type, "name": interaction.name}
+                    )
+                ]
+                for interaction in registered
+            }
+            recorded = self.command_manifest.get(guild_id) or {}
+            stale = removed | set(recorded.get("commands", {}))
+            with self.runtime_commands.edit() as runtime_commands:
+                for command_id in stale:
+                    runtime_commands.pop(command_id, None)
+                runtime_commands.update(ids)
+            self.command_manifest.update(guild_id, ids)
+        logger.info("Flushed %d commands for %s", len(ids), guild_id)
+
+    def _flush_in_background(self):
+        with self._batch_lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except errors.CommandSyncError as e:
+            logger.error(
+                "Failed to flush command changes, retrying in %ss",
+                self.batch_window,
+                exc_info=e,
+            )
+            with self._batch_lock:
+                self._schedule_flush()
+
+    def sync_commands(
+        self, commands: Iterable[Command], guild_id: Optional[str] = None
+    ) -> dict[str, Command]:
+        """Bring the commands registered with Discord for a guild in line with `commands`.
+
+        Only the commands that were added, changed, or removed since they were last registered are sent to Discord.
+        If the commands match what was recorded in the command manifest (see `DISCORD_COMMAND_MANIFEST`) no requests are made at all.
+
+        Args
+            commands: The full set of commands that should exist.
+
+            guild_id: The guild to sync, or `None` for global commands.
+
+        Returns
+            The Discord assigned id of each command.
+        """
+        from discord_interactions_flask import sync
+
+        commands = list(commands)
+        ids = self.command_manifest.resolve(guild_id, commands)
+        if ids is not None:
+            logger.debug("Commands for %s are unchanged, skipping sync", guild_id)
+            return ids
+
+        plan = sync.plan_sync(commands, self._list_commands(guild_id))
+        ids = dict(plan.unchanged)
+        for command_id in plan.delete:
+            self._delete_command(command_id, guild_id)
+        for command_id, command in plan.edit.items():
+            ids[self._edit_command(command_id, command, guild_id).id] = command
+        for command in plan.create:
+            ids[self._create_command(command, guild_id).id] = command
+
+        logger.info(
+            "Synced commands for %s: %d created, %d edited, %d deleted, %d unchanged",
+            guild_id,
+            len(plan.create),
+            len(plan.edit),
+            len(plan.delete),
+            len(plan.unchanged),
+        )
+        self.command_manifest.update(guild_id, ids)
+        return ids
+
+    def _configure(self, app: Flask):
+        import urllib3
+
+        from discord_interactions_flask import sync
+
+        config = self._app_config(app)
+        self.client_id = config.setdefault("DISCORD_CLIENT_ID", "")
+        self.client_secret = config.setdefault("DISCORD_CLIENT_SECRET", "")
+        self.command_manifest = sync.CommandManifest(
+            config.setdefault("DISCORD_COMMAND_MANIFEST", None)
+        )
+        self.api_url = config.setdefault("DISCORD_API_URL", API_URL).rstrip("/")
+        self.sync_concurrency = max(1, config.setdefault("DISCORD_SYNC_CONCURRENCY", 4))
+        # One connection per concurrent sync, rather than discarding the extras after every request
+        self.http.connection_pool_kw["maxsize"] = max(
+            self.http.connection_pool_kw.get("maxsize", 1), self.sync_concurrency
+        )
+        self.sync_lock = config.setdefault("DISCORD_SYNC_LOCK", True)
+        self.sync_lock_timeout = config.setdefault("DISCORD_SYNC_LOCK_TIMEOUT", 120)
+        self.rest.timeout = urllib3.Timeout(
+            connect=config.setdefault("DISCORD_CONNECT_TIMEOUT", 5),
+            read=config.setdefault("DISCORD_READ_TIMEOUT", 15),
+        )
+        self.rest.failure_threshold = config.setdefault("DISCORD_CIRCUIT_FAILURES", 5)
+        self.rest.reset_timeout = config.setdefault("DISCORD_CIRCUIT_RESET", 30)
+        self.batch_window = config.setdefault("DISCORD_BATCH_WINDOW", 0)
+        self.reload_interval = config.setdefault("DISCORD_RELOAD_INTERVAL", 1)
+
+    @contextmanager
+    def _updating_manifest(self, bump_generation: bool = True):
+        """Read, modify, and write back the command manifest while holding its file lock, so that concurrent workers see each others changes.
+
+        Args
+            bump_generation: Whether to bump the generation once the manifest is written, so other workers reload it.
+        """
+        from discord_interactions_flask import locking
+
+        path = self.command_manifest.path
+        with self._manifest_lock:
+            if path and self.sync_lock:
+                with locking.file_lock(path + ".lock", self.sync_lock_timeout):
+                    self.command_manifest.load()
+                    yield
+                    self._save_manifest(bump_generation)
+            else:
+                yield
+                self._save_manifest(bump_generation)
+
+    def _save_manifest(self, bump_generation: bool) -> None:
+        self.command_manifest.save()
+        if not bump_generation:
+            return
+        # Changes other workers made since the last reload are still picked up by the next check
+        current = self.command_manifest.generation() == self._generation
+        generation = self.command_manifest.bump_generation()
+        if current:
+            self._generation = generation
 
     def init_commands(self, app: Flask):
         """Sync the :class:`Command` s configured with this :class:`Discord` instance to the Discord application indicated by the DISCORD_CLIENT_ID key.
 
         Args
-            app: A :class:`Flask` instance configured with a `DISCORD_CLIENT_ID` and `DISCORD_CLIENT_SECRET`
+            app: A :class:`Flask` instance configured with a `DISCORD_CLIENT_ID` and `DISCORD_CLIENT_SECRET`. An optional `DISCORD_COMMAND_MANIFEST` path is used to remember what was last synced between restarts.
+
+        Guilds are synced concurrently, at most `DISCORD_SYNC_CONCURRENCY` at a time. If any of them fail the rest are
+        still synced, and a :class:`~discord_interactions_flask.errors.CommandSyncError` is raised at the end.
+
+        When a `DISCORD_COMMAND_MANIFEST` is configured, the sync happens while holding an advisory lock on `<manifest>.lock`
+        (unless `DISCORD_SYNC_LOCK` is `False`). When many workers boot at once one of them syncs, and the rest wait
+        for it and then load the command ids it wrote to the manifest.
         """
-        self.client_id = app.config.setdefault("DISCORD_CLIENT_ID", "")
-        self.client_secret = app.config.setdefault("DISCORD_CLIENT_SECRET", "")
+        self._configure(app)
 
         if not (self.client_id and self.client_secret):
             raise ValueError(
@@ -342,15 +1138,66 @@ class Discord:
             logger.warning(
                 "Running init_commands with no commands defined!\n"
                 "If you would like discord-interactions-flask to automatically push commands to Discord you will "
-                "need to run `init_commands` _after_ defining your commands",
-                self,
+                "need to run `init_commands` _after_ defining your commands"
             )
             return
 
-        self._refresh_token()
+        # When several workers boot at once only the first one to take the lock syncs,
+        # the rest find the manifest it wrote already matches their commands
+        with self._updating_manifest(bump_generation=False):
+            failures = self._sync_guilds()
+        self._generation = self.command_manifest.generation()
 
-        for guild_id, commands in self.commands.items():
-            iteractions = self._create_commands(commands.values(), guild_id)
+        if failures:
+            raise errors.CommandSyncError(failures)
+
+    def _sync_guilds(self) -> dict[Optional[str], Exception]:
+        """Sync every guild, up to `sync_concurrency` at a time or on the shared :attr:`sync_executor`. A failure in one guild doesn't stop the others."""
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        failures: dict[Optional[str], Exception] = {}
+        guilds = [
+            (guild_id, list(commands.values()))
+            for guild_id, commands in self.commands.items()
+        ]
+        executor = self.sync_executor or ThreadPoolExecutor(
+            max_workers=min(self.sync_concurrency, len(guilds)),
+            thread_name_prefix="discord-sync",
+        )
+        try:
+            futures = {
+                executor.submit(self.sync_commands, commands, guild_id): guild_id
+                for guild_id, commands in guilds
+            }
+            for future in as_completed(futures):
+                guild_id = futures[future]
+                try:
+                    self.runtime_commands.update(future.result())
+                except Exception as e:
+                    logger.error("Failed to sync commands for %s", guild_id, exc_info=e)
+                    failures[guild_id] = e
+        finally:
+            if executor is not self.sync_executor:
+                executor.shutdown()
+        return failures
+
+    def load_manifest(self, app: Flask):
+        """Fill in the runtime commands from the command manifest written by a previous sync, without contacting Discord.
+
+        This is what :meth:`init_app` does instead of :meth:`init_commands` when `DISCORD_SYNC_COMMANDS` is `False`.
+        Commands that changed since the manifest was written are left out, and will be answered by the `missing_command_handler`.
 
-            for command, interaction in zip(commands.values(), iteractions):
-                self.runtime_commands[interaction.id] = command
+        Args
+            app: A :class:`Flask` instance configured with a `DISCORD_COMMAND_MANIFEST`.
+        """
+        self._configure(app)
+        if not self.command_manifest.path:
+            raise ValueError(
+                "You must define a DISCORD_COMMAND_MANIFEST configuration value to load commands without syncing"
+            )
+
+        for guild_id, commands in self.commands.items():
+            self.runtime_commands.update(
+                self.command_manifest.runtime_commands(guild_id, commands.values())
+            )
+        self._generation = self.command_manifest.generation()
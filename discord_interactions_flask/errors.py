@@ -4,3 +4,36 @@ class DiscordInteractionsFlaskError(Exception):
 
 class DiscordApiError(DiscordInteractionsFlaskError):
     pass
+
+
+class CircuitOpenError(DiscordApiError):
+    """Raised without contacting Discord when an endpoint has been failing and its circuit breaker is open.
+
+    Args
+        route: The request that was refused.
+
+        retry_after: Seconds until a trial request will be let through.
+    """
+
+    def __init__(self, route: str, retry_after: float):
+        self.route = route
+        self.retry_after = retry_after
+        super().__init__(
+            "%s refused, Discord has been failing. Retrying in %.1fs"
+            % (route, retry_after)
+        )
+
+
+class CommandSyncError(DiscordApiError):
+    """Raised when commands could not be synced for one or more guilds.
+
+    Args
+        failures: The exception raised for each guild that failed, keyed by guild id (`None` for global commands).
+    """
+
+    def __init__(self, failures: dict):
+        self.failures = failures
+        super().__init__(
+            "Failed to sync commands for %s"
+            % ", ".join(str(guild_id or "global") for guild_id in failures)
+        )
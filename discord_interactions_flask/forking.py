@@ -0,0 +1,60 @@
+"""Keeping a :class:`~discord_interactions_flask.discord.Discord` usable in worker processes forked from the one that set it up.
+
+Servers like gunicorn with `--preload` import the app, and with it sync the commands, once in a master process, and
+then fork the workers. Everything built up to then (the command registries, the component store, the access token)
+is shared copy-on-write, but a child only gets a copy of the thread that called `fork()`. Locks that another thread
+held stay locked forever, background threads and thread pools are gone without knowing it, and pooled connections
+are sockets the parent is still using.
+
+Objects that hold such state implement `_after_fork()`, which replaces it in the child, and register themselves with
+:func:`after_fork`. Calling `gc.freeze()` in the master before forking keeps more of the shared pages shared.
+"""
+import logging
+import os
+import weakref
+
+logger = logging.getLogger(__name__)
+
+
+def after_fork(obj) -> None:
+    """Call `obj._after_fork()` in every child process forked after this, for as long as `obj` is alive.
+
+    Does nothing on platforms without :func:`os.register_at_fork`.
+    """
+    if not hasattr(os, "register_at_fork"):
+        return
+    # The hooks can't be unregistered, so they must not keep the object alive
+    ref = weakref.ref(obj)
+
+    def reset():
+        target = ref()
+        if target is None:
+            return
+        try:
+            target._after_fork()
+        except Exception:
+            logger.exception("Failed to reset %r after fork", target)
+
+    os.register_at_fork(after_in_child=reset)
+
+
+def new_pool(http):
+    """A new, empty :class:`urllib3.PoolManager` configured like `http`, to replace one whose connections belong to the parent."""
+    return type(http)(headers=http.headers, **http.connection_pool_kw)
+
+
+def detach(file) -> None:
+    """Make a file inherited from the parent harmless to drop in the child.
+
+    Its buffered data would otherwise be flushed into the parent's file when it's garbage collected, so its file
+    descriptor is pointed at the null device instead.
+    """
+    try:
+        fd = file.fileno()
+    except (OSError, ValueError):
+        return
+    null = os.open(os.devnull, os.O_WRONLY)
+    try:
+        os.dup2(null, fd)
+    finally:
+        os.close(null)
@@ -0,0 +1,139 @@
+"""Serving several Discord applications from one Flask app.
+
+A :class:`DiscordHost` holds one :class:`~discord_interactions_flask.discord.Discord` per application, and routes
+each request to the interactions endpoint to the application it is for: by the `application_id` in the interaction, or
+by the URL, when each application's Interactions Endpoint URL is set to `/discord/<application id>/interactions`.
+
+.. code-block:: python
+
+    host = DiscordHost()
+    weather = host.application(
+        {
+            "DISCORD_PUBLIC_KEY": ...,
+            "DISCORD_CLIENT_ID": ...,
+            "DISCORD_CLIENT_SECRET": ...,
+            "DISCORD_COMMAND_MANIFEST": "weather-commands.json",
+        }
+    )
+
+    @weather.command()
+    def forecast(interaction: ChatInteraction) -> InteractionResponse:
+        ...
+
+    host.init_app(app)
+
+Each application is verified with its own public key, and has its own access tokens, rate limit buckets, circuit
+breakers and component store. They share one connection pool to the Discord API and one thread pool for syncing
+commands, and configuration values that an application doesn't set are read from the app's config. The metrics route
+isn't served per application, pass a shared `timing_sink` to :meth:`DiscordHost.application` instead.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from typing import Optional
+
+from flask import Blueprint, Flask, request
+import urllib3
+
+from discord_interactions_flask import forking
+from discord_interactions_flask.discord import Discord
+from discord_interactions_flask.registry import Registry
+
+logger = logging.getLogger(__name__)
+
+
+class DiscordHost:
+    """Routes interactions to one of several :class:`~discord_interactions_flask.discord.Discord` instances.
+
+    Args
+        app: An optional :class:`Flask` instance to initialize right away.
+
+        sync_concurrency: How many guilds are synced at once, across every application.
+    """
+
+    def __init__(self, app: Optional[Flask] = None, sync_concurrency: int = 4):
+        # Read by request threads without locking, see registry.Registry
+        self.applications: Registry[str, Discord] = Registry()
+        self.http = urllib3.PoolManager(
+            headers={"Content-Type": "application/json"}, maxsize=sync_concurrency
+        )
+        self.sync_executor = ThreadPoolExecutor(
+            max_workers=sync_concurrency, thread_name_prefix="discord-sync"
+        )
+        self.app: Optional[Flask] = None
+        forking.after_fork(self)
+        if app:
+            self.init_app(app)
+
+    def _after_fork(self) -> None:
+        """Give the applications in a forked worker a new shared connection pool and sync thread pool."""
+        self.applications._after_fork()
+        self.http = forking.new_pool(self.http)
+        self.sync_executor = ThreadPoolExecutor(
+            max_workers=self.sync_executor._max_workers,
+            thread_name_prefix="discord-sync",
+        )
+        for discord in self.applications.values():
+            discord.http = discord.rest.http = self.http
+            discord.sync_executor = self.sync_executor
+
+    def application(self, config: dict, **kwargs) -> Discord:
+        """Add an application. After :meth:`init_app` its commands are synced right away.
+
+        Args
+            config: Its configuration, at least the `DISCORD_PUBLIC_KEY`, `DISCORD_CLIENT_ID` (the application id) and `DISCORD_CLIENT_SECRET`. Values not given here are read from the app's config.
+
+            kwargs: Passed on to :class:`~discord_interactions_flask.discord.Discord`.
+
+        Returns
+            The :class:`~discord_interactions_flask.discord.Discord` instance to define the application's commands on.
+        """
+        application_id = config.get("DISCORD_CLIENT_ID")
+        if not application_id:
+            raise ValueError("Each application needs a DISCORD_CLIENT_ID")
+        if application_id in self.applications:
+            raise ValueError(f"Application {application_id} was already added")
+
+        discord = Discord(
+            config=dict(config),
+            http=self.http,
+            sync_executor=self.sync_executor,
+            **kwargs,
+        )
+        if self.app is not None:
+            self._init_application(discord, self.app)
+        self.applications[application_id] = discord
+        return discord
+
+    def init_app(self, app: Flask) -> None:
+        """Add the interactions endpoints to the :class:`Flask` instance, and sync the commands of every application.
+
+        Args
+            app: A :class:`Flask` instance, whose config provides the values the applications don't set themselves.
+        """
+        for discord in self.applications.values():
+            self._init_application(discord, app)
+
+        interactions_bp = Blueprint("interactions", __name__, url_prefix="/discord")
+
+        @interactions_bp.post("/interactions")
+        def interactions():
+            payload = request.get_json(silent=True)
+            application_id = payload.get("application_id") if payload else None
+            return self._dispatch(application_id)
+
+        @interactions_bp.post("/<application_id>/interactions")
+        def application_interactions(application_id: str):
+            return self._dispatch(application_id)
+
+        app.register_blueprint(interactions_bp)
+        self.app = app
+
+    def _init_application(self, discord: Discord, app: Flask) -> None:
+        discord._setup(app)
+        discord._load_commands(app)
+
+    def _dispatch(self, application_id: Optional[str]):
+        discord = self.applications.get(application_id)
+        if discord is None:
+            return "Unknown application", 404
+        return discord._view()
@@ -0,0 +1,193 @@
+"""Timing of each stage an interaction goes through in the `/discord/interactions` view.
+
+Pass a :class:`TimingSink` to :class:`~discord_interactions_flask.discord.Discord` to receive the timings. Each
+request reports, in order, the stages it reached:
+
+``verify``
+    Checking the request signature.
+``parse``
+    Parsing the JSON body.
+``decode``
+    Loading the payload into an interaction type.
+``handler``
+    Running the command or component handler.
+``register``
+    Remembering the components in the response, see :mod:`~discord_interactions_flask.component_store`.
+``serialize``
+    Dumping the response to JSON.
+
+followed by ``total``. Every timing is tagged with the `interaction_type` (e.g. `APPLICATION_COMMAND`) and, once it
+is known, the `command` (e.g. `settings notifications enable` for a subcommand, or `BUTTON` for a component).
+
+Without a sink none of this is measured, the view only checks that the sink is `None`.
+"""
+import logging
+import time
+from typing import Iterable, Mapping, Optional
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask.interactions import (
+    ChatInteraction,
+    ComponentInteraction,
+    CommandInteraction,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("verify", "parse", "decode", "handler", "register", "serialize")
+
+SUBCOMMAND_TYPES = (
+    types.ApplicationCommandOptionType.SUB_COMMAND,
+    types.ApplicationCommandOptionType.SUB_COMMAND_GROUP,
+)
+
+
+class TimingSink:
+    """Interface for receiving stage timings."""
+
+    def record(self, stage: str, seconds: float, tags: Mapping[str, str]) -> None:
+        """Receive the duration of one stage of one request.
+
+        Called from request threads, so implementations must be thread safe and fast.
+
+        Args
+            stage: One of :data:`STAGES`, or `total`.
+
+            seconds: How long the stage took.
+
+            tags: The `interaction_type` and `command` of the request.
+        """
+        raise NotImplementedError
+
+    def request_started(self) -> None:
+        """Called when a request starts, before any of its stages, on the thread handling it. Does nothing by default."""
+
+    def request_finished(
+        self, seconds: float, tags: Mapping[str, str], error: bool
+    ) -> None:
+        """Called on the same thread once every stage of a request was recorded. Does nothing by default.
+
+        Args
+            seconds: The total time taken.
+
+            tags: The `interaction_type` and `command` of the request.
+
+            error: Whether handling the request raised an exception.
+        """
+
+
+class MultiSink(TimingSink):
+    """Sends every timing to several sinks.
+
+    Args
+        sinks: The sinks, called in order.
+    """
+
+    def __init__(self, sinks: Iterable[TimingSink]):
+        self.sinks = tuple(sinks)
+
+    def record(self, stage: str, seconds: float, tags: Mapping[str, str]) -> None:
+        for sink in self.sinks:
+            sink.record(stage, seconds, tags)
+
+    def request_started(self) -> None:
+        for sink in self.sinks:
+            sink.request_started()
+
+    def request_finished(
+        self, seconds: float, tags: Mapping[str, str], error: bool
+    ) -> None:
+        for sink in self.sinks:
+            sink.request_finished(seconds, tags, error)
+
+
+class NullSink(TimingSink):
+    """Discards every timing. Used when timings are needed for something else, e.g. :mod:`~discord_interactions_flask.profiling`, but no sink was configured."""
+
+    def record(self, stage: str, seconds: float, tags: Mapping[str, str]) -> None:
+        pass
+
+
+class LoggingSink(TimingSink):
+    """Logs every timing at debug level, mostly useful during development."""
+
+    def record(self, stage: str, seconds: float, tags: Mapping[str, str]) -> None:
+        logger.debug("%s %.3fms %s", stage, seconds * 1000, dict(tags))
+
+
+class StageTimer:
+    """Measures the stages of a single request, and reports them to the sink once it is done.
+
+    Args
+        sink: Where the timings are sent by :meth:`finish`.
+    """
+
+    def __init__(self, sink: TimingSink):
+        self.sink = sink
+        self.tags = {"interaction_type": "", "command": ""}
+        self.start = self.last = time.perf_counter()
+        self.stages: list[tuple[str, float]] = []
+        sink.request_started()
+
+    def mark(self, stage: str) -> None:
+        """Record that `stage` ended now, having started when the previous one ended."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def tag(self, interaction: types.Interaction) -> None:
+        """Tag the timings with the type and command of the interaction."""
+        self.tags = interaction_tags(interaction)
+
+    def finish(self, error: bool = False) -> None:
+        """Report every stage, and the total, to the sink. Errors from the sink are logged rather than failing the request.
+
+        Args
+            error: Whether handling the request raised an exception.
+        """
+        total = time.perf_counter() - self.start
+        self.stages.append(("total", total))
+        try:
+            for stage, seconds in self.stages:
+                self.sink.record(stage, seconds, self.tags)
+            self.sink.request_finished(total, self.tags, error)
+        except Exception:
+            logger.exception("Timing sink failed")
+
+
+def interaction_tags(interaction: types.Interaction) -> dict[str, str]:
+    """The tags for an interaction, its `interaction_type` and `command`."""
+    try:
+        interaction_type = types.InteractionType(interaction.type).name
+    except ValueError:
+        interaction_type = str(interaction.type)
+    return {"interaction_type": interaction_type, "command": command_path(interaction)}
+
+
+def command_path(interaction: types.Interaction) -> str:
+    """The full name of the command an interaction invoked, including subcommand groups and subcommands.
+
+    For component interactions this is the type of component instead, custom ids are too numerous to use as a tag.
+    """
+    if isinstance(interaction, CommandInteraction):
+        names = [interaction.data.name]
+        options = (
+            interaction.data.options
+            if isinstance(interaction, ChatInteraction)
+            else None
+        )
+        while options and options[0].type in SUBCOMMAND_TYPES:
+            names.append(options[0].name)
+            options = options[0].options
+        return " ".join(names)
+    if isinstance(interaction, ComponentInteraction):
+        try:
+            return types.ComponentType(interaction.data.component_type).name
+        except ValueError:
+            return str(interaction.data.component_type)
+    return ""
+
+
+def stage_timer(sink: Optional[TimingSink]) -> Optional[StageTimer]:
+    """A timer for a new request, or `None` when there is no sink so that nothing is measured."""
+    return StageTimer(sink) if sink is not None else None
@@ -0,0 +1,663 @@
+"""Synthetic, signed interactions and a driver to send them at an app under load.
+
+Discord signs every request to the interactions endpoint with the application's key, so load testing an app means
+signing requests the same way. This module generates realistic payloads for every interaction and component type,
+signs them with a throwaway Ed25519 key, and sends them to a URL at a given rate and concurrency, reporting the
+throughput and latency percentiles.
+
+.. code-block:: console
+
+    $ python -m discord_interactions_flask.loadgen key
+    DISCORD_PUBLIC_KEY=...
+    DISCORD_LOADGEN_SEED=...
+
+    $ # Start the app under test with that DISCORD_PUBLIC_KEY, then
+    $ python -m discord_interactions_flask.loadgen run http://127.0.0.1:5000/discord/interactions \\
+        --seed ... --rate 200 --concurrency 16 --duration 30 --mix chat=5,button=3,ping=1 \\
+        --command 1234:echo
+
+Commands and components the app doesn't know about are answered by its missing command and component handlers, so
+pass the ids of real ones (`--command`, `--component`) to exercise the handlers themselves.
+"""
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from typing import Iterable, Mapping, Optional, Sequence
+
+from nacl.signing import SigningKey
+import urllib3
+
+from discord_interactions_flask import discord_types as types
+
+KINDS = (
+    "ping",
+    "chat",
+    "user",
+    "message",
+    "autocomplete",
+    "button",
+    "select_menu",
+    "text_input",
+    "modal_submit",
+)
+
+COMMAND_TYPES = {
+    "chat": types.CommandType.CHAT,
+    "user": types.CommandType.USER,
+    "message": types.CommandType.MESSAGE,
+    "autocomplete": types.CommandType.CHAT,
+}
+
+COMPONENT_TYPES = {
+    "button": types.ComponentType.BUTTON,
+    "select_menu": types.ComponentType.SELECT_MENU,
+    "text_input": types.ComponentType.TEXT_INPUT,
+}
+
+# Roughly what a busy bot sees: mostly commands, a good share of component clicks, the occasional PING
+DEFAULT_MIX = {"chat": 6, "button": 2, "select_menu": 1, "user": 1, "ping": 0.1}
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def generate_key(seed: Optional[str] = None) -> SigningKey:
+    """The signing key for a hex `seed`, or a new random one."""
+    return SigningKey(bytes.fromhex(seed)) if seed else SigningKey.generate()
+
+
+def public_key(key: SigningKey) -> str:
+    """The hex public key to configure the app under test with, as `DISCORD_PUBLIC_KEY`."""
+    return key.verify_key.encode().hex()
+
+
+def sign(body: bytes, key: SigningKey, timestamp: Optional[str] = None) -> dict:
+    """The `X-Signature-Ed25519` and `X-Signature-Timestamp` headers Discord would send with `body`."""
+    timestamp = timestamp or str(int(time.time()))
+    return {
+        "X-Signature-Ed25519": key.sign(timestamp.encode() + body).signature.hex(),
+        "X-Signature-Timestamp": timestamp,
+    }
+
+
+class PayloadGenerator:
+    """Generates interaction payloads shaped like the ones Discord sends.
+
+    Args
+        application_id: The `application_id` of every interaction.
+
+        commands: `(id, name)` of the commands to invoke for each of `chat`, `user`, `message` and `autocomplete`.
+            Kinds without any get a random command.
+
+        components: `(interaction id, custom id)` of the components to click for each of `button`, `select_menu`
+            and `text_input`. The interaction id is the one whose response carried the component. Kinds without any
+            get a random component.
+
+        mix: The relative weight of each kind in :data:`KINDS`.
+
+        seed: Makes the sequence of payloads reproducible.
+    """
+
+    def __init__(
+        self,
+        application_id: str = "1",
+        commands: Optional[Mapping[str, Sequence[tuple[str, str]]]] = None,
+        components: Optional[Mapping[str, Sequence[tuple[str, str]]]] = None,
+        mix: Optional[Mapping[str, float]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.application_id = application_id
+        self.commands = dict(commands or {})
+        self.components = dict(components or {})
+        mix = dict(mix if mix is not None else DEFAULT_MIX)
+        unknown = set(mix) - set(KINDS)
+        if unknown:
+            raise ValueError(f"Unknown interaction kinds {', '.join(sorted(unknown))}")
+        self.kinds = [kind for kind, weight in mix.items() if weight > 0]
+        self.weights = [mix[kind] for kind in self.kinds]
+        if not self.kinds:
+            raise ValueError("The mix must give at least one kind a weight")
+        self.random = random.Random(seed)
+        self.guild_id = self.snowflake()
+        self.channel_id = self.snowflake()
+        self.users = [self._user() for _ in range(50)]
+
+    def snowflake(self) -> str:
+        # Discord epoch milliseconds, worker, process and increment bits
+        return str(
+            (self.random.randrange(1 << 41) << 22) | self.random.randrange(1 << 22)
+        )
+
+    def _user(self) -> dict:
+        return {
+            "id": self.snowflake(),
+            "username": f"user{self.random.randrange(10 ** 6)}",
+            "discriminator": f"{self.random.randrange(10000):04}",
+            "avatar": "%032x" % self.random.getrandbits(128),
+            "public_flags": 0,
+        }
+
+    def _member(self, user: dict) -> dict:
+        return {
+            "user": user,
+            "roles": [self.snowflake() for _ in range(self.random.randrange(6))],
+            "permissions": "4398046511103",
+            "joined_at": "2022-01-01T00:00:00.000000+00:00",
+            "nick": None,
+            "avatar": None,
+            "premium_since": None,
+            "pending": False,
+            "mute": False,
+            "deaf": False,
+            "communication_disabled_until": None,
+        }
+
+    def _text(self, words: int) -> str:
+        return " ".join(
+            self.random.choice(("lorem", "ipsum", "dolor", "sit", "amet", "elit"))
+            for _ in range(words)
+        )
+
+    def next(self) -> tuple[str, dict]:
+        """A payload of a kind chosen according to the mix."""
+        kind = self.random.choices(self.kinds, self.weights)[0]
+        return kind, self.payload(kind)
+
+    def payload(self, kind: str) -> dict:
+        """A payload of the given kind, one of :data:`KINDS`."""
+        user = self.random.choice(self.users)
+        payload = {
+            "id": self.snowflake(),
+            "application_id": self.application_id,
+            "token": "%0200x" % self.random.getrandbits(800),
+            "version": 1,
+        }
+        if kind == "ping":
+            payload["type"] = int(types.InteractionType.PING)
+            return payload
+
+        payload.update(
+            guild_id=self.guild_id,
+            channel_id=self.channel_id,
+            member=self._member(user),
+            app_permissions="4398046511103",
+            locale="en-US",
+            guild_locale="en-US",
+        )
+        if kind in COMMAND_TYPES:
+            payload["type"] = (
+                types.InteractionType.APPLICATION_COMMAND_AUTOCOMPLETE
+                if kind == "autocomplete"
+                else types.InteractionType.APPLICATION_COMMAND
+            )
+            payload["data"] = self._command_data(kind, user)
+        elif kind in COMPONENT_TYPES:
+            payload["type"] = types.InteractionType.MESSAGE_COMPONENT
+            interaction_id, custom_id = self._component(kind)
+            payload["data"] = {
+                "custom_id": custom_id,
+                "component_type": COMPONENT_TYPES[kind],
+            }
+            if kind == "select_menu":
+                payload["data"]["values"] = [
+                    str(value) for value in self.random.sample(range(25), 3)
+                ]
+            payload["message"] = self._message(interaction_id, custom_id, kind, user)
+        elif kind == "modal_submit":
+            payload["type"] = types.InteractionType.MODAL_SUBMIT
+            payload["data"] = {
+                "custom_id": f"modal-{self.random.randrange(100)}",
+                "components": [
+                    {
+                        "type": types.ComponentType.ACTION_ROW,
+                        "components": [
+                            {
+                                "type": types.ComponentType.TEXT_INPUT,
+                                "custom_id": f"input-{i}",
+                                "value": self._text(20),
+                            }
+                        ],
+                    }
+                    for i in range(2)
+                ],
+            }
+        else:
+            raise ValueError(f"Unknown interaction kind {kind}")
+        # Round trip through JSON, so that payloads hold plain values like the ones Discord sends
+        return json.loads(json.dumps(payload))
+
+    def _command_data(self, kind: str, user: dict) -> dict:
+        choices = self.commands.get(kind)
+        if choices:
+            command_id, name = self.random.choice(choices)
+        else:
+            command_id, name = self.snowflake(), f"{kind}{self.random.randrange(10)}"
+        data = {
+            "id": command_id,
+            "name": name,
+            "type": COMMAND_TYPES[kind],
+            "guild_id": self.guild_id,
+        }
+        if kind == "chat":
+            data["options"] = [
+                {
+                    "name": "text",
+                    "type": types.ApplicationCommandOptionType.STRING,
+                    "value": self._text(12),
+                },
+                {
+                    "name": "count",
+                    "type": types.ApplicationCommandOptionType.INTEGER,
+                    "value": self.random.randrange(100),
+                },
+            ]
+        elif kind == "autocomplete":
+            data["options"] = [
+                {
+                    "name": "text",
+                    "type": types.ApplicationCommandOptionType.STRING,
+                    "value": self._text(1)[: self.random.randrange(1, 5)],
+                    "focused": True,
+                }
+            ]
+        elif kind == "user":
+            target = self.random.choice(self.users)
+            data["target_id"] = target["id"]
+            data["resolved"] = {
+                "users": {target["id"]: target},
+                "members": {target["id"]: self._member(target)},
+            }
+        elif kind == "message":
+            message = self._message(None, None, None, user)
+            data["target_id"] = message["id"]
+            data["resolved"] = {"messages": {message["id"]: message}}
+        return data
+
+    def _component(self, kind: str) -> tuple[str, str]:
+        choices = self.components.get(kind)
+        if choices:
+            return self.random.choice(choices)
+        return self.snowflake(), f"{kind}-{self.random.randrange(25)}"
+
+    def _message(
+        self,
+        interaction_id: Optional[str],
+        custom_id: Optional[str],
+        kind: Optional[str],
+        user: dict,
+    ) -> dict:
+        message = {
+            "id": self.snowflake(),
+            "channel_id": self.channel_id,
+            "author": dict(self.random.choice(self.users), bot=True),
+            "content": self._text(self.random.randrange(10, 300)),
+            "timestamp": "2023-11-14T22:13:20.000000+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [
+                {
+                    "type": "rich",
+                    "title": self._text(3),
+                    "description": self._text(40),
+                    "fields": [
+                        {"name": self._text(1), "value": self._text(8), "inline": True}
+                        for _ in range(self.random.randrange(6))
+                    ],
+                }
+                for _ in range(self.random.randrange(4))
+            ],
+            "pinned": False,
+            "type": types.MessageType.DEFAULT,
+            "flags": 0,
+        }
+        if interaction_id is not None:
+            message["type"] = types.MessageType.CHAT_INPUT_COMMAND
+            message["application_id"] = self.application_id
+            message["interaction"] = {
+                "id": interaction_id,
+                "name": "command",
+                "type": types.InteractionType.APPLICATION_COMMAND,
+                "user": user,
+                "member": self._member(user),
+            }
+            message["components"] = [
+                {
+                    "type": types.ComponentType.ACTION_ROW,
+                    "components": [self._component_spec(kind, custom_id)],
+                }
+            ]
+        return message
+
+    def _component_spec(self, kind: Optional[str], custom_id: Optional[str]) -> dict:
+        if kind == "select_menu":
+            return {
+                "type": types.ComponentType.SELECT_MENU,
+                "custom_id": custom_id,
+                "options": [
+                    {"label": self._text(2), "value": str(i)} for i in range(25)
+                ],
+                "min_values": 1,
+                "max_values": 25,
+            }
+        if kind == "text_input":
+            return {
+                "type": types.ComponentType.TEXT_INPUT,
+                "custom_id": custom_id,
+                "style": types.TextInputStyle.SHORT,
+                "label": self._text(2),
+            }
+        return {
+            "type": types.ComponentType.BUTTON,
+            "custom_id": custom_id,
+            "style": types.ButtonStyle.PRIMARY,
+            "label": self._text(2),
+        }
+
+
+@dataclass
+class Report:
+    """The outcome of a load run."""
+
+    duration: float = 0.0
+    # Seconds per request, by kind
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return sum(len(latencies) for latencies in self.latencies.values())
+
+    @property
+    def throughput(self) -> float:
+        """Requests completed per second."""
+        return self.requests / self.duration if self.duration else 0.0
+
+    def summary(self) -> dict:
+        """The throughput, status counts, and latency percentiles in seconds overall and by kind, as a JSON friendly dict."""
+        everything = sorted(itertools.chain.from_iterable(self.latencies.values()))
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "duration": self.duration,
+            "throughput": self.throughput,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "latency": _distribution(everything),
+            "by_kind": {
+                kind: _distribution(sorted(latencies))
+                for kind, latencies in sorted(self.latencies.items())
+            },
+        }
+
+    def format(self) -> str:
+        """A human readable summary."""
+        summary = self.summary()
+        lines = [
+            f"{summary['requests']} requests in {self.duration:.1f}s, "
+            f"{summary['throughput']:.1f}/s, {self.errors} errors",
+            "statuses: "
+            + ", ".join(
+                f"{status}: {count}" for status, count in summary["statuses"].items()
+            ),
+            f"{'':<14}"
+            + "".join(f"{name:>10}" for name in summary["latency"] if name != "count"),
+        ]
+        for kind, distribution in [
+            ("all", summary["latency"]),
+            *summary["by_kind"].items(),
+        ]:
+            lines.append(
+                f"{kind:<14}"
+                + "".join(
+                    f"{value * 1000:>8.2f}ms"
+                    for name, value in distribution.items()
+                    if name != "count"
+                )
+            )
+        return "\n".join(lines)
+
+
+def percentile(ordered: Sequence[float], p: float) -> float:
+    """The nearest rank `p` th percentile of already sorted values."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def _distribution(ordered: Sequence[float]) -> dict:
+    distribution = {"count": len(ordered)}
+    distribution["mean"] = sum(ordered) / len(ordered) if ordered else 0.0
+    for p in PERCENTILES:
+        distribution[f"p{p:g}"] = percentile(ordered, p)
+    distribution["max"] = ordered[-1] if ordered else 0.0
+    return distribution
+
+
+def prepare(
+    generator: PayloadGenerator, key: SigningKey, count: int
+) -> list[tuple[str, bytes, dict]]:
+    """Generate and sign `count` requests ahead of time, so that doing so doesn't slow down the load run.
+
+    Returns
+        The kind, body, and headers of each request.
+    """
+    requests = []
+    for _ in range(count):
+        kind, payload = generator.next()
+        body = json.dumps(payload).encode()
+        headers = sign(body, key)
+        headers["Content-Type"] = "application/json"
+        requests.append((kind, body, headers))
+    return requests
+
+
+def drive(
+    url: str,
+    requests: Sequence[tuple[str, bytes, dict]],
+    rate: float = 0,
+    concurrency: int = 8,
+    duration: Optional[float] = 10.0,
+    total: Optional[int] = None,
+    timeout: float = 10.0,
+    offsets: Optional[Sequence[float]] = None,
+) -> Report:
+    """Send the prepared requests, cycling through them, to `url`.
+
+    With a `rate`, requests are started on a fixed schedule regardless of how fast the app answers, and each latency is
+    measured from when the request was due to be sent. A slow app then shows up as growing latencies, rather than as a
+    lower rate hiding how long requests would have waited. Without a `rate`, each of the `concurrency` workers sends
+    its next request as soon as the previous one is answered.
+
+    Args
+        url: The interactions endpoint of the app under test.
+
+        requests: From :func:`prepare`.
+
+        rate: Requests started per second, or `0` for as fast as the workers go.
+
+        concurrency: The number of requests in flight at most.
+
+        duration: Stop starting requests after this many seconds.
+
+        total: Stop after this many requests.
+
+        timeout: Seconds to wait for each response.
+
+        offsets: When each request is due, in seconds from the start, instead of a fixed `rate`. Each request is
+            then sent once, in order.
+    """
+    if offsets is not None:
+        total = len(offsets) if total is None else min(total, len(offsets))
+    if duration is None and total is None:
+        raise ValueError("Give a duration or a total number of requests")
+    http = urllib3.PoolManager(maxsize=concurrency, retries=False, timeout=timeout)
+    report = Report()
+    lock = threading.Lock()
+    slots = itertools.count()
+    start = time.perf_counter()
+
+    def work():
+        latencies: dict[str, list[float]] = {}
+        statuses: Counter = Counter()
+        errors = 0
+        while True:
+            slot = next(slots)
+            if total is not None and slot >= total:
+                break
+            if offsets is not None or rate:
+                due = start + (offsets[slot] if offsets is not None else slot / rate)
+                if duration is not None and due - start >= duration:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            else:
+                due = time.perf_counter()
+                if duration is not None and due - start >= duration:
+                    break
+            kind, body, headers = requests[slot % len(requests)]
+            try:
+                resp = http.request("POST", url, body=body, headers=headers)
+                statuses[resp.status] += 1
+                if resp.status >= 400:
+                    errors += 1
+            except urllib3.exceptions.HTTPError:
+                statuses["error"] += 1
+                errors += 1
+            latencies.setdefault(kind, []).append(time.perf_counter() - due)
+        with lock:
+            for kind, values in latencies.items():
+                report.latencies.setdefault(kind, []).extend(values)
+            report.statuses.update(statuses)
+            report.errors += errors
+
+    workers = [
+        threading.Thread(target=work, name=f"loadgen-{i}", daemon=True)
+        for i in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    report.duration = time.perf_counter() - start
+    http.clear()
+    return report
+
+
+def _pairs(values: Iterable[str], option: str) -> dict[str, list[tuple[str, str]]]:
+    pairs: dict[str, list[tuple[str, str]]] = {}
+    for value in values:
+        parts = value.split(":")
+        if len(parts) not in (2, 3):
+            raise SystemExit(f"{option} takes ID:NAME[:KIND], got {value}")
+        kind = parts[2] if len(parts) == 3 else None
+        pairs.setdefault(kind or "", []).append((parts[0], parts[1]))
+    return pairs
+
+
+def _mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        mix[kind.strip()] = float(weight or 1)
+    return mix
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m discord_interactions_flask.loadgen",
+        description="Send signed synthetic interactions to an app under test.",
+    )
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    subparsers.add_parser(
+        "key", help="Generate a key, print its public key and the seed to reuse it"
+    )
+    run = subparsers.add_parser("run", help="Send interactions to a URL")
+    run.add_argument("url", help="The interactions endpoint of the app under test")
+    run.add_argument(
+        "--seed",
+        default=os.environ.get("DISCORD_LOADGEN_SEED"),
+        help="The key seed printed by `key`, defaults to $DISCORD_LOADGEN_SEED",
+    )
+    run.add_argument(
+        "--rate", type=float, default=0, help="Requests per second, 0 for unlimited"
+    )
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument(
+        "--duration",
+        type=float,
+        help="Seconds to run for, 10 unless --requests is given",
+    )
+    run.add_argument("--requests", type=int, help="Stop after this many requests")
+    run.add_argument(
+        "--mix",
+        type=_mix,
+        default=DEFAULT_MIX,
+        help=f"Weights of each kind, e.g. chat=5,button=1. Kinds: {', '.join(KINDS)}",
+    )
+    run.add_argument(
+        "--command",
+        action="append",
+        default=[],
+        help="ID:NAME[:KIND] of a command the app knows, KIND defaults to chat",
+    )
+    run.add_argument(
+        "--component",
+        action="append",
+        default=[],
+        help="INTERACTION_ID:CUSTOM_ID[:KIND] of a component the app knows, KIND defaults to button",
+    )
+    run.add_argument("--application-id", default="1")
+    run.add_argument(
+        "--pool", type=int, default=1000, help="Distinct requests to prepare"
+    )
+    run.add_argument("--random-seed", type=int, help="Makes the payloads reproducible")
+    run.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.action == "key":
+        key = generate_key()
+        print(f"DISCORD_PUBLIC_KEY={public_key(key)}")
+        print(f"DISCORD_LOADGEN_SEED={key.encode().hex()}")
+        return 0
+
+    if not args.seed:
+        parser.error(
+            "run needs the --seed of the key the app under test was configured with"
+        )
+    commands = _pairs(args.command, "--command")
+    commands["chat"] = commands.pop("", []) + commands.get("chat", [])
+    components = _pairs(args.component, "--component")
+    components["button"] = components.pop("", []) + components.get("button", [])
+    generator = PayloadGenerator(
+        args.application_id, commands, components, args.mix, args.random_seed
+    )
+    requests = prepare(generator, generate_key(args.seed), args.pool)
+    report = drive(
+        args.url,
+        requests,
+        args.rate,
+        args.concurrency,
+        args.duration if args.duration or args.requests else 10.0,
+        args.requests,
+    )
+    print(report.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.summary(), f, indent=2)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Advisory file locks used to coordinate between worker processes on the same host."""
+from contextlib import contextmanager
+import logging
+import os
+import time
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def file_lock(
+    path: str, timeout: Optional[float] = None, poll_interval: float = 0.05
+) -> Iterator[bool]:
+    """Hold an exclusive advisory lock on `path` for the duration of the block.
+
+    .. code-block:: python
+
+        with file_lock("/tmp/commands.json.lock", timeout=30) as locked:
+            ...
+
+    Args
+        path: The lock file, created if it doesn't exist.
+
+        timeout: The maximum number of seconds to wait for the lock. By default wait forever.
+
+        poll_interval: How often to retry while waiting for the lock.
+
+    Returns
+        Whether the lock was acquired. It is not when waiting timed out, or when the platform doesn't support `fcntl`.
+    """
+    if fcntl is None:
+        logger.warning("File locks are not supported on this platform")
+        yield False
+        return
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    logger.warning("Timed out waiting for lock %s", path)
+                    yield False
+                    return
+                time.sleep(poll_interval)
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
@@ -0,0 +1,307 @@
+"""Prometheus metrics for the interactions endpoint and the Discord API client.
+
+Setting `DISCORD_METRICS_ROUTE` (e.g. `/metrics`) makes :meth:`~discord_interactions_flask.discord.Discord.init_app`
+mount the metrics in the Prometheus text format at that path on the `/discord` blueprint. It exposes:
+
+* `discord_interactions_total`, `discord_interaction_errors_total` and the `discord_interaction_duration_seconds`
+  histogram, labelled by `interaction_type` and `command` (the command path, or the component type).
+* `discord_interaction_stage_seconds_total`, the time spent in each stage, see :mod:`~discord_interactions_flask.instrumentation`.
+* `discord_interactions_in_flight`, the number of requests currently being handled.
+* `discord_component_handlers`, the number of components in the component store.
+* `discord_rest_*`, the rate limit buckets, circuit breakers, and request counters of the REST client.
+
+Counts are kept per thread, each thread only ever touching its own, and added up when the metrics are scraped. So
+recording a request takes no locks and allocates nothing once a thread has seen a command.
+"""
+from bisect import bisect_left
+import threading
+from typing import Iterable, Mapping
+
+from flask import Blueprint, Response
+
+from discord_interactions_flask.instrumentation import STAGES, TimingSink
+
+# Seconds. Discord expects a response within 3 seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 3.0)
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class _Series:
+    """The counts for one `interaction_type` and `command`, on one thread."""
+
+    __slots__ = ("buckets", "sum", "count", "errors")
+
+    def __init__(self, size: int):
+        # One more than the bounds, for +Inf
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class _Shard:
+    """Everything recorded by one thread."""
+
+    def __init__(self):
+        self.series: dict[str, dict[str, _Series]] = {}
+        self.stages = dict.fromkeys((*STAGES, "total"), 0.0)
+        self.in_flight = 0
+
+
+class MetricsSink(TimingSink):
+    """A :class:`~discord_interactions_flask.instrumentation.TimingSink` that aggregates timings into histograms.
+
+    Args
+        buckets: The upper bounds of the latency histogram buckets, in seconds.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: list[_Shard] = []
+
+    def _after_fork(self) -> None:
+        # The parent's counts are its own to report, and its threads' shards would never be updated again
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def record(self, stage: str, seconds: float, tags: Mapping[str, str]) -> None:
+        stages = self._shard().stages
+        if stage in stages:
+            stages[stage] += seconds
+
+    def request_started(self) -> None:
+        self._shard().in_flight += 1
+
+    def request_finished(
+        self, seconds: float, tags: Mapping[str, str], error: bool
+    ) -> None:
+        shard = self._shard()
+        shard.in_flight -= 1
+        by_command = shard.series.get(tags["interaction_type"])
+        if by_command is None:
+            by_command = shard.series[tags["interaction_type"]] = {}
+        series = by_command.get(tags["command"])
+        if series is None:
+            series = by_command[tags["command"]] = _Series(len(self.bounds) + 1)
+
+        series.buckets[bisect_left(self.bounds, seconds)] += 1
+        series.sum += seconds
+        series.count += 1
+        if error:
+            series.errors += 1
+
+    def render(self, component_store=None, rest=None, watchdog=None) -> str:
+        """Render everything recorded so far in the Prometheus text format.
+
+        Args
+            component_store: A :class:`~discord_interactions_flask.component_store.ComponentStore` to report the size of.
+
+            rest: A :class:`~discord_interactions_flask.rest.RestClient` to report the state of.
+
+            watchdog: A :class:`~discord_interactions_flask.watchdog.Watchdog` to report the slow handlers of.
+        """
+        with self._lock:
+            shards = list(self._shards)
+
+        totals: dict[tuple[str, str], _Series] = {}
+        stages = dict.fromkeys((*STAGES, "total"), 0.0)
+        in_flight = 0
+        for shard in shards:
+            in_flight += shard.in_flight
+            for stage, seconds in list(shard.stages.items()):
+                stages[stage] += seconds
+            for interaction_type, by_command in list(shard.series.items()):
+                for command, series in list(by_command.items()):
+                    total = totals.get((interaction_type, command))
+                    if total is None:
+                        total = totals[(interaction_type, command)] = _Series(
+                            len(self.bounds) + 1
+                        )
+                    for i, count in enumerate(series.buckets):
+                        total.buckets[i] += count
+                    total.sum += series.sum
+                    total.count += series.count
+                    total.errors += series.errors
+
+        lines: list[str] = []
+        _metric(lines, "discord_interactions_total", "counter", "Interactions handled.")
+        for (interaction_type, command), series in sorted(totals.items()):
+            labels = _labels(interaction_type=interaction_type, command=command)
+            lines.append(f"discord_interactions_total{labels} {series.count}")
+
+        _metric(
+            lines,
+            "discord_interaction_errors_total",
+            "counter",
+            "Interactions whose handling raised an exception.",
+        )
+        for (interaction_type, command), series in sorted(totals.items()):
+            labels = _labels(interaction_type=interaction_type, command=command)
+            lines.append(f"discord_interaction_errors_total{labels} {series.errors}")
+
+        _metric(
+            lines,
+            "discord_interaction_duration_seconds",
+            "histogram",
+            "Time taken to handle an interaction.",
+        )
+        for (interaction_type, command), series in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip((*self.bounds, "+Inf"), series.buckets):
+                cumulative += count
+                labels = _labels(
+                    interaction_type=interaction_type, command=command, le=str(bound)
+                )
+                lines.append(
+                    f"discord_interaction_duration_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(interaction_type=interaction_type, command=command)
+            lines.append(
+                f"discord_interaction_duration_seconds_sum{labels} {series.sum}"
+            )
+            lines.append(
+                f"discord_interaction_duration_seconds_count{labels} {series.count}"
+            )
+
+        _metric(
+            lines,
+            "discord_interaction_stage_seconds_total",
+            "counter",
+            "Time spent in each stage of handling interactions.",
+        )
+        for stage, seconds in stages.items():
+            lines.append(
+                f"discord_interaction_stage_seconds_total{_labels(stage=stage)} {seconds}"
+            )
+
+        _metric(
+            lines,
+            "discord_interactions_in_flight",
+            "gauge",
+            "Interactions currently being handled.",
+        )
+        lines.append(f"discord_interactions_in_flight {in_flight}")
+
+        if component_store is not None:
+            _metric(
+                lines,
+                "discord_component_handlers",
+                "gauge",
+                "Components in the component store.",
+            )
+            lines.append(f"discord_component_handlers {len(component_store)}")
+
+        if rest is not None:
+            _render_rest(lines, rest)
+
+        if watchdog is not None:
+            _metric(
+                lines,
+                "discord_handler_slow_total",
+                "counter",
+                "Handlers that ran past the watchdog's soft limit.",
+            )
+            lines.append(f"discord_handler_slow_total {watchdog.slow_handlers}")
+            _metric(
+                lines,
+                "discord_handler_deadline_misses_total",
+                "counter",
+                "Handlers that finished after Discord's deadline.",
+            )
+            lines.append(
+                f"discord_handler_deadline_misses_total {watchdog.deadline_misses}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def _render_rest(lines: list[str], rest) -> None:
+    _metric(
+        lines, "discord_rest_requests_total", "counter", "Requests sent to Discord."
+    )
+    lines.append(f"discord_rest_requests_total {rest.stats['requests']}")
+    for name, help_ in (
+        ("rate_limited", "Requests that got a 429."),
+        ("retries", "Requests that were retried."),
+        (
+            "failures",
+            "Requests that failed with a 5xx, a timeout, or a connection error.",
+        ),
+        ("rejected", "Requests refused by an open circuit breaker."),
+    ):
+        _metric(lines, f"discord_rest_{name}_total", "counter", help_)
+        lines.append(f"discord_rest_{name}_total {rest.stats[name]}")
+
+    buckets = sorted(rest.bucket_state().items())
+    for field, help_ in (
+        ("limit", "Requests allowed per window by the rate limit bucket of a route."),
+        ("remaining", "Requests left in the current window of a route."),
+        ("reset_after", "Seconds until the rate limit bucket of a route resets."),
+    ):
+        _metric(lines, f"discord_rest_bucket_{field}", "gauge", help_)
+        for route, state in buckets:
+            if state[field] is not None:
+                labels = _labels(route=route, bucket=state["bucket"] or "")
+                lines.append(f"discord_rest_bucket_{field}{labels} {state[field]}")
+
+    _metric(
+        lines,
+        "discord_rest_circuit_state",
+        "gauge",
+        "Circuit breaker of each class of endpoint: 0 closed, 1 half open, 2 open.",
+    )
+    for endpoint, state in sorted(rest.breaker_state().items()):
+        lines.append(
+            f"discord_rest_circuit_state{_labels(endpoint=endpoint)} {CIRCUIT_STATES[state['state']]}"
+        )
+
+
+def _metric(lines: list[str], name: str, type_: str, help_: str) -> None:
+    lines.append(f"# HELP {name} {help_}")
+    lines.append(f"# TYPE {name} {type_}")
+
+
+def _labels(**labels: str) -> str:
+    return (
+        "{"
+        + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+        + "}"
+    )
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def mount(blueprint: Blueprint, route: str, sink: MetricsSink, discord) -> None:
+    """Add the metrics route to the interactions blueprint.
+
+    Args
+        blueprint: The :class:`flask.Blueprint` to add the route to.
+
+        route: The path of the route within the blueprint.
+
+        sink: The sink whose metrics are served.
+
+        discord: The :class:`~discord_interactions_flask.discord.Discord` instance to report the component store and REST client of.
+    """
+
+    @blueprint.get(route)
+    def metrics():
+        return Response(
+            sink.render(discord.component_handlers, discord.rest, discord.watchdog),
+            mimetype="text/plain; version=0.0.4",
+        )
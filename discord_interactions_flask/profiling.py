@@ -0,0 +1,200 @@
+"""Profiling a sample of live interactions with :mod:`cProfile`.
+
+A :class:`Profiler` set as :attr:`Discord.profiler <discord_interactions_flask.discord.Discord.profiler>` profiles one
+in every `sample_rate` requests to the interactions endpoint, and every invocation of the commands listed in
+`commands`. Profiles are aggregated per interaction type and command path, and every `interval` seconds a background
+thread writes each aggregate to `directory` as a :mod:`pstats` file, `<interaction type>-<command>-<time>.prof`, with a
+`.json` file next to it holding the number of requests profiled and the average time spent in each stage (see
+:mod:`~discord_interactions_flask.instrumentation`).
+
+.. code-block:: console
+
+    $ python -m pstats profiles/APPLICATION_COMMAND-settings_notifications-20240101-120000.prof
+
+Everything about the profiler can be changed while the app is running, e.g. `discord.profiler.commands.add("ping")`,
+or assigning a new :class:`Profiler` (or `None`) to `discord.profiler`.
+"""
+import cProfile
+import itertools
+import json
+import logging
+import os
+import pstats
+import re
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+from discord_interactions_flask import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class _Aggregate:
+    def __init__(self):
+        self.stats: Optional[pstats.Stats] = None
+        self.count = 0
+        self.stages: dict[str, float] = {}
+
+
+class Profiler:
+    """Samples interactions to profile, and writes their aggregated stats to a directory.
+
+    Args
+        directory: Where the profiles are written, created if it doesn't exist.
+
+        sample_rate: Profile one in this many requests. `0` only profiles the `commands`.
+
+        commands: Command paths (e.g. `settings notifications`) whose every invocation is profiled.
+
+        interval: How many seconds of profiles are aggregated into each file.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        sample_rate: int = 100,
+        commands: Iterable[str] = (),
+        interval: float = 60,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.commands = set(commands)
+        self.interval = interval
+        self._requests = itertools.count()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._aggregates: dict[tuple[str, str], _Aggregate] = {}
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _after_fork(self) -> None:
+        # The parent writes the profiles it aggregated, the child starts a window and a writer thread of its own
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._aggregates = {}
+        self._closed = threading.Event()
+        self._thread = None
+
+    def begin(self) -> None:
+        """Called at the start of every request, starts profiling it if it is sampled."""
+        if self.sample_rate and next(self._requests) % self.sample_rate == 0:
+            self._enable()
+
+    def begin_handler(self, interaction: Any) -> None:
+        """Called before running a handler, starts profiling if the request isn't already and the command is listed."""
+        if (
+            self.commands
+            and getattr(self._local, "profile", None) is None
+            and instrumentation.command_path(interaction) in self.commands
+        ):
+            self._enable()
+
+    def _enable(self):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already active on this thread
+            return
+        self._local.profile = profile
+
+    def end(self, timer: instrumentation.StageTimer) -> None:
+        """Called at the end of every request, adds its profile (if any) to the aggregate for its command."""
+        profile = getattr(self._local, "profile", None)
+        if profile is None:
+            return
+        profile.disable()
+        self._local.profile = None
+
+        key = (timer.tags["interaction_type"], timer.tags["command"])
+        with self._lock:
+            aggregate = self._aggregates.get(key)
+            if aggregate is None:
+                aggregate = self._aggregates[key] = _Aggregate()
+            if aggregate.stats is None:
+                aggregate.stats = pstats.Stats(profile)
+            else:
+                aggregate.stats.add(profile)
+            aggregate.count += 1
+            for stage, seconds in timer.stages:
+                aggregate.stages[stage] = aggregate.stages.get(stage, 0.0) + seconds
+            aggregate.stages["total"] = aggregate.stages.get("total", 0.0) + (
+                time.perf_counter() - timer.start
+            )
+
+        if self._thread is None:
+            self._start_thread()
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="discord-profiler", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        # Writing the files is left to this thread, rather than whichever request ends the window
+        while not self._closed.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to write profiles")
+
+    def flush(self) -> list[str]:
+        """Write out the profiles aggregated so far, and start a new window.
+
+        Returns
+            The paths of the `.prof` files written.
+        """
+        with self._lock:
+            aggregates, self._aggregates = self._aggregates, {}
+        if not aggregates:
+            return []
+
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        paths = []
+        for (interaction_type, command), aggregate in aggregates.items():
+            assert aggregate.stats is not None
+            name = "-".join(filter(None, (interaction_type, _slug(command), stamp)))
+            path = os.path.join(self.directory, name + ".prof")
+            aggregate.stats.dump_stats(path)
+            with open(
+                os.path.join(self.directory, name + ".json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump(
+                    {
+                        "interaction_type": interaction_type,
+                        "command": command,
+                        "requests": aggregate.count,
+                        "mean_stage_seconds": {
+                            stage: seconds / aggregate.count
+                            for stage, seconds in aggregate.stages.items()
+                        },
+                    },
+                    f,
+                    indent=2,
+                )
+            paths.append(path)
+        if paths:
+            logger.info("Wrote %d profiles to %s", len(paths), self.directory)
+        return paths
+
+    def close(self) -> list[str]:
+        """Stop the writer thread, and write out the profiles aggregated so far.
+
+        Returns
+            The paths of the `.prof` files written.
+        """
+        self._closed.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+        return self.flush()
+
+
+def _slug(command: str) -> str:
+    return re.sub(r"[^\w-]+", "_", command)
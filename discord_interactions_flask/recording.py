@@ -0,0 +1,339 @@
+"""Capturing the interactions an app receives, and replaying them against another deployment.
+
+Setting `DISCORD_RECORD_DIR` makes the interactions endpoint hand every request whose signature checked out to a
+:class:`Recorder`: the raw body, when it arrived, how long it took, and the status and size of the response. A
+background thread appends them to gzipped JSON lines files in that directory, starting a new file every
+`DISCORD_RECORD_MAX_BYTES` and keeping the latest `DISCORD_RECORD_MAX_FILES` of them. Request threads only put the
+record on a queue, and if the writer can't keep up records are dropped rather than slowing requests down.
+
+The recording can then be sent to a staging app, re-signed with the key it is configured with, at the pace it was
+recorded or faster:
+
+.. code-block:: console
+
+    $ python -m discord_interactions_flask.recording recordings/ http://staging:5000/discord/interactions \\
+        --seed <DISCORD_LOADGEN_SEED> --speed 10
+
+Recordings hold everything Discord sent, user ids, message contents and interaction tokens included, so treat them
+like the production data they are.
+"""
+import argparse
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from typing import IO, Iterable, Iterator, Optional
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask import forking
+from discord_interactions_flask import loadgen
+
+logger = logging.getLogger(__name__)
+
+# Stops the writer thread
+_CLOSE = object()
+
+# Numbers the files written by this process, so that names never repeat
+_sequence = itertools.count()
+
+
+class Recorder:
+    """Appends records of interactions to rotating, gzipped JSON lines files from a background thread.
+
+    Args
+        directory: Where the recordings are written, created if it doesn't exist.
+
+        max_bytes: Start a new file once this many (uncompressed) bytes were written to the current one.
+
+        max_files: How many of the files written by this process to keep, the oldest ones are deleted.
+
+        queue_size: How many records can wait to be written before new ones are dropped.
+
+        flush_interval: Seconds between flushes of the current file, so that it can be read while being written.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_files: int = 10,
+        queue_size: int = 10000,
+        flush_interval: float = 1.0,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._files: list[str] = []
+        self._file: Optional[IO[bytes]] = None
+        self._written = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _after_fork(self) -> None:
+        # The queued records and the current file are the parent's. The child writes its own files, named with its
+        # pid, from a new writer thread.
+        if self._file is not None:
+            forking.detach(self._file)
+        self._file = None
+        self._files = []
+        self._written = 0
+        self._queue = queue.Queue(self._queue.maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.recorded = 0
+        self.dropped = 0
+
+    def record(
+        self,
+        body: bytes,
+        received: float,
+        duration: float,
+        status: int,
+        response_bytes: Optional[int],
+    ) -> None:
+        """Queue a record for writing, without blocking. Called from request threads.
+
+        Args
+            body: The raw request body.
+
+            received: When the request arrived, as a UNIX timestamp.
+
+            duration: Seconds taken to handle it.
+
+            status: The status code of the response.
+
+            response_bytes: The size of the response body, if known.
+        """
+        if self._thread is None:
+            self._start_thread()
+        try:
+            self._queue.put_nowait((body, received, duration, status, response_bytes))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="discord-recorder", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+            if item is _CLOSE:
+                self._close_file()
+                return
+            if item is not None:
+                try:
+                    self._write(*item)
+                except Exception:
+                    logger.exception("Failed to write an interaction recording")
+            if self._file is not None and (
+                item is None or time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self._file.flush()
+                last_flush = time.monotonic()
+
+    def _write(self, body, received, duration, status, response_bytes):
+        line = (
+            json.dumps(
+                {
+                    "received": received,
+                    "duration": duration,
+                    "status": status,
+                    "response_bytes": response_bytes,
+                    "body": body.decode("utf-8"),
+                },
+                separators=(",", ":"),
+            ).encode("utf-8")
+            + b"\n"
+        )
+        if self._file is None or self._written >= self.max_bytes:
+            self._rotate()
+        assert self._file is not None
+        self._file.write(line)
+        self._written += len(line)
+        with self._lock:
+            self.recorded += 1
+
+    def _rotate(self):
+        self._close_file()
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(
+            self.directory,
+            f"interactions-{stamp}-{os.getpid()}-{next(_sequence)}.jsonl.gz",
+        )
+        self._file = gzip.open(path, "wb")
+        self._written = 0
+        self._files.append(path)
+        while len(self._files) > self.max_files:
+            oldest = self._files.pop(0)
+            try:
+                os.unlink(oldest)
+            except FileNotFoundError:
+                pass
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """Write out every queued record, and close the current file."""
+        with self._lock:
+            thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_CLOSE)
+        thread.join()
+        with self._lock:
+            self._thread = None
+
+
+def read(directory: str) -> Iterator[dict]:
+    """Every record in the recordings in `directory`, in the order they were received.
+
+    Files written by several worker processes are merged. A file still being written, or cut short, is read up to the
+    last complete record.
+    """
+    paths = sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith("interactions-") and name.endswith(".jsonl.gz")
+    )
+    return heapq.merge(
+        *(_read_file(path) for path in paths), key=lambda record: record["received"]
+    )
+
+
+def _read_file(path: str) -> Iterator[dict]:
+    try:
+        with gzip.open(path, "rb") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A partially written last line
+                    return
+    except (EOFError, gzip.BadGzipFile, OSError) as e:
+        if not isinstance(e, EOFError):
+            logger.warning("Stopped reading %s: %s", path, e)
+
+
+def kind(body: dict) -> str:
+    """A label for a recorded interaction in replay reports: its type, and the command name if it has one."""
+    try:
+        label = types.InteractionType(body.get("type")).name
+    except ValueError:
+        label = str(body.get("type"))
+    name = (body.get("data") or {}).get("name")
+    return f"{label} {name}" if name else label
+
+
+def replay(
+    records: Iterable[dict],
+    url: str,
+    key,
+    speed: float = 1.0,
+    concurrency: int = 8,
+    timeout: float = 10.0,
+) -> loadgen.Report:
+    """Re-sign recorded interactions with `key` and send them to `url`, keeping their original spacing.
+
+    Args
+        records: From :func:`read`.
+
+        url: The interactions endpoint of the app to replay against.
+
+        key: The :class:`nacl.signing.SigningKey` matching that app's `DISCORD_PUBLIC_KEY`, see :func:`loadgen.generate_key <discord_interactions_flask.loadgen.generate_key>`.
+
+        speed: How many times faster than recorded to send them, `0` for as fast as possible.
+
+        concurrency: The number of requests in flight at most.
+
+        timeout: Seconds to wait for each response.
+
+    Returns
+        The latencies, measured from when each request was due, by interaction type and command.
+    """
+    requests = []
+    offsets = []
+    first = None
+    for record in records:
+        body = record["body"].encode("utf-8")
+        headers = loadgen.sign(body, key)
+        headers["Content-Type"] = "application/json"
+        requests.append((kind(json.loads(body)), body, headers))
+        if first is None:
+            first = record["received"]
+        offsets.append((record["received"] - first) / speed if speed else 0.0)
+    if not requests:
+        return loadgen.Report()
+    return loadgen.drive(
+        url,
+        requests,
+        concurrency=concurrency,
+        duration=None,
+        timeout=timeout,
+        offsets=offsets,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m discord_interactions_flask.recording",
+        description="Replay recorded interactions against an app.",
+    )
+    parser.add_argument("directory", help="The DISCORD_RECORD_DIR of the recording")
+    parser.add_argument("url", help="The interactions endpoint to replay against")
+    parser.add_argument(
+        "--seed",
+        default=os.environ.get("DISCORD_LOADGEN_SEED"),
+        help="Seed of the key the app is configured with, see `python -m discord_interactions_flask.loadgen key`",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="How many times faster than recorded, 0 for as fast as possible",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--json", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+    if not args.seed:
+        parser.error("--seed is needed to sign the requests")
+
+    report = replay(
+        read(args.directory),
+        args.url,
+        loadgen.generate_key(args.seed),
+        args.speed,
+        args.concurrency,
+    )
+    print(report.format())
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report.summary(), f, indent=2)
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Copy-on-write mappings for state that is read on every request and rarely written.
+
+Request threads look commands up without taking any lock. Writers build a modified copy of the current snapshot
+and publish it with a single attribute assignment, so a reader sees either the state before a change or after it,
+never a half applied one.
+"""
+from collections.abc import Iterator, Mapping, MutableMapping
+from contextlib import contextmanager
+import threading
+from typing import Generic, Optional, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class Registry(MutableMapping, Generic[K, V]):
+    """A mapping whose every write replaces the whole underlying dict.
+
+    Reads go straight to the current snapshot. Writes are serialized with a lock, and each one copies the snapshot,
+    so they cost O(n): this is meant for registries that are read far more often than they change.
+
+    .. code-block:: python
+
+        registry = Registry()
+        registry["ping"] = ping
+
+        # Several changes published at once
+        with registry.edit() as data:
+            data["pong"] = pong
+            del data["ping"]
+
+    Args
+        initial: The starting contents.
+    """
+
+    def __init__(self, initial: Optional[Mapping[K, V]] = None):
+        self._data: dict[K, V] = dict(initial or {})
+        self._lock = threading.Lock()
+
+    def _after_fork(self) -> None:
+        # A writer in another thread of the parent may have held the lock
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: K) -> V:
+        return self._data[key]
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._data)
+
+    # The views of the current snapshot, rather than the Mapping defaults that look each key up again and could
+    # straddle a write
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return self._data.items()
+
+    def values(self):
+        return self._data.values()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def snapshot(self) -> Mapping[K, V]:
+        """The current contents. It is never modified, later writes replace it."""
+        return self._data
+
+    @contextmanager
+    def edit(self) -> Iterator[dict[K, V]]:
+        """Modify a copy of the current contents, and publish it when the block exits without an exception.
+
+        Other writers wait until the block exits, so reading and then writing inside it is safe.
+        """
+        with self._lock:
+            data = dict(self._data)
+            yield data
+            self._data = data
+
+    def replace(self, data: Mapping[K, V]) -> None:
+        """Swap the contents for `data` entirely."""
+        with self._lock:
+            self._data = dict(data)
+
+    def __setitem__(self, key: K, value: V) -> None:
+        with self.edit() as data:
+            data[key] = value
+
+    def __delitem__(self, key: K) -> None:
+        with self.edit() as data:
+            del data[key]
+
+    def update(self, *args, **kwargs) -> None:
+        with self.edit() as data:
+            data.update(*args, **kwargs)
+
+    def clear(self) -> None:
+        self.replace({})
@@ -0,0 +1,442 @@
+"""A client for the Discord REST API that respects its rate limits.
+
+Discord reports the state of the rate limit bucket a request counted against in the `X-RateLimit-*` headers of the
+response. :class:`RestClient` remembers how many requests each route has left, and holds back requests that would
+exceed that until the bucket resets, rather than sending them and getting a 429. If a 429 happens anyway (another process sharing the limit, a global limit) the request is
+retried after the `Retry-After` Discord asked for.
+
+Every request has a connect and read timeout, and each class of endpoint (commands, OAuth2, webhooks, ...) has a
+:class:`CircuitBreaker`. When Discord keeps failing or timing out, the breaker opens and requests fail immediately
+with :class:`~discord_interactions_flask.errors.CircuitOpenError` instead of tying up workers, until a trial request
+after the cooldown succeeds.
+
+https://discord.com/developers/docs/topics/rate-limits
+"""
+from dataclasses import dataclass, field
+import http
+import json
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Optional, Union
+from urllib.parse import urlsplit
+
+import urllib3
+
+from discord_interactions_flask import errors
+from discord_interactions_flask.auth import TokenManager
+
+logger = logging.getLogger(__name__)
+
+# Path segments whose following id is a "major parameter", which Discord rate limits separately
+MAJOR_PARAMETERS = frozenset(("channels", "guilds", "webhooks"))
+SNOWFLAKE = re.compile(r"^\d+$")
+
+RETRY_STATUSES = frozenset(
+    (
+        http.HTTPStatus.BAD_GATEWAY,
+        http.HTTPStatus.SERVICE_UNAVAILABLE,
+        http.HTTPStatus.GATEWAY_TIMEOUT,
+    )
+)
+
+# Endpoint classes, in the order they are looked for in the path. Anything else is classed by its first segment
+ENDPOINT_CLASSES = ("oauth2", "webhooks", "interactions", "commands")
+
+DEFAULT_TIMEOUT = urllib3.Timeout(connect=5, read=15)
+
+# Connection errors are retried by urllib3, responses are left for RestClient to deal with
+URLLIB3_RETRIES = urllib3.Retry(
+    total=3, read=0, status=0, redirect=0, respect_retry_after_header=False
+)
+
+
+def route_key(method: str, url: str) -> str:
+    """Reduce a request to the route it is rate limited under, e.g. `PATCH /applications/:id/guilds/123/commands/:id`."""
+    segments = urlsplit(url).path.split("/")
+    for i, segment in enumerate(segments):
+        if (
+            SNOWFLAKE.match(segment)
+            and (i == 0 or segments[i - 1] not in MAJOR_PARAMETERS)
+            # Webhook tokens are major parameters too
+            and not (i >= 2 and segments[i - 2] == "webhooks")
+        ):
+            segments[i] = ":id"
+    return f"{method} {'/'.join(segments)}"
+
+
+def endpoint_class(url: str) -> str:
+    """The class of endpoint a request belongs to, which shares a circuit breaker, e.g. `commands` or `oauth2`."""
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    for name in ENDPOINT_CLASSES:
+        if name in segments:
+            return name
+    # Skip the /api/v10 prefix
+    while segments and (segments[0] == "api" or segments[0].startswith("v")):
+        segments.pop(0)
+    return segments[0] if segments else ""
+
+
+class CircuitBreaker:
+    """Stops sending requests to an endpoint that keeps failing.
+
+    The breaker starts closed. After `failure_threshold` consecutive failures it opens, and :meth:`allow` refuses every
+    request for `reset_timeout` seconds. After that it is half open: a single trial request is let through, which
+    closes the breaker if it succeeds and opens it again if it fails.
+
+    Args
+        failure_threshold: How many consecutive failures open the breaker.
+
+        reset_timeout: How many seconds to wait before letting a trial request through.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now. When half open, only the first caller is allowed."""
+        if self.state == self.CLOSED:
+            return True
+        with self._lock:
+            if self.state == self.OPEN and self.retry_after() == 0:
+                self.state = self.HALF_OPEN
+                return True
+            return self.state == self.CLOSED
+
+    def retry_after(self) -> float:
+        """Seconds until the breaker lets a trial request through."""
+        return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+
+    def record_success(self):
+        if self.state == self.CLOSED and not self.failures:
+            return
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("Circuit closed again")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+@dataclass
+class Bucket:
+    """What is known about the rate limit of one route."""
+
+    id: Optional[str] = None
+    limit: Optional[int] = None
+    remaining: Optional[int] = None
+    reset_at: float = 0.0
+    # Until the first response tells us the limit, one request at a time is sent to find out
+    known: bool = False
+    probing: bool = False
+    # Requests sent but not yet answered, which the remaining count in the next response won't include yet
+    inflight: int = 0
+    condition: threading.Condition = field(default_factory=threading.Condition)
+
+
+class RestClient:
+    """Sends requests to the Discord API through a shared :class:`urllib3.PoolManager`.
+
+    Args
+        http: The connection pool to send requests with.
+
+        tokens: Supplies the `Authorization` header. If Discord rejects the token with a 401 it is refreshed and the request retried once.
+
+        max_retries: How many times to retry a request that was rate limited or failed with a 502, 503, or 504.
+
+        backoff: The base number of seconds for the jittered exponential backoff between retries of failed requests.
+
+        timeout: The default connect and read timeout of every request, a :class:`urllib3.Timeout` or number of seconds.
+
+        failure_threshold: How many consecutive failures (5xx responses, timeouts, connection errors) of a class of endpoint open its :class:`CircuitBreaker`.
+
+        reset_timeout: How many seconds an open breaker waits before letting a trial request through.
+    """
+
+    def __init__(
+        self,
+        http: urllib3.PoolManager,
+        tokens: Optional[TokenManager] = None,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        timeout: Union[urllib3.Timeout, float] = DEFAULT_TIMEOUT,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.http = http
+        self.tokens = tokens
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets: dict[str, Bucket] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._global_reset_at = 0.0
+        self.stats = {
+            "requests": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failures": 0,
+            "rejected": 0,
+        }
+
+    def _after_fork(self) -> None:
+        # Buckets count the requests in flight on the parent's threads, and they and the breakers hold locks those
+        # threads may have held. The child learns the rate limits again from its first responses.
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._breakers = {}
+        self.stats = dict.fromkeys(self.stats, 0)
+
+    def request(
+        self, method: str, url: str, *, authenticate: bool = True, **kwargs
+    ) -> urllib3.HTTPResponse:
+        """Send a request, waiting for its rate limit bucket if needed.
+
+        Args
+            method: The HTTP method.
+
+            url: The full URL to request.
+
+            authenticate: Whether to send the `Authorization` header from `tokens`.
+
+            kwargs: Passed on to :meth:`urllib3.PoolManager.request`.
+
+        Raises
+            CircuitOpenError: If the endpoint has been failing and its circuit breaker is open.
+
+            DiscordApiError: If the request timed out or could not connect.
+        """
+        bucket = self._bucket(route_key(method, url))
+        breaker = self._breaker(endpoint_class(url))
+        headers = dict(kwargs.pop("headers", None) or {})
+        kwargs.setdefault("retries", URLLIB3_RETRIES)
+        kwargs.setdefault("timeout", self.timeout)
+        if "body" in kwargs:
+            headers.setdefault("Content-Type", "application/json")
+
+        reauthenticated = False
+        attempt = 0
+        authorization = ""
+        while True:
+            if authenticate and self.tokens is not None:
+                authorization = self.tokens.authorization()
+                headers["Authorization"] = authorization
+            if not breaker.allow():
+                self.stats["rejected"] += 1
+                raise errors.CircuitOpenError(bucket.id, breaker.retry_after())
+
+            resp = None
+            try:
+                self._acquire(bucket)
+                try:
+                    resp = self.http.request(method, url, headers=headers, **kwargs)
+                finally:
+                    self._update(bucket, resp)
+            except urllib3.exceptions.HTTPError as e:
+                self.stats["failures"] += 1
+                breaker.record_failure()
+                raise errors.DiscordApiError(f"{bucket.id} failed: {e}") from e
+            except BaseException:
+                # A half open breaker waits for its trial request to report back, however it ends
+                breaker.record_failure()
+                raise
+            self.stats["requests"] += 1
+            if resp.status >= http.HTTPStatus.INTERNAL_SERVER_ERROR:
+                self.stats["failures"] += 1
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            if (
+                resp.status == http.HTTPStatus.UNAUTHORIZED
+                and authenticate
+                and self.tokens is not None
+                and not reauthenticated
+            ):
+                logger.info("Discord rejected the token, refreshing it")
+                self.tokens.invalidate(authorization)
+                reauthenticated = True
+                continue
+
+            if attempt >= self.max_retries:
+                return resp
+
+            if resp.status == http.HTTPStatus.TOO_MANY_REQUESTS:
+                # _update recorded the Retry-After, and the next _acquire waits it out
+                self.stats["rate_limited"] += 1
+                delay = 0.0
+                logger.warning("Rate limited on %s, retrying", bucket.id)
+            elif resp.status in RETRY_STATUSES:
+                delay = random.uniform(0, self.backoff * 2**attempt)
+                logger.warning(
+                    "%s failed with %s, retrying in %.2fs",
+                    bucket.id,
+                    resp.status,
+                    delay,
+                )
+            else:
+                return resp
+
+            attempt += 1
+            self.stats["retries"] += 1
+            if delay:
+                time.sleep(delay)
+
+    def _bucket(self, route: str) -> Bucket:
+        bucket = self._buckets.get(route)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.setdefault(route, Bucket(id=route))
+        return bucket
+
+    def _breaker(self, name: str) -> CircuitBreaker:
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    name,
+                    CircuitBreaker(
+                        self.failure_threshold, self.reset_timeout, self.clock
+                    ),
+                )
+        return breaker
+
+    def _acquire(self, bucket: Bucket):
+        """Wait until a request can be made without exceeding a known limit, and reserve it."""
+        delay = self._global_reset_at - self.clock()
+        if delay > 0:
+            time.sleep(delay)
+
+        with bucket.condition:
+            while True:
+                if bucket.probing:
+                    bucket.condition.wait(1)
+                elif bucket.remaining is None:
+                    if not bucket.known:
+                        bucket.probing = True
+                    break
+                elif bucket.remaining > 0:
+                    bucket.remaining -= 1
+                    break
+                elif (delay := bucket.reset_at - self.clock()) > 0:
+                    bucket.condition.wait(delay)
+                else:
+                    # The window has passed, send one request to learn the state of the new one
+                    bucket.remaining = None
+                    bucket.known = False
+            bucket.inflight += 1
+
+    def _update(self, bucket: Bucket, resp: Optional[urllib3.HTTPResponse]):
+        with bucket.condition:
+            bucket.inflight -= 1
+            bucket.probing = False
+            bucket.condition.notify_all()
+            if resp is None:
+                return
+            bucket.known = True
+
+            headers = resp.headers
+            now = self.clock()
+            if resp.status == http.HTTPStatus.TOO_MANY_REQUESTS:
+                retry_after = self._retry_after(resp)
+                if (
+                    headers.get("X-RateLimit-Global")
+                    or headers.get("X-RateLimit-Scope") == "global"
+                ):
+                    self._global_reset_at = now + retry_after
+                else:
+                    bucket.remaining = 0
+                    bucket.reset_at = now + retry_after
+                return
+
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            if remaining is None or reset_after is None:
+                return
+
+            bucket.id = headers.get("X-RateLimit-Bucket", bucket.id)
+            limit = headers.get("X-RateLimit-Limit")
+            if limit is not None:
+                bucket.limit = int(limit)
+            reset_at = now + float(reset_after)
+            available = int(remaining) - bucket.inflight
+            if bucket.remaining is None or reset_at > bucket.reset_at + 0.001:
+                # A new window
+                bucket.remaining = max(0, available)
+            else:
+                # Responses from the same window can arrive out of order, the lowest count is the latest one
+                bucket.remaining = max(0, min(bucket.remaining, available))
+            bucket.reset_at = reset_at
+
+    def _retry_after(self, resp: urllib3.HTTPResponse) -> float:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after is None:
+            try:
+                retry_after = json.loads(resp.data.decode("utf-8"))["retry_after"]
+            except (ValueError, KeyError, TypeError):
+                retry_after = 1
+        # A little jitter so that everything waiting on the same limit doesn't retry at the same instant
+        return float(retry_after) + random.uniform(0, 0.05)
+
+    def bucket_state(self) -> dict[str, dict]:
+        """Get a snapshot of the rate limit of every route that has been requested, keyed by route.
+
+        Each entry has the Discord `bucket` id, the `limit` and `remaining` requests, and the seconds until it resets (`reset_after`).
+        """
+        now = self.clock()
+        return {
+            route: {
+                "bucket": bucket.id,
+                "limit": bucket.limit,
+                "remaining": bucket.remaining,
+                "reset_after": max(0.0, bucket.reset_at - now),
+            }
+            for route, bucket in list(self._buckets.items())
+        }
+
+    def breaker_state(self) -> dict[str, dict]:
+        """Get a snapshot of the circuit breaker of every endpoint class that has been requested.
+
+        Each entry has the `state` (`closed`, `open`, or `half_open`), the number of consecutive `failures`, and the
+        seconds until an open breaker lets a trial request through (`retry_after`).
+        """
+        return {
+            name: {
+                "state": breaker.state,
+                "failures": breaker.failures,
+                "retry_after": breaker.retry_after()
+                if breaker.state == CircuitBreaker.OPEN
+                else 0.0,
+            }
+            for name, breaker in list(self._breakers.items())
+        }
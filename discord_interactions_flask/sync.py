@@ -0,0 +1,320 @@
+"""Diff based syncing of :class:`~discord_interactions_flask.command.Command` s with Discord.
+
+Rather than overwriting every command on every boot, the commands registered with Discord are compared to the
+local ones using a hash of their canonical spec, and only the commands that were actually added, changed, or
+removed are sent. The hashes that were last synced can be kept in a local file so that a deploy that didn't change
+any commands doesn't need to talk to Discord at all.
+
+That same file, the command manifest, maps the ids Discord assigned to each command back to the local command. It
+lets a worker fill in :attr:`~discord_interactions_flask.discord.Discord.runtime_commands` on boot without syncing.
+"""
+from dataclasses import dataclass, field
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any, Iterable, Optional
+
+from discord_interactions_flask.command import Command
+from discord_interactions_flask.discord_types import CommandType
+
+logger = logging.getLogger(__name__)
+
+# The parts of an application command that we control, everything else Discord sends back (ids, versions, etc) is ignored
+COMMAND_FIELDS = frozenset(
+    (
+        "name",
+        "type",
+        "description",
+        "options",
+        "name_localizations",
+        "description_localizations",
+        "default_member_permissions",
+        "dm_permission",
+    )
+)
+
+# Values that Discord fills in when they are omitted, dropped so that an omitted value and its default compare equal
+COMMAND_DEFAULTS: dict[str, Any] = {"dm_permission": True}
+OPTION_DEFAULTS: dict[str, Any] = {"required": False, "autocomplete": False}
+
+
+def _compact(obj: Any, defaults: dict[str, Any]) -> Any:
+    if isinstance(obj, dict):
+        compacted = {}
+        for key, value in obj.items():
+            value = _compact(value, OPTION_DEFAULTS)
+            if value is None or value == "" or value == [] or value == {}:
+                continue
+            if key in defaults and value == defaults[key]:
+                continue
+            compacted[key] = value
+        return compacted
+    elif isinstance(obj, list):
+        return [_compact(value, OPTION_DEFAULTS) for value in obj]
+    return obj
+
+
+def canonical_spec(spec: dict) -> dict:
+    """Normalize a command spec, either one produced locally or one sent back by Discord, so that equivalent commands compare equal."""
+    spec = {k: v for k, v in spec.items() if k in COMMAND_FIELDS}
+    spec.setdefault("type", CommandType.CHAT)
+    return _compact(spec, COMMAND_DEFAULTS)
+
+
+def canonical_bytes(spec: dict) -> bytes:
+    """Serialize a spec to a stable byte representation."""
+    return json.dumps(
+        canonical_spec(spec), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def spec_hash(spec: dict) -> str:
+    """Get a stable content hash of a command spec."""
+    return hashlib.sha256(canonical_bytes(spec)).hexdigest()
+
+
+def command_path(spec: dict) -> str:
+    """Identify a command within a guild as `type:name`. Discord allows commands of different types to share a name."""
+    return f"{int(spec.get('type') or CommandType.CHAT)}:{spec['name']}"
+
+
+def commands_hash(hashes: Iterable[str]) -> str:
+    """Combine the hashes of each command into a single hash for a set of commands."""
+    return hashlib.sha256("".join(sorted(hashes)).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SyncPlan:
+    """The requests needed to bring the commands registered with Discord in line with the local commands."""
+
+    create: list[Command] = field(default_factory=list)
+    edit: dict[str, Command] = field(default_factory=dict)
+    delete: list[str] = field(default_factory=list)
+    unchanged: dict[str, Command] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.create or self.edit or self.delete)
+
+
+def plan_sync(commands: Iterable[Command], remote: Iterable[dict]) -> SyncPlan:
+    """Compare local commands against those registered with Discord.
+
+    Args
+        commands: The local commands.
+
+        remote: The application command objects returned by Discord.
+    """
+    remote_by_path = {command_path(spec): spec for spec in remote}
+
+    plan = SyncPlan()
+    for command in commands:
+        existing = remote_by_path.pop(command_path(command.spec()), None)
+        if existing is None:
+            plan.create.append(command)
+        elif spec_hash(existing) == command.spec_hash():
+            plan.unchanged[existing["id"]] = command
+        else:
+            plan.edit[existing["id"]] = command
+
+    plan.delete = [spec["id"] for spec in remote_by_path.values()]
+    return plan
+
+
+class CommandManifest:
+    """The ids, paths, and spec hashes of the last successfully synced commands, persisted to a JSON file.
+
+    Args
+        path: Location of the file. If `None` nothing is persisted.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.guilds: dict[str, dict] = {}
+        if path:
+            self.load()
+
+    @staticmethod
+    def _guild_key(guild_id: Optional[str]) -> str:
+        return guild_id or "global"
+
+    def load(self) -> None:
+        """Read the manifest from disk. A missing or unreadable file is treated as an empty manifest."""
+        if not self.path:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.guilds = json.load(f)
+        except FileNotFoundError:
+            self.guilds = {}
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable command manifest %s", self.path)
+            self.guilds = {}
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".commands-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.guilds, f, sort_keys=True, indent=2)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    @property
+    def generation_path(self) -> Optional[str]:
+        """A counter file next to the manifest, bumped whenever commands change at runtime so other workers notice."""
+        return self.path + ".generation" if self.path else None
+
+    def generation(self) -> int:
+        """Read the current generation, 0 if it was never bumped."""
+        if not self.generation_path:
+            return 0
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def bump_generation(self) -> int:
+        """Atomically increment the generation. Call while holding the manifest lock."""
+        generation = self.generation() + 1
+        if not self.generation_path:
+            return generation
+        directory = os.path.dirname(os.path.abspath(self.generation_path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".commands-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(str(generation))
+            os.replace(tmp, self.generation_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return generation
+
+    def get(self, guild_id: Optional[str]) -> Optional[dict]:
+        """Get the recorded state of a guild, `None` if it has never been synced."""
+        return self.guilds.get(self._guild_key(guild_id))
+
+    def update(self, guild_id: Optional[str], ids: dict[str, Command]) -> None:
+        """Record the full set of commands that are now registered with Discord for a guild.
+
+        Args
+            guild_id: The guild, or `None` for global commands.
+
+            ids: The Discord assigned id of each command.
+        """
+        self.guilds[self._guild_key(guild_id)] = {"hash": "", "commands": {}}
+        for command_id, command in ids.items():
+            self._record(guild_id, command_id, command)
+        self._rehash(guild_id)
+
+    def record(
+        self, guild_id: Optional[str], command_id: str, command: Command
+    ) -> None:
+        """Record a single command that was registered with Discord."""
+        self.guilds.setdefault(self._guild_key(guild_id), {"hash": "", "commands": {}})
+        self._record(guild_id, command_id, command)
+        self._rehash(guild_id)
+
+    def find(self, guild_id: Optional[str], path: str) -> Optional[tuple[str, dict]]:
+        """Find the recorded id and entry of a command by its :func:`command_path`."""
+        cached = self.get(guild_id)
+        if cached is None:
+            return None
+        for command_id, entry in cached["commands"].items():
+            if entry["path"] == path:
+                return command_id, entry
+        return None
+
+    def forget(self, guild_id: Optional[str], command_id: str) -> None:
+        """Remove a single command that was deleted from Discord."""
+        cached = self.get(guild_id)
+        if cached is not None and cached["commands"].pop(command_id, None):
+            self._rehash(guild_id)
+
+    def _record(self, guild_id: Optional[str], command_id: str, command: Command):
+        self.guilds[self._guild_key(guild_id)]["commands"][command_id] = {
+            "path": command_path(command.spec()),
+            "hash": command.spec_hash(),
+        }
+
+    def _rehash(self, guild_id: Optional[str]):
+        cached = self.guilds[self._guild_key(guild_id)]
+        cached["hash"] = commands_hash(
+            entry["hash"] for entry in cached["commands"].values()
+        )
+
+    def resolve(
+        self, guild_id: Optional[str], commands: Iterable[Command]
+    ) -> Optional[dict[str, Command]]:
+        """Map the recorded command ids to local commands, if the recorded state matches them exactly.
+
+        Returns
+            The command id -> :class:`Command` mapping, or `None` if the commands have changed since they were synced.
+        """
+        cached = self.get(guild_id)
+        if cached is None:
+            return None
+
+        by_path = {}
+        hashes = []
+        for command in commands:
+            hashes.append(command.spec_hash())
+            by_path[command_path(command.spec())] = command
+
+        if commands_hash(hashes) != cached["hash"]:
+            return None
+
+        ids = {}
+        for command_id, entry in cached["commands"].items():
+            command = by_path.get(entry["path"])
+            if command is None:
+                return None
+            ids[command_id] = command
+        return ids
+
+    def runtime_commands(
+        self, guild_id: Optional[str], commands: Iterable[Command]
+    ) -> dict[str, Command]:
+        """Map the recorded command ids to whichever local commands still match what was synced.
+
+        Unlike :meth:`resolve` this works command by command, a local command that was changed or added since the last
+        sync is left out (and logged) rather than invalidating the whole guild.
+        """
+        cached = self.get(guild_id)
+        if cached is None:
+            return {}
+
+        by_path = {}
+        for command in commands:
+            by_path[command_path(command.spec())] = (command, command.spec_hash())
+
+        ids = {}
+        for command_id, entry in cached["commands"].items():
+            command, hash_ = by_path.pop(entry["path"], (None, None))
+            if command is None:
+                logger.warning(
+                    "Command %s in %s is registered with Discord but not defined",
+                    entry["path"],
+                    guild_id,
+                )
+            elif hash_ != entry["hash"]:
+                logger.warning(
+                    "Command %s in %s has changed since it was last synced",
+                    entry["path"],
+                    guild_id,
+                )
+            else:
+                ids[command_id] = command
+
+        for path in by_path:
+            logger.warning(
+                "Command %s in %s has not been synced with Discord", path, guild_id
+            )
+        return ids
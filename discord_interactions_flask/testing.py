@@ -0,0 +1,337 @@
+"""A local stand-in for the parts of the Discord API this extension talks to, for tests and benchmarks.
+
+:class:`FakeDiscordApi` runs an HTTP server in a background thread that implements the OAuth2 client credentials
+token, the application command endpoints (list, bulk overwrite, create, edit, delete), and the interaction webhooks
+(the initial response callback, and creating, fetching, editing and deleting follow-up messages). Latency, failures
+and Discord style rate limits can be injected.
+
+.. code-block:: python
+
+    with FakeDiscordApi() as api:
+        app = Flask(__name__)
+        app.config["DISCORD_PUBLIC_KEY"] = ...
+        api.configure(app)
+        discord.init_app(app)
+
+        assert api.commands[None]
+
+Point `DISCORD_API_URL` at :attr:`FakeDiscordApi.url`, which :meth:`FakeDiscordApi.configure` does, and every request
+:class:`~discord_interactions_flask.discord.Discord` makes goes to the fake instead of `discord.com`. It can also run
+on its own, for load testing an app in a separate process:
+
+.. code-block:: console
+
+    $ python -m discord_interactions_flask.testing --port 8081 --latency 0.05
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import re
+import threading
+import time
+from typing import Any, Optional
+
+COMMANDS_PATH = re.compile(
+    r"^/applications/(?P<app>[^/]+)(?:/guilds/(?P<guild>[^/]+))?/commands(?:/(?P<id>[^/]+))?$"
+)
+WEBHOOK_PATH = re.compile(
+    r"^/webhooks/(?P<app>[^/]+)/(?P<token>[^/]+)(?:/messages/(?P<id>[^/]+))?$"
+)
+CALLBACK_PATH = re.compile(r"^/interactions/(?P<id>[^/]+)/(?P<token>[^/]+)/callback$")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait on SYN retries
+    request_queue_size = 128
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up on us, which isn't worth a traceback
+        pass
+
+
+class FakeDiscordApi:
+    """An in-process fake of the Discord API, serving on a random local port until the `with` block exits.
+
+    Everything it received is kept in attributes that tests can inspect and modify: :attr:`commands` by guild
+    (`None` for global commands), follow-up :attr:`messages` and initial :attr:`callbacks` by interaction token, and
+    every request's method and path in :attr:`requests`.
+
+    Args
+        latency: Seconds to wait before answering any request.
+
+        host: The address to listen on.
+
+        port: The port to listen on, a free one by default.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        # Guilds whose command requests fail with a 500
+        self.failing_guilds: set[Optional[str]] = set()
+        # Failure injection for command and webhook requests: a status to answer every request with, and seconds to stall before answering
+        self.error_status: Optional[int] = None
+        self.stall = 0.0
+        self.commands: dict[Optional[str], dict[str, dict]] = {}
+        self.messages: dict[str, dict[str, dict]] = {}
+        self.callbacks: dict[str, dict] = {}
+        self.requests: list[tuple[str, str]] = []
+        self.tokens: set[str] = set()
+        self.token_expires_in = 604800
+        # (requests, seconds) allowed per method and guild or webhook, like Discord's per route buckets
+        self.rate_limit: Optional[tuple[int, float]] = None
+        self.rate_limited = 0
+        self._buckets: dict[str, tuple[int, float]] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.server = _Server((host, port), self._handler())
+        self.url = "http://%s:%d" % (host, self.server.server_address[1])
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    def __enter__(self) -> "FakeDiscordApi":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def configure(self, app) -> None:
+        """Point a :class:`flask.Flask` app's `DISCORD_API_URL` at this fake, and give it credentials if it has none."""
+        app.config["DISCORD_API_URL"] = self.url
+        app.config.setdefault("DISCORD_CLIENT_ID", "app")
+        app.config.setdefault("DISCORD_CLIENT_SECRET", "secret")
+
+    def revoke_tokens(self) -> None:
+        """Make every access token handed out so far invalid, as if they expired."""
+        self.tokens.clear()
+
+    def _id(self) -> str:
+        return str(next(self._ids))
+
+    def _registered(self, spec, app, guild):
+        registered = dict(spec, id=self._id(), application_id=app, version="1")
+        if guild:
+            registered["guild_id"] = guild
+        return registered
+
+    def handle(self, method: str, path: str, body: Any, headers) -> tuple:
+        """Answer a request, returning its status, JSON payload, and optionally headers."""
+        time.sleep(self.latency)
+        with self._lock:
+            self.requests.append((method, path))
+
+        if path == "/oauth2/token":
+            token = "token-%s" % self._id()
+            self.tokens.add("Bearer " + token)
+            return 200, {
+                "access_token": token,
+                "token_type": "Bearer",
+                "expires_in": self.token_expires_in,
+                "scope": "applications.commands.update",
+            }
+
+        # Interaction webhooks are authenticated by the token in their path
+        match = CALLBACK_PATH.match(path)
+        if match:
+            return self._limited(
+                method,
+                match["token"],
+                lambda: self._callback(method, match["id"], match["token"], body),
+            )
+        match = WEBHOOK_PATH.match(path)
+        if match:
+            return self._limited(
+                method,
+                match["token"],
+                lambda: self._webhook(
+                    method, match["app"], match["token"], match["id"], body
+                ),
+            )
+
+        if headers.get("Authorization") not in self.tokens:
+            return 401, {"message": "401: Unauthorized", "code": 0}
+
+        match = COMMANDS_PATH.match(path)
+        if not match:
+            return 404, {"message": "404: Not Found", "code": 0}
+
+        app, guild, command_id = match.group("app", "guild", "id")
+        if guild in self.failing_guilds:
+            return 500, {"message": "500: Internal Server Error", "code": 0}
+        return self._limited(
+            method, guild, lambda: self._commands(method, app, guild, command_id, body)
+        )
+
+    def _limited(self, method: str, major: Optional[str], answer) -> tuple:
+        """Apply the injected stall, errors, and rate limit to a request before answering it."""
+        if self.stall:
+            time.sleep(self.stall)
+        if self.error_status:
+            return self.error_status, {"message": "Injected failure", "code": 0}
+        if not self.rate_limit:
+            return answer()
+        limited, headers = self._check_rate_limit(method, major)
+        if limited:
+            return 429, limited, headers
+        status, payload = answer()
+        return status, payload, headers
+
+    def _check_rate_limit(self, method, major):
+        limit, window = self.rate_limit
+        bucket_id = "%s-%s" % (method, major)
+        now = time.monotonic()
+        with self._lock:
+            count, start = self._buckets.get(bucket_id, (0, now))
+            if now - start >= window:
+                count, start = 0, now
+            reset_after = window - (now - start)
+            headers = {
+                "X-RateLimit-Bucket": bucket_id,
+                "X-RateLimit-Limit": str(limit),
+                "X-RateLimit-Reset-After": "%.3f" % reset_after,
+            }
+            if count >= limit:
+                self.rate_limited += 1
+                headers["X-RateLimit-Remaining"] = "0"
+                headers["Retry-After"] = "%.3f" % reset_after
+                return {
+                    "message": "You are being rate limited.",
+                    "retry_after": reset_after,
+                    "global": False,
+                }, headers
+            self._buckets[bucket_id] = (count + 1, start)
+            headers["X-RateLimit-Remaining"] = str(limit - count - 1)
+            return None, headers
+
+    def _commands(self, method, app, guild, command_id, body):
+        with self._lock:
+            commands = self.commands.setdefault(guild, {})
+            if method == "GET" and command_id is None:
+                return 200, list(commands.values())
+            elif method == "PUT" and command_id is None:
+                commands.clear()
+                for spec in body:
+                    registered = self._registered(spec, app, guild)
+                    commands[registered["id"]] = registered
+                return 200, list(commands.values())
+            elif method == "POST" and command_id is None:
+                registered = self._registered(body, app, guild)
+                commands[registered["id"]] = registered
+                return 201, registered
+            elif method == "GET" and command_id in commands:
+                return 200, commands[command_id]
+            elif method == "PATCH" and command_id in commands:
+                commands[command_id].update(body)
+                return 200, commands[command_id]
+            elif method == "DELETE" and command_id in commands:
+                del commands[command_id]
+                return 204, None
+        return 404, {"message": "Unknown application command", "code": 10063}
+
+    def _callback(self, method, interaction_id, token, body):
+        if method != "POST":
+            return 405, {"message": "405: Method Not Allowed", "code": 0}
+        with self._lock:
+            if token in self.callbacks:
+                return 400, {
+                    "message": "Interaction has already been acknowledged.",
+                    "code": 40060,
+                }
+            self.callbacks[token] = dict(body or {}, interaction_id=interaction_id)
+            data = (body or {}).get("data") or {}
+            # The message sent by the initial response is the interaction's @original message
+            self.messages.setdefault(token, {})["@original"] = self._message(data)
+        return 204, None
+
+    def _message(self, data: dict) -> dict:
+        return dict(
+            data,
+            id=self._id(),
+            type=0,
+            timestamp=time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime()),
+        )
+
+    def _webhook(self, method, app, token, message_id, body):
+        with self._lock:
+            messages = self.messages.setdefault(token, {})
+            if method == "POST" and message_id is None:
+                message = self._message(body or {})
+                messages[message["id"]] = message
+                return 200, message
+            if message_id is None or message_id not in messages:
+                return 404, {"message": "Unknown Message", "code": 10008}
+            if method == "GET":
+                return 200, messages[message_id]
+            elif method == "PATCH":
+                messages[message_id].update(body or {})
+                return 200, messages[message_id]
+            elif method == "DELETE":
+                del messages[message_id]
+                return 204, None
+        return 405, {"message": "405: Method Not Allowed", "code": 0}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else None
+                except ValueError:
+                    body = None
+                status, payload, *headers = api.handle(
+                    self.command, self.path.split("?")[0], body, self.headers
+                )
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                for header, value in (headers[0] if headers else {}).items():
+                    self.send_header(header, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_PUT = do_POST = do_PATCH = do_DELETE = _respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m discord_interactions_flask.testing",
+        description="Serve a fake Discord API until interrupted.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds before each response"
+    )
+    parser.add_argument(
+        "--rate-limit",
+        help="REQUESTS/SECONDS allowed per route, e.g. 5/1",
+    )
+    args = parser.parse_args(argv)
+
+    with FakeDiscordApi(args.latency, args.host, args.port) as api:
+        if args.rate_limit:
+            requests, seconds = args.rate_limit.split("/")
+            api.rate_limit = (int(requests), float(seconds))
+        print(f"Serving a fake Discord API at {api.url}, set DISCORD_API_URL to it")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Warns about handlers that are getting close to Discord's deadline.
+
+Discord shows "The application did not respond" when it doesn't get a response to an interaction within 3 seconds.
+The :class:`Watchdog` notices handlers that run long while they are still running: once one passes the soft limit a
+warning with the command and the handler's current stack is logged, and handlers that end up past the hard limit are
+counted.
+
+All handlers are checked by a single background thread, so watching a handler costs two dict operations.
+"""
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Optional
+
+from discord_interactions_flask import instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+class Watchdog:
+    """Tracks how long each running handler has taken.
+
+    Args
+        soft_limit: Seconds after which a warning with the handler's stack is logged.
+
+        hard_limit: Seconds after which Discord has given up on the response. Handlers that take longer are counted in :attr:`deadline_misses`.
+
+        interval: How often the background thread checks the running handlers.
+    """
+
+    def __init__(
+        self, soft_limit: float = 2.0, hard_limit: float = 3.0, interval: float = 0.1
+    ):
+        self.soft_limit = soft_limit
+        self.hard_limit = hard_limit
+        self.interval = interval
+        self.slow_handlers = 0
+        self.deadline_misses = 0
+        # Thread ident -> [start, interaction, warned]
+        self._running: dict[int, list] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _after_fork(self) -> None:
+        # The checking thread didn't survive the fork, the next handler starts a new one
+        self._running = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, interaction: Any) -> None:
+        """Start watching the handler for `interaction`, which runs on the current thread."""
+        if self._thread is None:
+            self._start_thread()
+        self._running[threading.get_ident()] = [time.monotonic(), interaction, False]
+
+    def stop(self) -> None:
+        """Stop watching the handler running on the current thread."""
+        entry = self._running.pop(threading.get_ident(), None)
+        if entry is None:
+            return
+        elapsed = time.monotonic() - entry[0]
+        if elapsed > self.hard_limit:
+            with self._lock:
+                self.deadline_misses += 1
+            logger.error(
+                "%s took %.2fs, past Discord's %ss deadline",
+                _describe(entry[1]),
+                elapsed,
+                self.hard_limit,
+            )
+
+    def _start_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="discord-watchdog", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+
+    def check(self) -> None:
+        """Log a warning for every handler that passed the soft limit since the last check."""
+        now = time.monotonic()
+        for ident, entry in list(self._running.items()):
+            start, interaction, warned = entry
+            if warned or now - start < self.soft_limit:
+                continue
+            entry[2] = True
+            with self._lock:
+                self.slow_handlers += 1
+            frame = sys._current_frames().get(ident)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            logger.warning(
+                "%s has been running for %.2fs, Discord gives up after %ss\n%s",
+                _describe(interaction),
+                now - start,
+                self.hard_limit,
+                stack,
+            )
+
+
+def _describe(interaction: Any) -> str:
+    path = instrumentation.command_path(interaction)
+    return f"Handler for {path}" if path else "Handler"
@@ -0,0 +1,149 @@
+"""A bare WSGI application for the interactions endpoint, skipping Flask's request handling.
+
+The `/discord/interactions` view pays for a request context, URL routing, `request.json` and `jsonify` on every
+request, PINGs included. :meth:`Discord.wsgi_app <discord_interactions_flask.discord.Discord.wsgi_app>` returns an
+:class:`InteractionsApp` that reads the body once, checks the signature, dispatches the interaction to the same handlers
+with the same interaction objects, and writes the response bytes itself. Mount it in front of the Flask app with
+werkzeug's dispatcher middleware, which leaves every other route to Flask:
+
+.. code-block:: python
+
+    from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+    discord.init_app(app)
+    app.wsgi_app = DispatcherMiddleware(
+        app.wsgi_app, {"/discord/interactions": discord.wsgi_app(app)}
+    )
+
+Handlers run inside an app context, so `current_app` and `g.discord_interactions.ctx` work as they do in the view, but
+there is no request context: `flask.request`, `before_request` and `after_request` functions and the like aren't
+available. Timings, metrics, profiling, the watchdog and recording work the same on both paths.
+"""
+import http
+import json
+import logging
+import time
+from typing import TYPE_CHECKING, Callable, Iterable, Optional
+
+from flask import Flask
+from werkzeug.wsgi import get_input_stream
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask import instrumentation
+
+if TYPE_CHECKING:
+    from discord_interactions_flask.discord import Discord
+
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+TEXT = "text/plain; charset=utf-8"
+
+PONG = json.dumps({"type": types.InteractionCallbackType.PONG}).encode("utf-8")
+
+
+class InteractionsApp:
+    """Answers POSTs to the interactions endpoint of a :class:`~discord_interactions_flask.discord.Discord`, regardless of the path it is mounted at.
+
+    Args
+        discord: An instance that :meth:`~discord_interactions_flask.discord.Discord.init_app` was called with `app` on.
+
+        app: The app whose context handlers run in.
+    """
+
+    def __init__(self, discord: "Discord", app: Flask):
+        self.discord = discord
+        self.app = app
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        if environ["REQUEST_METHOD"] != "POST":
+            return _respond(
+                start_response,
+                http.HTTPStatus.METHOD_NOT_ALLOWED,
+                b"Method not allowed",
+                TEXT,
+                [("Allow", "POST")],
+            )
+
+        body = get_input_stream(environ).read()
+        signature = environ.get("HTTP_X_SIGNATURE_ED25519")
+        timestamp = environ.get("HTTP_X_SIGNATURE_TIMESTAMP")
+
+        received = time.time()
+        start = time.perf_counter()
+        try:
+            with self.app.app_context():
+                status, data, content_type = self.discord._measured(
+                    lambda timer: self._handle(body, signature, timestamp, timer)
+                )
+        except Exception:
+            logger.exception("Failed to handle an interaction")
+            status, data, content_type = (
+                http.HTTPStatus.INTERNAL_SERVER_ERROR,
+                b"Internal server error",
+                TEXT,
+            )
+
+        recorder = self.discord.recorder
+        # Only requests that really came from Discord
+        if recorder is not None and status != http.HTTPStatus.UNAUTHORIZED:
+            recorder.record(
+                body, received, time.perf_counter() - start, status, len(data)
+            )
+        return _respond(start_response, status, data, content_type)
+
+    def _handle(
+        self,
+        body: bytes,
+        signature: Optional[str],
+        timestamp: Optional[str],
+        timer: Optional[instrumentation.StageTimer],
+    ) -> tuple[int, bytes, str]:
+        discord = self.discord
+        if not discord._verified(body, signature, timestamp):
+            return http.HTTPStatus.UNAUTHORIZED, b"Bad request signature", TEXT
+        if timer:
+            timer.mark("verify")
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return http.HTTPStatus.BAD_REQUEST, b"Invalid JSON", TEXT
+        if timer:
+            timer.mark("parse")
+
+        if payload["type"] == types.InteractionType.PING:
+            if timer:
+                timer.tags["interaction_type"] = "PING"
+            return http.HTTPStatus.OK, PONG, JSON
+
+        dispatched = discord._dispatch(payload, timer)
+        if dispatched is None:
+            return http.HTTPStatus.NO_CONTENT, b"", TEXT
+        interaction, response = dispatched
+        discord._register_components(interaction, response, timer)
+
+        data = json.dumps(
+            response.dump(
+                use_enum_name=False, strip_privates=True, strip_properties=True
+            ),
+            separators=(",", ":"),
+        ).encode("utf-8")
+        if timer:
+            timer.mark("serialize")
+        return http.HTTPStatus.OK, data, JSON
+
+
+def _respond(
+    start_response: Callable,
+    status: int,
+    data: bytes,
+    content_type: str,
+    headers: Optional[list[tuple[str, str]]] = None,
+) -> list[bytes]:
+    start_response(
+        "%d %s" % (status, http.HTTPStatus(status).phrase),
+        [("Content-Type", content_type), ("Content-Length", str(len(data)))]
+        + (headers or []),
+    )
+    return [data]
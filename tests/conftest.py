@@ -1,12 +1,97 @@
+import json
+
+from flask import Flask
+from nacl.signing import SigningKey
 import pytest
 
+from discord_interactions_flask import Discord
+from discord_interactions_flask.command import ChatCommand
+from discord_interactions_flask.components import Button
+from discord_interactions_flask.helpers import content_response
+from discord_interactions_flask.instrumentation import TimingSink
 from discord_interactions_flask.interactions import ChatInteraction, ChatData
 from discord_interactions_flask.discord_types import (
+    ButtonStyle,
     InteractionType,
     CommandType,
     ApplicationCommandInteractionDataOption,
     ApplicationCommandOptionType,
 )
+from discord_interactions_flask.testing import FakeDiscordApi
+
+
+def make_app(api_url, **config):
+    app = Flask(__name__)
+    app.config["DISCORD_PUBLIC_KEY"] = "00" * 32
+    app.config["DISCORD_CLIENT_ID"] = "app"
+    app.config["DISCORD_CLIENT_SECRET"] = "secret"
+    app.config["DISCORD_API_URL"] = api_url
+    app.config.update(config)
+    return app
+
+
+def make_discord(guilds):
+    discord = Discord()
+    for guild_id in guilds:
+        discord.add_command(ChatCommand(name="ping", description="ping"), guild_id)
+    return discord
+
+
+def command_id(discord, command):
+    """The id Discord assigned to `command`."""
+    (command_id,) = [
+        command_id
+        for command_id, runtime_command in discord.runtime_commands.items()
+        if runtime_command is command
+    ]
+    return command_id
+
+
+def pong_handler(interaction):
+    return content_response("pong")
+
+
+def make_button(custom_id="button", handler=pong_handler):
+    return Button(
+        custom_id=custom_id,
+        label="label",
+        style=ButtonStyle.PRIMARY,
+        interaction_handler=handler,
+    )
+
+
+def signed_post(client, key, payload, path="/discord/interactions"):
+    body = json.dumps(payload).encode()
+    timestamp = "1700000000"
+    signature = key.sign(timestamp.encode() + body).signature.hex()
+    return client.post(
+        path,
+        data=body,
+        content_type="application/json",
+        headers={
+            "X-Signature-Ed25519": signature,
+            "X-Signature-Timestamp": timestamp,
+        },
+    )
+
+
+def chat_payload(command_id, name):
+    return {
+        "id": "interaction",
+        "application_id": "app",
+        "type": InteractionType.APPLICATION_COMMAND,
+        "token": "token",
+        "version": 1,
+        "data": {"id": command_id, "name": name, "type": CommandType.CHAT},
+    }
+
+
+class RecordingSink(TimingSink):
+    def __init__(self):
+        self.records = []
+
+    def record(self, stage, seconds, tags):
+        self.records.append((stage, seconds, dict(tags)))
 
 
 @pytest.fixture
@@ -61,3 +146,38 @@ def meta_group_interaction():
         guild_id="meta_chat_guild_id",
         channel_id="meta_chat_channel_id",
     )
+
+
+@pytest.fixture
+def fake_discord_api():
+    with FakeDiscordApi() as api:
+        yield api
+
+
+@pytest.fixture
+def signing_key():
+    return SigningKey.generate()
+
+
+@pytest.fixture
+def pong_app(fake_discord_api, signing_key):
+    """Makes an initialized app with a "pong" command, signed for with `signing_key` unless another `key` is given.
+
+    Returns
+        The app, its :class:`Discord` instance, and the id of the "pong" command.
+    """
+
+    def make(handler=pong_handler, key=signing_key, **config):
+        discord = make_discord([None])
+        command = ChatCommand(name="pong", description="pong")
+        command.handler(handler)
+        discord.add_command(command)
+        app = make_app(
+            fake_discord_api.url,
+            DISCORD_PUBLIC_KEY=key.verify_key.encode().hex(),
+            **config,
+        )
+        discord.init_app(app)
+        return app, discord, command_id(discord, command)
+
+    return make
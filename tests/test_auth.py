@@ -0,0 +1,96 @@
+import threading
+import time
+
+from discord_interactions_flask.auth import TokenManager
+from discord_interactions_flask.command import ChatCommand
+
+from tests.conftest import make_app, make_discord
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_manager(clock=time.monotonic, delay=0.0, expires_in=100):
+    fetches = []
+
+    def fetch():
+        fetches.append(None)
+        time.sleep(delay)
+        return {
+            "access_token": "token-%d" % len(fetches),
+            "token_type": "Bearer",
+            "expires_in": expires_in,
+        }
+
+    return TokenManager(fetch, refresh_margin=10, clock=clock), fetches
+
+
+def test_token_is_cached():
+    manager, fetches = make_manager()
+
+    assert manager.authorization() == "Bearer token-1"
+    assert manager.authorization() == "Bearer token-1"
+    assert len(fetches) == 1
+
+
+def test_token_is_refreshed_before_expiry():
+    clock = Clock()
+    manager, fetches = make_manager(clock)
+    manager.authorization()
+
+    clock.now = 85
+    assert manager.authorization() == "Bearer token-1"
+    clock.now = 95
+    assert manager.authorization() == "Bearer token-2"
+    clock.now = 150
+    assert manager.authorization() == "Bearer token-2"
+    assert len(fetches) == 2
+
+
+def test_invalidate_only_forgets_matching_token():
+    manager, fetches = make_manager()
+    manager.authorization()
+
+    manager.invalidate("Bearer stale")
+    assert manager.authorization() == "Bearer token-1"
+
+    manager.invalidate("Bearer token-1")
+    assert manager.authorization() == "Bearer token-2"
+
+
+def test_concurrent_callers_share_one_refresh():
+    manager, fetches = make_manager(delay=0.1)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(manager.authorization()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(fetches) == 1
+    assert results == ["Bearer token-1"] * 8
+
+
+def test_request_is_retried_once_with_a_new_token(fake_discord_api):
+    discord = make_discord([None])
+    discord.init_app(make_app(fake_discord_api.url))
+
+    fake_discord_api.revoke_tokens()
+    discord.add_command(ChatCommand(name="pong", description="pong"))
+
+    token_requests = [
+        request
+        for request in fake_discord_api.requests
+        if request[1] == "/oauth2/token"
+    ]
+    assert len(token_requests) == 2
+    assert len(discord.runtime_commands) == 2
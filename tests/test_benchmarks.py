@@ -0,0 +1,67 @@
+import subprocess
+import sys
+
+from benchmarks import importtime, pipeline, soak
+
+
+def test_every_benchmark_runs():
+    results = pipeline.run(repeat=1, number=1)
+
+    assert set(results["benchmarks"]) >= {
+        "verify/ping",
+        "end_to_end/ping",
+        "load/button_large_message",
+        "dispatch/select_menu",
+        "handler/meta_group",
+        "serialize/chat_options",
+        "end_to_end/select_menu",
+        "end_to_end_wsgi/ping",
+    }
+    assert all(result["min"] > 0 for result in results["benchmarks"].values())
+
+
+def test_only_filters_benchmarks():
+    results = pipeline.run(("verify",), repeat=1, number=1)
+
+    assert all(name.startswith("verify/") for name in results["benchmarks"])
+
+
+def test_compare_finds_regressions():
+    baseline = {"benchmarks": {"a": {"median": 1.0}, "b": {"median": 1.0}}}
+    results = {
+        "benchmarks": {"a": {"median": 1.05}, "b": {"median": 1.5}, "c": {"median": 9}}
+    }
+
+    assert pipeline.compare(results, baseline, 0.1) == ["b"]
+
+
+def test_soak_samples_memory():
+    results = soak.soak(6, sample_every=3, trace=True, top=3)
+
+    assert [sample["iteration"] for sample in results["samples"]] == [3, 6]
+    last = results["samples"][-1]
+    assert last["components"] == 6 * soak.COMPONENTS_PER_INTERACTION
+    assert last["live_interactions"] == 6
+    assert last["rss"] > 0
+    assert len(results["top_allocators"]) == 3
+
+
+def test_importtime_measures_the_package_alone():
+    results = importtime.run(runs=1, top=3)
+
+    assert set(results) == set(importtime.STATEMENTS)
+    assert results["discord"]["median"] > results["package"]["median"] > 0
+    assert len(results["discord"]["top"]) == 3
+    assert not any(
+        module["module"].startswith("flask") for module in results["discord"]["top"]
+    )
+
+
+def test_package_names_are_imported_lazily():
+    code = (
+        "import sys, discord_interactions_flask as d\n"
+        "assert 'flask' not in sys.modules and 'jsons' not in sys.modules\n"
+        "assert d.Discord.__name__ == 'Discord'\n"
+        "assert 'Discord' in dir(d)\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
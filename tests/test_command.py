@@ -1,5 +1,7 @@
 from unittest.mock import MagicMock
 
+from discord_interactions_flask import sync
+
 from discord_interactions_flask.command import (
     ChatMetaCommand,
     SubCommand,
@@ -311,3 +313,57 @@ class TestMetaCommand:
         command(meta_group_interaction)
 
         mock.assert_called_once_with(meta_group_interaction)
+
+
+class TestSpecCache:
+    def test_spec_is_cached(self):
+        command = ChatCommand(name="blep", description="blep")
+
+        assert command.spec() is command.spec()
+        assert command.spec_hash() == sync.spec_hash(command.spec())
+        assert command.spec_bytes() == sync.canonical_bytes(command.spec())
+
+    def test_changes_invalidate_spec(self):
+        command = ChatCommand(name="blep", description="blep")
+        before = command.spec_hash()
+
+        command.description = "changed"
+        assert command.spec()["description"] == "changed"
+        assert command.spec_hash() != before
+
+        command.add_option(
+            ApplicationCommandOption(
+                type=ApplicationCommandOptionType.STRING,
+                name="animal",
+                description="animal",
+            )
+        )
+        command.add_option(
+            ApplicationCommandOption(
+                type=ApplicationCommandOptionType.STRING,
+                name="only_smol",
+                description="only_smol",
+            )
+        )
+        assert [option["name"] for option in command.spec()["options"]] == [
+            "animal",
+            "only_smol",
+        ]
+
+    def test_child_changes_invalidate_parents(self):
+        subcommand = SubCommand(name="sub", description="sub")
+        group = CommandGroup(
+            name="group", description="group", _subcommands={"sub": subcommand}
+        )
+        command = ChatMetaCommand(name="meta", description="meta")
+        command.add_child(group)
+        before = command.spec_hash()
+
+        subcommand.name_localizations = {"fr": "sous"}
+        assert command.spec_hash() != before
+        assert command.spec()["options"][0]["options"][0]["name_localizations"] == {
+            "fr": "sous"
+        }
+
+        command.add_child(SubCommand(name="other", description="other"))
+        assert len(command.spec()["options"]) == 2
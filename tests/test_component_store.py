@@ -0,0 +1,91 @@
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask.components import Button, SelectMenu
+from discord_interactions_flask.component_store import (
+    MemoryComponentStore,
+    SqliteComponentStore,
+    handler_name,
+)
+from discord_interactions_flask.helpers import content_response
+from tests.conftest import make_button
+
+
+def shared_handler(interaction):
+    return content_response("shared")
+
+
+def test_handler_name():
+    assert handler_name(shared_handler) == f"{__name__}:shared_handler"
+    assert handler_name(lambda interaction: None) is None
+
+    def closure(interaction):
+        return None
+
+    assert handler_name(closure) is None
+
+
+def test_memory_store():
+    store = MemoryComponentStore()
+    button = make_button()
+    store.add("interaction", [button])
+
+    assert store.get("interaction", "button") is button
+    assert store.get("interaction", "missing") is None
+    assert store.get("missing", "button") is None
+    assert len(store) == 1
+
+
+def test_memory_store_expiry():
+    store = MemoryComponentStore(ttl=0, expire_interval=0)
+    store.add("interaction", [make_button()])
+    store.add("other", [make_button()])
+
+    assert store.get("interaction", "button") is None
+    assert len(store) <= 1
+
+
+def test_sqlite_store_is_shared(tmp_path):
+    path = str(tmp_path / "components.db")
+    worker_a = SqliteComponentStore(path)
+    worker_b = SqliteComponentStore(path)
+
+    select_menu = SelectMenu(
+        custom_id="select",
+        options=[types.SelectOption(label="label", value="value")],
+        interaction_handler=shared_handler,
+    )
+    worker_a.add("interaction", [make_button(handler=shared_handler), select_menu])
+
+    button = worker_b.get("interaction", "button")
+    assert isinstance(button, Button)
+    assert button.label == "label"
+    assert button.style is types.ButtonStyle.PRIMARY
+    assert button.interaction_handler is shared_handler
+
+    menu = worker_b.get("interaction", "select")
+    assert isinstance(menu, SelectMenu)
+    assert menu.options[0].value == "value"
+
+    assert worker_b.get("interaction", "missing") is None
+    assert len(worker_b) == 2
+
+
+def test_sqlite_store_keeps_closures_local(tmp_path):
+    path = str(tmp_path / "components.db")
+    worker_a = SqliteComponentStore(path)
+    worker_b = SqliteComponentStore(path)
+
+    def closure(interaction):
+        return content_response("closure")
+
+    button = make_button(handler=closure)
+    worker_a.add("interaction", [button])
+
+    assert worker_a.get("interaction", "button") is button
+    assert worker_b.get("interaction", "button") is None
+
+
+def test_sqlite_store_expiry(tmp_path):
+    store = SqliteComponentStore(str(tmp_path / "components.db"), ttl=0)
+    store.add("interaction", [make_button()])
+
+    assert store.get("interaction", "button") is None
@@ -1 +1,171 @@
-# TODO
+import time
+
+import pytest
+
+from discord_interactions_flask.command import ChatCommand
+from discord_interactions_flask import errors
+from tests.conftest import make_app, make_discord
+
+
+def test_init_app_syncs_commands(fake_discord_api):
+    discord = make_discord([None, "guild"])
+    discord.init_app(make_app(fake_discord_api.url))
+
+    assert len(discord.runtime_commands) == 2
+    assert {spec["name"] for spec in fake_discord_api.commands["guild"].values()} == {
+        "ping"
+    }
+
+
+def test_guilds_sync_concurrently(fake_discord_api):
+    guilds = [str(guild_id) for guild_id in range(10)]
+    fake_discord_api.latency = 0.05
+
+    start = time.perf_counter()
+    make_discord(guilds).init_commands(
+        make_app(fake_discord_api.url, DISCORD_SYNC_CONCURRENCY=1)
+    )
+    serial = time.perf_counter() - start
+
+    fake_discord_api.commands.clear()
+    start = time.perf_counter()
+    discord = make_discord(guilds)
+    discord.init_commands(make_app(fake_discord_api.url, DISCORD_SYNC_CONCURRENCY=10))
+    concurrent = time.perf_counter() - start
+
+    assert len(discord.runtime_commands) == len(guilds)
+    assert concurrent < serial / 3
+
+
+def test_guild_failure_does_not_stop_other_guilds(fake_discord_api):
+    fake_discord_api.failing_guilds.add("broken")
+    discord = make_discord(["broken", "working", None])
+
+    with pytest.raises(errors.CommandSyncError) as exc_info:
+        discord.init_commands(make_app(fake_discord_api.url))
+
+    assert list(exc_info.value.failures) == ["broken"]
+    assert len(discord.runtime_commands) == 2
+
+
+def command_requests(api):
+    return [request for request in api.requests if "/commands" in request[1]]
+
+
+def test_batch_sends_one_request_per_guild(fake_discord_api):
+    discord = make_discord(["guild"])
+    discord.init_app(make_app(fake_discord_api.url))
+    (ping_id,) = discord.runtime_commands
+    sent = len(command_requests(fake_discord_api))
+
+    with discord.batch():
+        for i in range(5):
+            discord.add_command(
+                ChatCommand(name=f"plugin{i}", description="plugin"), "guild"
+            )
+        discord.remove_command(ping_id, "guild")
+        # Nothing is sent, or visible to interactions, until the block exits
+        assert len(command_requests(fake_discord_api)) == sent
+        assert list(discord.runtime_commands) == [ping_id]
+
+    assert command_requests(fake_discord_api)[sent:] == [
+        ("PUT", "/applications/app/guilds/guild/commands")
+    ]
+    assert sorted(command.name for command in discord.runtime_commands.values()) == [
+        f"plugin{i}" for i in range(5)
+    ]
+    assert set(discord.runtime_commands) == set(fake_discord_api.commands["guild"])
+
+
+def test_batch_window_debounces_additions(fake_discord_api):
+    discord = make_discord(["guild"])
+    discord.init_app(make_app(fake_discord_api.url, DISCORD_BATCH_WINDOW=0.1))
+    sent = len(command_requests(fake_discord_api))
+
+    for i in range(3):
+        discord.add_command(
+            ChatCommand(name=f"plugin{i}", description="plugin"), "guild"
+        )
+    assert len(command_requests(fake_discord_api)) == sent
+
+    deadline = time.monotonic() + 2
+    while len(discord.runtime_commands) < 4 and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    assert len(discord.runtime_commands) == 4
+    assert len(command_requests(fake_discord_api)) == sent + 1
+
+
+def test_replace_command_edits_in_place(fake_discord_api):
+    discord = make_discord(["guild"])
+    discord.init_app(make_app(fake_discord_api.url))
+    (ping_id,) = discord.runtime_commands
+    sent = len(command_requests(fake_discord_api))
+
+    new_ping = ChatCommand(name="ping", description="new ping")
+    discord.replace_command(new_ping, "guild")
+
+    assert command_requests(fake_discord_api)[sent:] == [
+        ("PATCH", f"/applications/app/guilds/guild/commands/{ping_id}")
+    ]
+    assert discord.runtime_commands == {ping_id: new_ping}
+    assert discord.commands["guild"] == {"ping": new_ping}
+    assert fake_discord_api.commands["guild"][ping_id]["description"] == "new ping"
+
+
+def test_hot_changes_reach_other_workers(fake_discord_api, tmp_path):
+    config = dict(
+        DISCORD_COMMAND_MANIFEST=str(tmp_path / "commands.json"),
+        DISCORD_RELOAD_INTERVAL=0,
+    )
+    first, second = make_discord(["guild"]), make_discord(["guild"])
+    first.init_app(make_app(fake_discord_api.url, **config))
+    second.init_app(make_app(fake_discord_api.url, **config))
+
+    first.replace_command(ChatCommand(name="pong", description="pong"), "guild")
+    sent = len(command_requests(fake_discord_api))
+    # Already registered by the first worker, so nothing to send
+    second.replace_command(ChatCommand(name="pong", description="pong"), "guild")
+    assert len(command_requests(fake_discord_api)) == sent
+    assert set(second.runtime_commands) == set(first.runtime_commands)
+
+    first.remove_command_by_name("ping", "guild")
+    assert [command.name for command in first.runtime_commands.values()] == ["pong"]
+    assert [spec["name"] for spec in fake_discord_api.commands["guild"].values()] == [
+        "pong"
+    ]
+
+    second._check_generation()
+    assert second.runtime_commands.keys() == first.runtime_commands.keys()
+
+
+def test_generation_is_bumped_after_the_manifest_is_written(fake_discord_api, tmp_path):
+    config = dict(
+        DISCORD_COMMAND_MANIFEST=str(tmp_path / "commands.json"),
+        DISCORD_RELOAD_INTERVAL=0,
+    )
+    first, second = make_discord(["guild"]), make_discord(["guild"])
+    first.init_app(make_app(fake_discord_api.url, **config))
+    second.init_app(make_app(fake_discord_api.url, **config))
+    manifest = first.command_manifest
+    generations = []
+    save = manifest.save
+
+    def saving():
+        generations.append(manifest.generation())
+        save()
+
+    manifest.save = saving
+    first.replace_command(ChatCommand(name="pong", description="pong"), "guild")
+
+    assert generations == [0]
+    assert manifest.generation() == first._generation == 1
+
+    # A reload waits until this worker is done changing the manifest
+    with second._manifest_lock:
+        second._check_generation()
+    assert second._generation == 0
+    second.replace_command(ChatCommand(name="pong", description="pong"), "guild")
+    second._check_generation()
+    assert second._generation == 2
+    assert second.runtime_commands.keys() == first.runtime_commands.keys()
@@ -0,0 +1,126 @@
+import gzip
+import json
+import os
+import time
+
+import pytest
+
+from discord_interactions_flask.host import DiscordHost
+from discord_interactions_flask.recording import Recorder, read
+from discord_interactions_flask.watchdog import Watchdog
+from tests.conftest import make_discord
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="Needs os.fork and os.register_at_fork"
+)
+
+
+def in_child(check):
+    """Fork, run `check` in the child, and return what it returned."""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            result = {"result": check()}
+        except BaseException as e:
+            result = {"error": repr(e)}
+        os.write(write_fd, json.dumps(result).encode())
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as f:
+        output = f.read()
+    os.waitpid(pid, 0)
+    result = json.loads(output)
+    assert "error" not in result, result["error"]
+    return result["result"]
+
+
+def test_locks_and_pools_are_replaced_in_children():
+    discord = make_discord([None])
+    http = discord.http
+    locks = [
+        discord.runtime_commands._lock,
+        discord.tokens._lock,
+        discord.rest._lock,
+        discord.component_handlers._lock,
+        discord._batch_lock,
+    ]
+    # As if other threads were in the middle of using them when the worker was forked
+    for lock in locks:
+        lock.acquire()
+    try:
+
+        def check():
+            for lock in (
+                discord.runtime_commands._lock,
+                discord.tokens._lock,
+                discord.rest._lock,
+                discord.component_handlers._lock,
+                discord._batch_lock,
+            ):
+                assert lock.acquire(timeout=1)
+            assert discord.http is not http
+            assert discord.rest.http is discord.http
+            assert discord.http.headers == http.headers
+            # The registry built by the parent is still there
+            return len(discord.commands[None])
+
+        assert in_child(check) == 1
+    finally:
+        for lock in locks:
+            lock.release()
+    assert discord.http is http
+
+
+def test_background_threads_restart_in_children(tmp_path):
+    discord = make_discord([])
+    discord.watchdog = Watchdog(interval=0.01)
+    discord.recorder = Recorder(str(tmp_path), flush_interval=0.01)
+    discord.watchdog.start(None)
+    discord.watchdog.stop()
+    discord.recorder.record(b'{"parent": true}', 1.0, 0.001, 200, 2)
+    # The parent has a file open when it forks
+    deadline = time.monotonic() + 5
+    while discord.recorder.recorded == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    def check():
+        assert discord.watchdog._thread is None
+        discord.watchdog.start(None)
+        discord.watchdog.stop()
+        assert discord.watchdog._thread.is_alive()
+        discord.recorder.record(b'{"child": true}', 2.0, 0.001, 200, 2)
+        discord.recorder.close()
+        return discord.recorder.recorded
+
+    assert in_child(check) == 1
+    discord.recorder.close()
+
+    assert sorted(record["body"] for record in read(str(tmp_path))) == [
+        '{"child": true}',
+        '{"parent": true}',
+    ]
+    for name in os.listdir(tmp_path):
+        with gzip.open(tmp_path / name) as f:
+            assert len(f.read().splitlines()) == 1
+
+
+def test_host_shares_new_pools_in_children():
+    host = DiscordHost()
+    discord = host.application(
+        {
+            "DISCORD_PUBLIC_KEY": "00" * 32,
+            "DISCORD_CLIENT_ID": "alpha",
+            "DISCORD_CLIENT_SECRET": "secret",
+        }
+    )
+    http, executor = host.http, host.sync_executor
+
+    def check():
+        assert host.http is not http and host.sync_executor is not executor
+        assert discord.http is discord.rest.http is host.http
+        assert discord.sync_executor is host.sync_executor
+        return host.sync_executor.submit(lambda: 42).result(timeout=5)
+
+    assert in_child(check) == 42
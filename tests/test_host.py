@@ -0,0 +1,109 @@
+from flask import Flask
+from nacl.signing import SigningKey
+
+from discord_interactions_flask.command import ChatCommand
+from discord_interactions_flask.helpers import content_response
+from discord_interactions_flask.host import DiscordHost
+from tests.conftest import chat_payload, command_id, signed_post
+
+
+def add_application(host, application_id, key, reply):
+    discord = host.application(
+        {
+            "DISCORD_PUBLIC_KEY": key.verify_key.encode().hex(),
+            "DISCORD_CLIENT_ID": application_id,
+            "DISCORD_CLIENT_SECRET": f"{application_id}-secret",
+        }
+    )
+    command = ChatCommand(name=reply, description=reply)
+    command.handler(lambda interaction: content_response(reply))
+    discord.add_command(command)
+    return discord, command
+
+
+def application_payload(application_id, command_id, name):
+    return dict(chat_payload(command_id, name), application_id=application_id)
+
+
+def make_host(api_url):
+    app = Flask(__name__)
+    app.config["DISCORD_API_URL"] = api_url
+    host = DiscordHost()
+    keys = {"alpha": SigningKey.generate(), "beta": SigningKey.generate()}
+    apps = {
+        application_id: add_application(host, application_id, key, application_id)
+        for application_id, key in keys.items()
+    }
+    host.init_app(app)
+    return host, app, keys, apps
+
+
+def test_interactions_are_routed_by_application_id(fake_discord_api):
+    _, app, keys, apps = make_host(fake_discord_api.url)
+    client = app.test_client()
+
+    for application_id, (discord, command) in apps.items():
+        payload = application_payload(
+            application_id, command_id(discord, command), application_id
+        )
+        resp = signed_post(client, keys[application_id], payload)
+        assert resp.status_code == 200
+        assert resp.json["data"]["content"] == application_id
+
+    # Each application only accepts its own signatures
+    discord, command = apps["beta"]
+    payload = application_payload("beta", command_id(discord, command), "beta")
+    assert signed_post(client, keys["alpha"], payload).status_code == 401
+
+
+def test_interactions_are_routed_by_url(fake_discord_api):
+    _, app, keys, apps = make_host(fake_discord_api.url)
+    discord, command = apps["beta"]
+    # Without an application_id, only the URL says which application it is for
+    resp = signed_post(
+        app.test_client(),
+        keys["beta"],
+        chat_payload(command_id(discord, command), "beta"),
+        path="/discord/beta/interactions",
+    )
+
+    assert resp.status_code == 200
+    assert resp.json["data"]["content"] == "beta"
+
+
+def test_unknown_applications_are_not_found(fake_discord_api):
+    _, app, keys, _ = make_host(fake_discord_api.url)
+
+    resp = signed_post(
+        app.test_client(), keys["alpha"], application_payload("gamma", "1", "gamma")
+    )
+
+    assert resp.status_code == 404
+
+
+def test_applications_share_pools_but_not_state(fake_discord_api):
+    host, _, _, apps = make_host(fake_discord_api.url)
+    (alpha, _), (beta, _) = apps["alpha"], apps["beta"]
+
+    assert alpha.http is beta.http is host.http
+    assert alpha.sync_executor is beta.sync_executor is host.sync_executor
+    assert alpha.tokens is not beta.tokens
+    assert alpha.rest is not beta.rest
+    assert alpha.client_secret == "alpha-secret"
+    assert alpha.api_url == beta.api_url == fake_discord_api.url
+
+
+def test_applications_added_later_are_initialized(fake_discord_api):
+    host, app, _, _ = make_host(fake_discord_api.url)
+    key = SigningKey.generate()
+
+    discord, command = add_application(host, "gamma", key, "gamma")
+
+    assert discord.public_key == key.verify_key.encode().hex()
+    resp = signed_post(
+        app.test_client(),
+        key,
+        application_payload("gamma", command_id(discord, command), "gamma"),
+    )
+    assert resp.status_code == 200
+    assert resp.json["data"]["content"] == "gamma"
@@ -0,0 +1,61 @@
+from nacl.signing import SigningKey
+
+from discord_interactions_flask.instrumentation import (
+    STAGES,
+    command_path,
+    stage_timer,
+)
+from tests.conftest import (
+    RecordingSink,
+    chat_payload,
+    make_app,
+    make_discord,
+    signed_post,
+)
+
+
+def test_stages_are_timed(pong_app, signing_key):
+    sink = RecordingSink()
+    app, discord, command_id = pong_app()
+    discord.timing_sink = sink
+
+    resp = signed_post(app.test_client(), signing_key, chat_payload(command_id, "pong"))
+
+    assert resp.status_code == 200
+    assert [stage for stage, _, _ in sink.records] == [*STAGES, "total"]
+    assert all(seconds >= 0 for _, seconds, _ in sink.records)
+    assert sink.records[-1][2] == {
+        "interaction_type": "APPLICATION_COMMAND",
+        "command": "pong",
+    }
+    total = sink.records[-1][1]
+    assert sum(seconds for _, seconds, _ in sink.records[:-1]) <= total + 1e-6
+
+
+def test_rejected_signature_only_reports_total(fake_discord_api):
+    sink = RecordingSink()
+    discord = make_discord([None])
+    discord.timing_sink = sink
+    app = make_app(
+        fake_discord_api.url,
+        DISCORD_PUBLIC_KEY=SigningKey.generate().verify_key.encode().hex(),
+    )
+    discord.init_app(app)
+
+    resp = signed_post(
+        app.test_client(), SigningKey.generate(), chat_payload("1", "ping")
+    )
+
+    assert resp.status_code == 401
+    assert [stage for stage, _, _ in sink.records] == ["total"]
+
+
+def test_command_path_includes_subcommands(meta_group_interaction):
+    assert (
+        command_path(meta_group_interaction)
+        == "meta_chat_command_name meta_chat_group_1 meta_chat_sub_1"
+    )
+
+
+def test_no_sink_measures_nothing():
+    assert stage_timer(None) is None
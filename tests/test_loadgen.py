@@ -0,0 +1,137 @@
+import threading
+
+from werkzeug.serving import make_server
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask.interactions import (
+    ButtonInteraction,
+    ChatInteraction,
+    MessageInteraction,
+    SelectMenuInteraction,
+    TextInputInteraction,
+    UserInteraction,
+)
+from discord_interactions_flask.loadgen import (
+    KINDS,
+    PayloadGenerator,
+    drive,
+    generate_key,
+    percentile,
+    prepare,
+    public_key,
+    sign,
+)
+from discord_interactions_flask.verify import verify_key
+
+LOADERS = {
+    "chat": ChatInteraction,
+    "user": UserInteraction,
+    "message": MessageInteraction,
+    "button": ButtonInteraction,
+    "select_menu": SelectMenuInteraction,
+    "text_input": TextInputInteraction,
+}
+
+
+def test_payloads_load_as_interactions():
+    generator = PayloadGenerator(seed=1)
+    for kind in KINDS:
+        payload = generator.payload(kind)
+        loader = LOADERS.get(kind)
+        if loader is not None:
+            interaction = loader.load(payload)
+            assert interaction.application_id == "1"
+
+    assert generator.payload("ping")["type"] == types.InteractionType.PING
+    assert (
+        generator.payload("modal_submit")["type"] == types.InteractionType.MODAL_SUBMIT
+    )
+
+
+def test_given_commands_and_components_are_used():
+    generator = PayloadGenerator(
+        commands={"chat": [("10", "echo")]},
+        components={"button": [("20", "confirm")]},
+        seed=1,
+    )
+
+    chat = generator.payload("chat")
+    assert (chat["data"]["id"], chat["data"]["name"]) == ("10", "echo")
+    button = generator.payload("button")
+    assert button["data"]["custom_id"] == "confirm"
+    assert button["message"]["interaction"]["id"] == "20"
+
+
+def test_mix_and_seed_make_sequences_reproducible():
+    first = [PayloadGenerator(mix={"ping": 1, "chat": 1}, seed=7).next() for _ in "ab"]
+    second = [PayloadGenerator(mix={"ping": 1, "chat": 1}, seed=7).next() for _ in "ab"]
+
+    assert first == second
+    assert {kind for kind, _ in first} <= {"ping", "chat"}
+
+
+def test_signature_verifies():
+    key = generate_key()
+    headers = sign(b"{}", key, "1700000000")
+
+    assert verify_key(
+        b"{}",
+        headers["X-Signature-Ed25519"],
+        headers["X-Signature-Timestamp"],
+        public_key(key),
+    )
+    assert public_key(generate_key(key.encode().hex())) == public_key(key)
+
+
+def test_percentile():
+    ordered = [float(i) for i in range(1, 101)]
+
+    assert percentile(ordered, 50) == 50
+    assert percentile(ordered, 99) == 99
+    assert percentile(ordered, 100) == 100
+    assert percentile([], 50) == 0
+
+
+def test_drive_reports_every_request(pong_app):
+    key = generate_key()
+    app, _, command_id = pong_app(key=key)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        generator = PayloadGenerator(
+            commands={"chat": [(command_id, "pong")]},
+            mix={"chat": 3, "ping": 1},
+            seed=3,
+        )
+        report = drive(
+            f"http://127.0.0.1:{server.server_port}/discord/interactions",
+            prepare(generator, key, 10),
+            concurrency=4,
+            duration=None,
+            total=40,
+        )
+    finally:
+        server.shutdown()
+
+    summary = report.summary()
+    assert summary["requests"] == 40
+    assert summary["errors"] == 0
+    assert summary["statuses"] == {"200": 40}
+    assert set(summary["by_kind"]) <= {"chat", "ping"}
+    assert 0 < summary["latency"]["p50"] <= summary["latency"]["p99"]
+    assert report.throughput > 0
+
+
+def test_rate_limits_how_fast_requests_start():
+    report = drive(
+        "http://127.0.0.1:9/discord/interactions",
+        [("ping", b"{}", {})],
+        rate=50,
+        concurrency=2,
+        duration=0.2,
+        timeout=0.1,
+    )
+
+    assert 5 <= report.requests <= 11
+    assert report.errors == report.requests
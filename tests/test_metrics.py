@@ -0,0 +1,63 @@
+import threading
+
+from discord_interactions_flask.metrics import MetricsSink
+from tests.conftest import chat_payload, signed_post
+
+TAGS = {"interaction_type": "APPLICATION_COMMAND", "command": "ping"}
+
+
+def test_histogram_buckets_are_cumulative():
+    sink = MetricsSink(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 5):
+        sink.request_started()
+        sink.request_finished(seconds, TAGS, error=seconds > 1)
+
+    text = sink.render()
+
+    labels = 'interaction_type="APPLICATION_COMMAND",command="ping"'
+    assert f"discord_interactions_total{{{labels}}} 3" in text
+    assert f"discord_interaction_errors_total{{{labels}}} 1" in text
+    assert f'discord_interaction_duration_seconds_bucket{{{labels},le="0.1"}} 1' in text
+    assert f'discord_interaction_duration_seconds_bucket{{{labels},le="1.0"}} 2' in text
+    assert (
+        f'discord_interaction_duration_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+    )
+    assert "discord_interactions_in_flight 0" in text
+
+
+def test_counts_from_every_thread_are_added_up():
+    sink = MetricsSink()
+
+    def record():
+        for _ in range(1000):
+            sink.request_started()
+            sink.request_finished(0.001, TAGS, error=False)
+
+    threads = [threading.Thread(target=record) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert (
+        'discord_interactions_total{interaction_type="APPLICATION_COMMAND",command="ping"} 8000'
+        in sink.render()
+    )
+
+
+def test_metrics_route(pong_app, signing_key):
+    app, _, command_id = pong_app(DISCORD_METRICS_ROUTE="/metrics")
+    client = app.test_client()
+    signed_post(client, signing_key, chat_payload(command_id, "pong"))
+
+    resp = client.get("/discord/metrics")
+
+    assert resp.status_code == 200
+    text = resp.get_data(as_text=True)
+    assert (
+        'discord_interactions_total{interaction_type="APPLICATION_COMMAND",command="pong"} 1'
+        in text
+    )
+    assert "discord_component_handlers 0" in text
+    assert 'discord_rest_circuit_state{endpoint="commands"} 0' in text
+    assert "discord_rest_requests_total" in text
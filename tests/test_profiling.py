@@ -0,0 +1,80 @@
+import json
+import os
+import pstats
+import time
+
+from tests.conftest import RecordingSink, chat_payload, signed_post
+
+
+def test_listed_command_is_always_profiled(pong_app, signing_key, tmp_path):
+    app, discord, command_id = pong_app(
+        DISCORD_PROFILE_DIR=str(tmp_path),
+        DISCORD_PROFILE_SAMPLE_RATE=0,
+        DISCORD_PROFILE_COMMANDS=["pong"],
+    )
+    client = app.test_client()
+    for _ in range(3):
+        signed_post(client, signing_key, chat_payload(command_id, "pong"))
+    signed_post(client, signing_key, chat_payload("unknown", "other"))
+
+    (path,) = discord.profiler.flush()
+
+    assert path.startswith(str(tmp_path / "APPLICATION_COMMAND-pong-"))
+    stats = pstats.Stats(path)
+    assert any(function == "pong_handler" for _, _, function in stats.stats)
+    with open(path[: -len(".prof")] + ".json") as f:
+        label = json.load(f)
+    assert label["command"] == "pong"
+    assert label["requests"] == 3
+    assert set(label["mean_stage_seconds"]) >= {"decode", "handler", "total"}
+
+
+def test_requests_are_sampled(pong_app, signing_key, tmp_path):
+    app, discord, command_id = pong_app(
+        DISCORD_PROFILE_DIR=str(tmp_path),
+        DISCORD_PROFILE_SAMPLE_RATE=2,
+    )
+    client = app.test_client()
+    for _ in range(4):
+        signed_post(client, signing_key, chat_payload(command_id, "pong"))
+
+    (path,) = discord.profiler.flush()
+
+    with open(path[: -len(".prof")] + ".json") as f:
+        label = json.load(f)
+    assert label["requests"] == 2
+    # Sampled requests are profiled from the start
+    assert "verify" in label["mean_stage_seconds"]
+
+
+def test_profiles_are_written_in_the_background(pong_app, signing_key, tmp_path):
+    app, discord, command_id = pong_app(
+        DISCORD_PROFILE_DIR=str(tmp_path),
+        DISCORD_PROFILE_SAMPLE_RATE=1,
+        DISCORD_PROFILE_INTERVAL=0.05,
+    )
+    signed_post(app.test_client(), signing_key, chat_payload(command_id, "pong"))
+
+    deadline = time.monotonic() + 5
+    while not os.listdir(tmp_path) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert discord.profiler._thread.name == "discord-profiler"
+    assert discord.profiler.close() == []
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_failed_requests_count_the_total_once(pong_app, signing_key, tmp_path):
+    def fail(interaction):
+        raise RuntimeError("boom")
+
+    app, discord, command_id = pong_app(
+        fail, DISCORD_PROFILE_DIR=str(tmp_path), DISCORD_PROFILE_SAMPLE_RATE=1
+    )
+    discord.timing_sink = sink = RecordingSink()
+
+    resp = signed_post(app.test_client(), signing_key, chat_payload(command_id, "pong"))
+
+    assert resp.status_code == 500
+    (aggregate,) = discord.profiler._aggregates.values()
+    ((_, total, _),) = [record for record in sink.records if record[0] == "total"]
+    assert 0 < aggregate.stages["total"] <= total
@@ -0,0 +1,82 @@
+import os
+import threading
+
+from nacl.signing import SigningKey
+from werkzeug.serving import make_server
+
+from discord_interactions_flask.recording import Recorder, kind, read, replay
+from tests.conftest import chat_payload, signed_post
+
+
+def test_verified_requests_are_recorded(pong_app, signing_key, tmp_path):
+    app, discord, command_id = pong_app(DISCORD_RECORD_DIR=str(tmp_path))
+    client = app.test_client()
+
+    signed_post(client, signing_key, chat_payload(command_id, "pong"))
+    signed_post(client, SigningKey.generate(), chat_payload(command_id, "pong"))
+    discord.recorder.close()
+
+    (record,) = read(str(tmp_path))
+    assert record["status"] == 200
+    assert record["response_bytes"] > 0
+    assert record["duration"] > 0
+    assert '"name": "pong"' in record["body"]
+    assert discord.recorder.recorded == 1
+
+
+def test_files_are_rotated(tmp_path):
+    recorder = Recorder(str(tmp_path), max_bytes=1, max_files=2)
+    for i in range(5):
+        recorder.record(b'{"type": 1}', float(i), 0.001, 200, 10)
+    recorder.close()
+
+    assert len(os.listdir(tmp_path)) == 2
+    assert [record["received"] for record in read(str(tmp_path))] == [3.0, 4.0]
+
+
+def test_recordings_of_several_processes_are_merged(tmp_path):
+    first = Recorder(str(tmp_path))
+    second = Recorder(str(tmp_path))
+    for i in range(6):
+        (first if i % 2 else second).record(b"{}", float(i), 0.0, 200, None)
+    first.close()
+    second.close()
+
+    assert [record["received"] for record in read(str(tmp_path))] == [
+        0.0,
+        1.0,
+        2.0,
+        3.0,
+        4.0,
+        5.0,
+    ]
+
+
+def test_kind():
+    assert kind({"type": 1}) == "PING"
+    assert kind({"type": 2, "data": {"name": "pong"}}) == "APPLICATION_COMMAND pong"
+
+
+def test_replay_resigns_requests(pong_app, signing_key, tmp_path):
+    app, discord, command_id = pong_app(DISCORD_RECORD_DIR=str(tmp_path))
+    client = app.test_client()
+    for _ in range(3):
+        signed_post(client, signing_key, chat_payload(command_id, "pong"))
+    discord.recorder.close()
+
+    staging_key = SigningKey.generate()
+    staging, _, _ = pong_app(key=staging_key)
+    server = make_server("127.0.0.1", 0, staging, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        report = replay(
+            read(str(tmp_path)),
+            f"http://127.0.0.1:{server.server_port}/discord/interactions",
+            staging_key,
+            speed=0,
+        )
+    finally:
+        server.shutdown()
+
+    assert report.summary()["statuses"] == {"200": 3}
+    assert set(report.latencies) == {"APPLICATION_COMMAND pong"}
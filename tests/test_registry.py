@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+
+from discord_interactions_flask import Discord
+from discord_interactions_flask.command import ChatCommand
+from discord_interactions_flask.component_store import MemoryComponentStore
+from discord_interactions_flask.registry import Registry
+from tests.conftest import make_button
+
+
+def test_edit_publishes_on_exit():
+    registry = Registry({"a": 1})
+    before = registry.snapshot()
+
+    with registry.edit() as data:
+        data["b"] = 2
+        del data["a"]
+        assert registry == {"a": 1}
+
+    assert registry == {"b": 2}
+    assert before == {"a": 1}
+
+
+def test_failed_edit_is_discarded():
+    registry = Registry({"a": 1})
+
+    with pytest.raises(ValueError):
+        with registry.edit() as data:
+            data["b"] = 2
+            raise ValueError()
+
+    assert registry == {"a": 1}
+
+
+def hammer(write, read, writers=4, readers=4, iterations=2000):
+    """Run `write` and `read` from several threads at once, re-raising the first error from any of them."""
+    errors = []
+    done = threading.Event()
+
+    def writer(n):
+        try:
+            for i in range(iterations):
+                write(n, i)
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            while not done.is_set():
+                read()
+        except Exception as e:
+            errors.append(e)
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    writer_threads = [
+        threading.Thread(target=writer, args=(n,)) for n in range(writers)
+    ]
+    for thread in reader_threads + writer_threads:
+        thread.start()
+    for thread in writer_threads:
+        thread.join()
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def test_readers_never_see_partial_writes():
+    registry: Registry[str, int] = Registry()
+
+    def write(n, i):
+        # Every pair is added and removed together
+        with registry.edit() as data:
+            data[f"a{n}-{i}"] = i
+            data[f"b{n}-{i}"] = i
+            data.pop(f"a{n}-{i - 10}", None)
+            data.pop(f"b{n}-{i - 10}", None)
+
+    def read():
+        keys = set(registry)
+        assert {key[1:] for key in keys if key[0] == "a"} == {
+            key[1:] for key in keys if key[0] == "b"
+        }
+
+    hammer(write, read)
+    assert len(registry) == 4 * 10 * 2
+
+
+def test_register_and_dispatch_concurrently():
+    discord = Discord()
+    ping = ChatCommand(name="ping", description="ping")
+    discord.add_command(ping, "guild")
+    discord.runtime_commands["1"] = ping
+
+    def write(n, i):
+        name = f"command{n}"
+        discord.add_command(ChatCommand(name=name, description=str(i)), "guild")
+        discord.runtime_commands[f"writer{n}"] = discord.commands["guild"][name]
+        if i % 2:
+            discord.remove_command_by_name(name, "guild")
+            del discord.runtime_commands[f"writer{n}"]
+
+    def read():
+        # Iterating while other threads register commands would fail with plain dicts
+        for guild_id, commands in discord.commands.items():
+            assert all(command.name == name for name, command in commands.items())
+        assert discord.runtime_commands.get("1") is ping
+        assert len(list(discord.runtime_commands.values())) >= 1
+
+    hammer(write, read, iterations=500)
+    assert set(discord.commands["guild"]) == {"ping"}
+
+
+def test_components_are_published_together():
+    store = MemoryComponentStore(ttl=60, expire_interval=0)
+
+    def write(n, i):
+        store.add(f"{n}-{i}", [make_button("first"), make_button("second")])
+
+    def read():
+        for interaction_id in list(store._components):
+            first = store.get(interaction_id, "first")
+            second = store.get(interaction_id, "second")
+            assert (first is None) == (second is None)
+
+    hammer(write, read, iterations=500)
+    assert len(store) == 4 * 500 * 2
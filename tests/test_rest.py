@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+
+import pytest
+import urllib3
+
+from discord_interactions_flask import errors
+from discord_interactions_flask.auth import TokenManager
+from discord_interactions_flask.command import ChatCommand
+from discord_interactions_flask.rest import RestClient, route_key
+from tests.conftest import make_app, make_discord
+
+
+def test_route_key():
+    assert (
+        route_key(
+            "PATCH", "https://discord.com/api/v10/applications/1/guilds/2/commands/3"
+        )
+        == "PATCH /api/v10/applications/:id/guilds/2/commands/:id"
+    )
+    assert (
+        route_key("POST", "https://discord.com/api/v10/webhooks/1/token/messages/2")
+        == "POST /api/v10/webhooks/1/token/messages/:id"
+    )
+
+
+def make_client(api):
+    http = urllib3.PoolManager(maxsize=8)
+    client = RestClient(http)
+
+    def fetch():
+        resp = client.request("POST", api.url + "/oauth2/token", authenticate=False)
+        return json.loads(resp.data)
+
+    client.tokens = TokenManager(fetch)
+    return client
+
+
+def test_requests_wait_for_bucket_instead_of_429(fake_discord_api):
+    fake_discord_api.rate_limit = (2, 0.2)
+    client = make_client(fake_discord_api)
+    url = fake_discord_api.url + "/applications/app/guilds/guild/commands"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(8) as executor:
+        statuses = list(
+            executor.map(lambda _: client.request("GET", url).status, range(8))
+        )
+    elapsed = time.perf_counter() - start
+
+    assert statuses == [200] * 8
+    assert fake_discord_api.rate_limited == 0
+    # 2 requests per 0.2s window means at least 3 full windows for 8 requests
+    assert elapsed >= 0.6
+
+    state = client.bucket_state()["GET /applications/app/guilds/guild/commands"]
+    assert state["bucket"] == "GET-guild"
+    assert state["limit"] == 2
+
+
+def test_429_is_retried(fake_discord_api):
+    fake_discord_api.rate_limit = (1, 0.2)
+    url = fake_discord_api.url + "/applications/app/guilds/guild/commands"
+
+    # Two clients sharing a limit can't know about each others requests
+    first, second = make_client(fake_discord_api), make_client(fake_discord_api)
+    assert first.request("GET", url).status == 200
+    assert second.request("GET", url).status == 200
+
+    assert fake_discord_api.rate_limited == 1
+    assert second.stats["rate_limited"] == 1
+    assert second.stats["retries"] == 1
+
+
+def test_read_timeout_raises_api_error(fake_discord_api):
+    fake_discord_api.stall = 1
+    client = make_client(fake_discord_api)
+    client.timeout = urllib3.Timeout(connect=1, read=0.1)
+    url = fake_discord_api.url + "/applications/app/guilds/guild/commands"
+    client.tokens.authorization()
+
+    start = time.perf_counter()
+    with pytest.raises(errors.DiscordApiError):
+        client.request("GET", url)
+    assert time.perf_counter() - start < 0.5
+    assert client.stats["failures"] == 1
+
+
+def test_circuit_breaker_fails_fast_and_recovers(fake_discord_api):
+    fake_discord_api.error_status = 503
+    client = make_client(fake_discord_api)
+    client.max_retries = 0
+    client.failure_threshold = 3
+    client.reset_timeout = 0.2
+    url = fake_discord_api.url + "/applications/app/guilds/guild/commands"
+
+    for _ in range(3):
+        assert client.request("GET", url).status == 503
+    sent = len(fake_discord_api.requests)
+
+    with pytest.raises(errors.CircuitOpenError):
+        client.request("GET", url)
+    # Refused without reaching Discord, and other classes of endpoint are unaffected
+    assert len(fake_discord_api.requests) == sent
+    assert client.breaker_state()["commands"]["state"] == "open"
+    assert client.breaker_state()["oauth2"]["state"] == "closed"
+
+    # The trial request after the cooldown fails, so the breaker opens again
+    time.sleep(0.2)
+    assert client.request("GET", url).status == 503
+    with pytest.raises(errors.CircuitOpenError):
+        client.request("GET", url)
+
+    fake_discord_api.error_status = None
+    time.sleep(0.2)
+    assert client.request("GET", url).status == 200
+    assert client.breaker_state()["commands"]["state"] == "closed"
+    assert client.request("GET", url).status == 200
+
+
+def test_half_open_breaker_recovers_from_unexpected_errors(
+    fake_discord_api, monkeypatch
+):
+    fake_discord_api.error_status = 503
+    client = make_client(fake_discord_api)
+    client.max_retries = 0
+    client.failure_threshold = 1
+    client.reset_timeout = 0.1
+    url = fake_discord_api.url + "/applications/app/guilds/guild/commands"
+    assert client.request("GET", url).status == 503
+
+    # The trial request fails before it is sent, and must not leave the breaker half open forever
+    time.sleep(0.1)
+
+    def acquire(bucket):
+        raise RuntimeError("no bucket")
+
+    monkeypatch.setattr(client, "_acquire", acquire)
+    with pytest.raises(RuntimeError):
+        client.request("GET", url)
+    assert client.breaker_state()["commands"]["state"] == "open"
+
+    monkeypatch.undo()
+    fake_discord_api.error_status = None
+    time.sleep(0.1)
+    assert client.request("GET", url).status == 200
+    assert client.breaker_state()["commands"]["state"] == "closed"
+
+
+def test_add_command_fails_fast_while_discord_is_down(fake_discord_api):
+    discord = make_discord([None])
+    discord.init_app(
+        make_app(
+            fake_discord_api.url,
+            DISCORD_READ_TIMEOUT=0.1,
+            DISCORD_CIRCUIT_FAILURES=1,
+            DISCORD_CIRCUIT_RESET=60,
+        )
+    )
+    fake_discord_api.stall = 1
+
+    with pytest.raises(errors.DiscordApiError):
+        discord.add_command(ChatCommand(name="slow", description="slow"))
+    start = time.perf_counter()
+    with pytest.raises(errors.CircuitOpenError):
+        discord.add_command(ChatCommand(name="fast", description="fast"))
+    assert time.perf_counter() - start < 0.05
@@ -0,0 +1,223 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from discord_interactions_flask import Discord
+from discord_interactions_flask.command import ChatCommand, UserCommand
+from discord_interactions_flask.discord_types import (
+    ApplicationCommand,
+    ApplicationCommandOption,
+    ApplicationCommandOptionType,
+)
+from discord_interactions_flask.sync import (
+    CommandManifest,
+    plan_sync,
+    spec_hash,
+)
+
+
+def make_command(name="echo", description="Echo text back"):
+    command = ChatCommand(name=name, description=description)
+    command.add_option(
+        ApplicationCommandOption(
+            type=ApplicationCommandOptionType.STRING,
+            name="text",
+            description="The text",
+            required=True,
+        )
+    )
+    command.add_option(
+        ApplicationCommandOption(
+            type=ApplicationCommandOptionType.INTEGER,
+            name="times",
+            description="How many times",
+            required=False,
+        )
+    )
+    return command
+
+
+# Roughly what Discord sends back for make_command()
+def remote_spec(command_id="1", name="echo", description="Echo text back"):
+    return {
+        "id": command_id,
+        "application_id": "app",
+        "version": "100",
+        "default_member_permissions": None,
+        "type": 1,
+        "name": name,
+        "description": description,
+        "dm_permission": True,
+        "nsfw": False,
+        "options": [
+            {
+                "type": 3,
+                "name": "text",
+                "description": "The text",
+                "required": True,
+            },
+            {"type": 4, "name": "times", "description": "How many times"},
+        ],
+    }
+
+
+def test_remote_and_local_specs_hash_equal():
+    assert spec_hash(make_command().spec()) == spec_hash(remote_spec())
+    assert spec_hash(make_command(description="changed").spec()) != spec_hash(
+        remote_spec()
+    )
+
+
+def test_user_command_hash_ignores_empty_description():
+    command = UserCommand(name="user")
+    remote = {"id": "1", "type": 2, "name": "user", "description": ""}
+    assert spec_hash(command.spec()) == spec_hash(remote)
+
+
+def test_plan_sync():
+    unchanged = make_command()
+    edited = make_command("edited", "new description")
+    created = make_command("created")
+
+    plan = plan_sync(
+        [unchanged, edited, created],
+        [
+            remote_spec("1"),
+            remote_spec("2", "edited", "old description"),
+            remote_spec("3", "deleted"),
+        ],
+    )
+
+    assert plan.unchanged == {"1": unchanged}
+    assert plan.edit == {"2": edited}
+    assert plan.create == [created]
+    assert plan.delete == ["3"]
+
+
+def test_plan_sync_nothing_to_do():
+    assert not plan_sync([make_command()], [remote_spec()])
+
+
+def test_command_manifest(tmp_path):
+    path = str(tmp_path / "commands.json")
+    command = make_command()
+
+    manifest = CommandManifest(path)
+    manifest.update("guild", {"1": command})
+    manifest.save()
+
+    manifest = CommandManifest(path)
+    assert manifest.resolve("guild", [command]) == {"1": command}
+    assert manifest.resolve(None, [command]) is None
+    assert manifest.resolve("guild", [make_command(description="changed")]) is None
+
+
+def test_manifest_runtime_commands_skips_changed_commands():
+    unchanged, changed = make_command(), make_command("changed")
+
+    manifest = CommandManifest()
+    manifest.update(None, {"1": unchanged, "2": changed})
+    changed.description = "new description"
+
+    assert manifest.runtime_commands(None, [unchanged, changed]) == {"1": unchanged}
+
+
+def test_boot_from_manifest_without_sync(tmp_path):
+    path = str(tmp_path / "commands.json")
+    command = make_command()
+    manifest = CommandManifest(path)
+    manifest.update("guild", {"1": command})
+    manifest.save()
+
+    app = Flask(__name__)
+    app.config["DISCORD_PUBLIC_KEY"] = "00" * 32
+    app.config["DISCORD_SYNC_COMMANDS"] = False
+    app.config["DISCORD_COMMAND_MANIFEST"] = path
+
+    discord = Discord()
+    discord.add_command(command, "guild")
+    discord.tokens = MagicMock()
+    discord.init_app(app)
+
+    assert discord.runtime_commands == {"1": command}
+    discord.tokens.authorization.assert_not_called()
+
+
+def make_discord(tmp_path):
+    discord = Discord()
+    discord.client_id = "app"
+    discord.command_manifest = CommandManifest(str(tmp_path / "commands.json"))
+    discord.tokens = MagicMock()
+    discord._list_commands = MagicMock(
+        return_value=[remote_spec("1"), remote_spec("2", "deleted")]
+    )
+    discord._delete_command = MagicMock()
+    discord._edit_command = MagicMock()
+    discord._create_command = MagicMock(
+        return_value=ApplicationCommand(
+            id="3", application_id="app", name="created", description="", version="1"
+        )
+    )
+    return discord
+
+
+def test_sync_commands_only_sends_changes(tmp_path):
+    discord = make_discord(tmp_path)
+    unchanged, created = make_command(), make_command("created")
+
+    ids = discord.sync_commands([unchanged, created], "guild")
+
+    assert ids == {"1": unchanged, "3": created}
+    discord._delete_command.assert_called_once_with("2", "guild")
+    discord._edit_command.assert_not_called()
+    discord._create_command.assert_called_once_with(created, "guild")
+
+
+def test_sync_commands_skips_unchanged(tmp_path):
+    discord = make_discord(tmp_path)
+    commands = [make_command(), make_command("created")]
+    discord.sync_commands(commands, "guild")
+    discord.command_manifest.save()
+
+    discord = make_discord(tmp_path)
+    discord.command_manifest.load()
+    ids = discord.sync_commands(commands, "guild")
+
+    assert set(ids) == {"1", "3"}
+    discord.tokens.authorization.assert_not_called()
+    discord._list_commands.assert_not_called()
+
+
+def test_concurrent_workers_sync_once(tmp_path):
+    path = str(tmp_path / "commands.json")
+    syncs = []
+    results = []
+
+    def list_commands(guild_id):
+        syncs.append(guild_id)
+        time.sleep(0.1)
+        return [remote_spec("1")]
+
+    def worker():
+        app = Flask(__name__)
+        app.config["DISCORD_CLIENT_ID"] = "app"
+        app.config["DISCORD_CLIENT_SECRET"] = "secret"
+        app.config["DISCORD_COMMAND_MANIFEST"] = path
+
+        discord = Discord()
+        discord.add_command(make_command(), "guild")
+        discord.tokens = MagicMock()
+        discord._list_commands = list_commands
+        discord.init_commands(app)
+        results.append(discord.runtime_commands)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert syncs == ["guild"]
+    assert [list(runtime_commands) for runtime_commands in results] == [["1"]] * 4
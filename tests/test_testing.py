@@ -0,0 +1,98 @@
+import json
+
+from flask import Flask
+import pytest
+import urllib3
+
+from discord_interactions_flask.command import ChatCommand
+from discord_interactions_flask.discord import Discord
+from discord_interactions_flask.testing import FakeDiscordApi
+
+http = urllib3.PoolManager()
+
+
+def request(method, url, body=None, **headers):
+    resp = http.request(
+        method,
+        url,
+        body=None if body is None else json.dumps(body).encode(),
+        headers={"Content-Type": "application/json", **headers},
+    )
+    return resp.status, json.loads(resp.data) if resp.data else None, resp.headers
+
+
+def test_configure_points_discord_at_the_fake(fake_discord_api):
+    discord = Discord()
+    discord.add_command(ChatCommand(name="ping", description="ping"), "guild")
+    app = Flask(__name__)
+    app.config["DISCORD_PUBLIC_KEY"] = "00" * 32
+    fake_discord_api.configure(app)
+
+    discord.init_app(app)
+
+    assert [spec["name"] for spec in fake_discord_api.commands["guild"].values()] == [
+        "ping"
+    ]
+    assert ("POST", "/oauth2/token") in fake_discord_api.requests
+
+
+def test_commands_need_a_token(fake_discord_api):
+    status, _, _ = request("GET", f"{fake_discord_api.url}/applications/app/commands")
+
+    assert status == 401
+
+
+def test_interaction_callback_and_follow_ups(fake_discord_api):
+    url = fake_discord_api.url
+    status, _, _ = request(
+        "POST",
+        f"{url}/interactions/1/token/callback",
+        {"type": 4, "data": {"content": "first"}},
+    )
+    assert status == 204
+    status, _, _ = request(
+        "POST", f"{url}/interactions/1/token/callback", {"type": 4, "data": {}}
+    )
+    assert status == 400
+
+    status, original, _ = request("GET", f"{url}/webhooks/app/token/messages/@original")
+    assert (status, original["content"]) == (200, "first")
+
+    status, message, _ = request("POST", f"{url}/webhooks/app/token", {"content": "a"})
+    assert status == 200
+    message_url = f"{url}/webhooks/app/token/messages/{message['id']}"
+    status, edited, _ = request("PATCH", message_url, {"content": "b"})
+    assert (status, edited["content"]) == (200, "b")
+    assert request("DELETE", message_url)[0] == 204
+    assert request("GET", message_url)[0] == 404
+    assert list(fake_discord_api.messages["token"]) == ["@original"]
+
+
+def test_webhooks_are_rate_limited_per_token(fake_discord_api):
+    fake_discord_api.rate_limit = (1, 60)
+    url = f"{fake_discord_api.url}/webhooks/app"
+
+    status, _, headers = request("POST", f"{url}/one", {"content": "a"})
+    assert status == 200
+    assert headers["X-RateLimit-Remaining"] == "0"
+    status, payload, headers = request("POST", f"{url}/one", {"content": "a"})
+    assert status == 429
+    assert float(headers["Retry-After"]) == pytest.approx(
+        payload["retry_after"], abs=0.01
+    )
+    assert request("POST", f"{url}/two", {"content": "a"})[0] == 200
+    assert fake_discord_api.rate_limited == 1
+
+
+def test_injected_errors_apply_to_webhooks(fake_discord_api):
+    fake_discord_api.error_status = 503
+
+    status, _, _ = request("POST", f"{fake_discord_api.url}/webhooks/app/token", {})
+
+    assert status == 503
+
+
+def test_latency():
+    with FakeDiscordApi(latency=0.05) as api:
+        resp = http.request("POST", f"{api.url}/oauth2/token", timeout=1)
+        assert resp.status == 200
@@ -0,0 +1,40 @@
+import logging
+import time
+
+from discord_interactions_flask.watchdog import Watchdog
+
+
+def slow_handler(watchdog, interaction, seconds):
+    watchdog.start(interaction)
+    try:
+        time.sleep(seconds)
+    finally:
+        watchdog.stop()
+
+
+def test_slow_handler_is_reported(caplog, meta_group_interaction):
+    watchdog = Watchdog(soft_limit=0.05, hard_limit=0.15, interval=0.01)
+
+    with caplog.at_level(logging.WARNING, logger="discord_interactions_flask.watchdog"):
+        slow_handler(watchdog, meta_group_interaction, 0.2)
+
+    warning, error = caplog.records
+    assert warning.levelno == logging.WARNING
+    assert "meta_chat_command_name meta_chat_group_1 meta_chat_sub_1" in warning.message
+    # The stack of the handler while it was running
+    assert "slow_handler" in warning.message
+    assert error.levelno == logging.ERROR
+    assert watchdog.slow_handlers == 1
+    assert watchdog.deadline_misses == 1
+
+
+def test_fast_handler_is_not_reported(caplog, meta_group_interaction):
+    watchdog = Watchdog(soft_limit=0.1, hard_limit=0.2, interval=0.01)
+
+    with caplog.at_level(logging.WARNING, logger="discord_interactions_flask.watchdog"):
+        for _ in range(3):
+            slow_handler(watchdog, meta_group_interaction, 0.01)
+        time.sleep(0.05)
+
+    assert not caplog.records
+    assert watchdog.slow_handlers == watchdog.deadline_misses == 0
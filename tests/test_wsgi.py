@@ -0,0 +1,80 @@
+from flask import g
+from nacl.signing import SigningKey
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+from discord_interactions_flask import discord_types as types
+from discord_interactions_flask.helpers import content_response
+from discord_interactions_flask.instrumentation import STAGES
+from discord_interactions_flask.interactions import ChatInteraction
+from tests.conftest import RecordingSink, chat_payload, signed_post
+
+
+def mount_fast_app(app, discord):
+    """Mount the bare WSGI app over the Flask view, returning a client for the Flask view."""
+    flask_client = app.test_client()
+    app.wsgi_app = DispatcherMiddleware(
+        app.wsgi_app, {"/discord/interactions": discord.wsgi_app(app)}
+    )
+    return flask_client
+
+
+def test_responses_match_the_flask_view(pong_app, signing_key):
+    seen = []
+
+    def pong(interaction):
+        seen.append((interaction, g.discord_interactions.ctx))
+        return content_response("pong")
+
+    app, discord, command_id = pong_app(pong)
+    flask_client = mount_fast_app(app, discord)
+    fast_client = app.test_client()
+
+    for payload in (
+        {"type": types.InteractionType.PING},
+        chat_payload(command_id, "pong"),
+    ):
+        fast = signed_post(fast_client, signing_key, payload)
+        slow = signed_post(flask_client, signing_key, payload)
+        assert fast.status_code == slow.status_code == 200
+        assert fast.content_type == "application/json"
+        assert fast.json == slow.json
+
+    assert [type(interaction) for interaction, _ in seen] == [ChatInteraction] * 2
+    assert all(interaction is ctx for interaction, ctx in seen)
+
+
+def test_rejects_bad_signatures_and_other_methods(pong_app):
+    app, discord, command_id = pong_app()
+    mount_fast_app(app, discord)
+    client = app.test_client()
+
+    resp = signed_post(client, SigningKey.generate(), chat_payload(command_id, "pong"))
+    assert resp.status_code == 401
+
+    resp = client.get("/discord/interactions")
+    assert resp.status_code == 405
+    assert resp.headers["Allow"] == "POST"
+
+
+def test_stages_are_timed(pong_app, signing_key):
+    sink = RecordingSink()
+    app, discord, command_id = pong_app()
+    mount_fast_app(app, discord)
+    discord.timing_sink = sink
+
+    resp = signed_post(app.test_client(), signing_key, chat_payload(command_id, "pong"))
+
+    assert resp.status_code == 200
+    assert [stage for stage, _, _ in sink.records] == [*STAGES, "total"]
+
+
+def test_handler_errors_are_500s(pong_app, signing_key):
+    def fail(interaction):
+        raise RuntimeError("boom")
+
+    app, discord, command_id = pong_app(fail)
+    mount_fast_app(app, discord)
+
+    resp = signed_post(app.test_client(), signing_key, chat_payload(command_id, "pong"))
+
+    assert resp.status_code == 500